@@ -60,6 +60,12 @@ typedef struct eqs_block_t eqs_block_t;
  */
 typedef struct eqs_tensormap_t eqs_tensormap_t;
 
+/**
+ * Opaque type representing a `TensorMapWriter`, used to write a tensor map to
+ * a file one block at a time.
+ */
+typedef struct eqs_tensormap_writer_t eqs_tensormap_writer_t;
+
 /**
  * Status type returned by all functions in the C API.
  *
@@ -80,7 +86,9 @@ typedef int32_t eqs_status_t;
  *
  * `eqs_labels_t` with a non-NULL `internal_ptr_` correspond to a
  * reference-counted Rust data structure, which allow for fast lookup inside
- * the labels with `eqs_labels_positions`.
+ * the labels with `eqs_labels_positions`. These labels are shared (by
+ * increasing the reference count) instead of being copied when they are
+ * used to create blocks or tensor maps.
  */
 typedef struct eqs_labels_t {
   /**
@@ -214,10 +222,51 @@ typedef struct eqs_array_t {
    * This function should copy data from `input[samples[i].input, ..., :]` to
    * `array[samples[i].output, ..., property_start:property_end]` for `i` up
    * to `samples_count`. All indexes are 0-based.
+   *
+   * If both `input` and `output` use `eqs_cpu_buffer_data` for
+   * `eqs_array_t.data` and the corresponding buffers give access to the
+   * data, equistore copies the data directly and this function is not
+   * called.
    */
   eqs_status_t (*move_samples_from)(void *output, const void *input, const struct eqs_sample_mapping_t *samples, uintptr_t samples_count, uintptr_t property_start, uintptr_t property_end);
 } eqs_array_t;
 
+/**
+ * Description of an array of 64-bit floating point values living in CPU
+ * memory owned by someone else, which allows to implement the `shape` and
+ * `data` functions of `eqs_array_t` without calling back into user code.
+ *
+ * To use it, `eqs_array_t.ptr` should point to an `eqs_cpu_buffer_t`, and
+ * `eqs_array_t.shape`/`eqs_array_t.data` should be set to
+ * `eqs_cpu_buffer_shape`/`eqs_cpu_buffer_data`. The other functions in
+ * `eqs_array_t` get the same pointer and can use `user_data` to find the
+ * array owning the data. Since `user_data` is the first member, a pointer to
+ * the `eqs_cpu_buffer_t` is also a pointer to `user_data`.
+ *
+ * The owner of the array is responsible for keeping the `eqs_cpu_buffer_t`
+ * and the memory it points to alive, and updating them when the array
+ * changes (for example in `eqs_array_t.reshape` or `eqs_array_t.swap_axes`).
+ */
+typedef struct eqs_cpu_buffer_t {
+  /**
+   * User-provided data, not used by equistore
+   */
+  void *user_data;
+  /**
+   * Pointer to the data of the array, stored as a C-contiguous array. This
+   * should be `NULL` if the data is not available in this form.
+   */
+  double *data;
+  /**
+   * Shape of the array
+   */
+  const uintptr_t *shape;
+  /**
+   * Number of dimensions of the array, i.e. number of elements in `shape`
+   */
+  uintptr_t shape_count;
+} eqs_cpu_buffer_t;
+
 /**
  * Function pointer to create a new `eqs_array_t` when de-serializing tensor
  * maps.
@@ -232,6 +281,18 @@ typedef struct eqs_array_t {
  */
 typedef eqs_status_t (*eqs_create_array_callback_t)(const uintptr_t *shape, uintptr_t shape_count, struct eqs_array_t *array);
 
+/**
+ * Function pointer to grow in-memory buffers for `eqs_tensormap_save_buffer`.
+ *
+ * This function takes an existing pointer in `ptr` and a new size in
+ * `new_size`, and should grow the allocation to (at least) `new_size` bytes,
+ * keeping the existing content. If `ptr` is `NULL`, it should create a new
+ * allocation. If it is unable to allocate memory, it should return a `NULL`
+ * pointer. This follows the API of the standard C function `realloc`, with an
+ * additional parameter `user_data` that can be used to hold custom data.
+ */
+typedef uint8_t *(*eqs_realloc_buffer_t)(void *user_data, uint8_t *ptr, uintptr_t new_size);
+
 #ifdef __cplusplus
 extern "C" {
 #endif // __cplusplus
@@ -280,6 +341,30 @@ eqs_status_t eqs_labels_position(struct eqs_labels_t labels,
                                  uintptr_t values_count,
                                  int64_t *result);
 
+/**
+ * Get the positions of multiple entries defined by the `values` array in the
+ * given set of `labels`, in a single call. This operation is only available if
+ * the labels correspond to a set of Rust Labels (i.e. `labels.internal_ptr_`
+ * is not NULL).
+ *
+ * @param labels set of labels with an associated Rust data structure
+ * @param values 2D row-major array containing the entries to lookup. Each row
+ *               contains `labels.size` elements, and there are `values_count`
+ *               rows in total.
+ * @param values_count number of entries (rows) in the `values` array
+ * @param results array of `values_count` elements, on output will contain the
+ *                position of each entry in the labels or -1 if the entry was
+ *                not found
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_labels_positions(struct eqs_labels_t labels,
+                                  const int32_t *values,
+                                  uintptr_t values_count,
+                                  int64_t *results);
+
 /**
  * Finish the creation of `eqs_labels_t` by associating it to Rust-owned
  * labels.
@@ -326,6 +411,116 @@ eqs_status_t eqs_labels_clone(struct eqs_labels_t labels, struct eqs_labels_t *c
  */
 eqs_status_t eqs_labels_free(struct eqs_labels_t *labels);
 
+/**
+ * Take the union of two `eqs_labels_t`.
+ *
+ * The union contains all the entries of `first`, followed by the entries of
+ * `second` which are not already in `first`. If requested, this function can
+ * also give the positions in the union where each entry of the input
+ * `eqs_labels_t` ended up.
+ *
+ * This function allocates memory for `result` which must be released
+ * `eqs_labels_free` when you don't need it anymore.
+ *
+ * @param first first set of labels
+ * @param second second set of labels
+ * @param result empty labels, on output will contain the union of `first` and
+ *        `second`
+ * @param first_mapping if you want the mapping from the positions of entries
+ *        in `first` to the positions in `result`, this should be a pointer to
+ *        an array containing `first.count` elements, to be filled by this
+ *        function. Otherwise it should be a `NULL` pointer.
+ * @param first_mapping_count number of elements in `first_mapping`
+ * @param second_mapping if you want the mapping from the positions of entries
+ *        in `second` to the positions in `result`, this should be a pointer
+ *        to an array containing `second.count` elements, to be filled by this
+ *        function. Otherwise it should be a `NULL` pointer.
+ * @param second_mapping_count number of elements in `second_mapping`
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_labels_union(struct eqs_labels_t first,
+                              struct eqs_labels_t second,
+                              struct eqs_labels_t *result,
+                              int64_t *first_mapping,
+                              uintptr_t first_mapping_count,
+                              int64_t *second_mapping,
+                              uintptr_t second_mapping_count);
+
+/**
+ * Take the intersection of two `eqs_labels_t`.
+ *
+ * The intersection contains all the entries of `first` which are also in
+ * `second`, in the same order as in `first`. If requested, this function can
+ * also give the positions in the intersection where each entry of the input
+ * `eqs_labels_t` ended up.
+ *
+ * This function allocates memory for `result` which must be released
+ * `eqs_labels_free` when you don't need it anymore.
+ *
+ * @param first first set of labels
+ * @param second second set of labels
+ * @param result empty labels, on output will contain the intersection of
+ *        `first` and `second`
+ * @param first_mapping if you want the mapping from the positions of entries
+ *        in `first` to the positions in `result`, this should be a pointer to
+ *        an array containing `first.count` elements, to be filled by this
+ *        function. Otherwise it should be a `NULL` pointer. If an entry in
+ *        `first` is not used in `result`, the mapping will be set to -1.
+ * @param first_mapping_count number of elements in `first_mapping`
+ * @param second_mapping if you want the mapping from the positions of entries
+ *        in `second` to the positions in `result`, this should be a pointer
+ *        to an array containing `second.count` elements, to be filled by this
+ *        function. Otherwise it should be a `NULL` pointer. If an entry in
+ *        `second` is not used in `result`, the mapping will be set to -1.
+ * @param second_mapping_count number of elements in `second_mapping`
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_labels_intersection(struct eqs_labels_t first,
+                                     struct eqs_labels_t second,
+                                     struct eqs_labels_t *result,
+                                     int64_t *first_mapping,
+                                     uintptr_t first_mapping_count,
+                                     int64_t *second_mapping,
+                                     uintptr_t second_mapping_count);
+
+/**
+ * Take the difference of two `eqs_labels_t`.
+ *
+ * The difference contains all the entries of `first` which are not in
+ * `second`, in the same order as in `first`. If requested, this function can
+ * also give the positions in the difference where each entry of `first` ended
+ * up.
+ *
+ * This function allocates memory for `result` which must be released
+ * `eqs_labels_free` when you don't need it anymore.
+ *
+ * @param first first set of labels
+ * @param second second set of labels
+ * @param result empty labels, on output will contain the difference of
+ *        `first` and `second`
+ * @param first_mapping if you want the mapping from the positions of entries
+ *        in `first` to the positions in `result`, this should be a pointer to
+ *        an array containing `first.count` elements, to be filled by this
+ *        function. Otherwise it should be a `NULL` pointer. If an entry in
+ *        `first` is not used in `result`, the mapping will be set to -1.
+ * @param first_mapping_count number of elements in `first_mapping`
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_labels_difference(struct eqs_labels_t first,
+                                   struct eqs_labels_t second,
+                                   struct eqs_labels_t *result,
+                                   int64_t *first_mapping,
+                                   uintptr_t first_mapping_count);
+
 /**
  * Register a new data origin with the given `name`. Calling this function
  * multiple times with the same name will give the same `eqs_data_origin_t`.
@@ -353,6 +548,36 @@ eqs_status_t eqs_register_data_origin(const char *name, eqs_data_origin_t *origi
  */
 eqs_status_t eqs_get_data_origin(eqs_data_origin_t origin, char *buffer, uintptr_t buffer_size);
 
+/**
+ * Implementation of `eqs_array_t.shape` for arrays where `eqs_array_t.ptr`
+ * points to an `eqs_cpu_buffer_t`.
+ *
+ * @param array pointer to an `eqs_cpu_buffer_t`
+ * @param shape pointer to be filled with the shape of the array
+ * @param shape_count pointer to be filled with the number of dimensions
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_cpu_buffer_shape(const void *array,
+                                  const uintptr_t **shape,
+                                  uintptr_t *shape_count);
+
+/**
+ * Implementation of `eqs_array_t.data` for arrays where `eqs_array_t.ptr`
+ * points to an `eqs_cpu_buffer_t`. This fails if `eqs_cpu_buffer_t.data` is
+ * `NULL`.
+ *
+ * @param array pointer to an `eqs_cpu_buffer_t`
+ * @param data pointer to be filled with the data pointer of the array
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_cpu_buffer_data(void *array, double **data);
+
 /**
  * Create a new `eqs_block_t` with the given `data` and `samples`, `components`
  * and `properties` labels.
@@ -494,6 +719,36 @@ eqs_status_t eqs_block_gradients_list(const struct eqs_block_t *block,
                                       const char *const **parameters,
                                       uintptr_t *parameters_count);
 
+/**
+ * Reduce the given `block` over the samples dimensions listed in
+ * `sample_names`, combining all the samples which only differ by the values
+ * taken by these dimensions. The gradients of the block are reduced as well.
+ *
+ * The new samples contain the remaining samples dimensions, sorted in
+ * lexicographic order. If all the samples dimensions are reduced over, the
+ * new samples contain a single `"_"` dimension.
+ *
+ * This function requires the `data` callback of all the arrays in the block
+ * to be implemented.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_block_free`, or moved into a tensor map using `eqs_tensormap`.
+ *
+ * @param block pointer to an existing block
+ * @param sample_names names of the samples dimensions to reduce over
+ * @param sample_names_count number of entries in `sample_names`
+ * @param reduction reduction to use, one of `"sum"`, `"mean"`, `"var"` or
+ *                  `"std"`
+ *
+ * @returns A pointer to the newly allocated block, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_block_t *eqs_block_reduce_samples(const struct eqs_block_t *block,
+                                             const char *const *sample_names,
+                                             uintptr_t sample_names_count,
+                                             const char *reduction);
+
 /**
  * Create a new `eqs_tensormap_t` with the given `keys` and `blocks`.
  * `blocks_count` must be set to the number of entries in the blocks array.
@@ -605,6 +860,32 @@ eqs_status_t eqs_tensormap_blocks_matching(const struct eqs_tensormap_t *tensor,
                                            uintptr_t *count,
                                            struct eqs_labels_t selection);
 
+/**
+ * Get the index of the block corresponding to each entry of the `selection`
+ * in this `tensor`. The `selection` should have all the names/dimensions of
+ * the keys for this tensor map (potentially in a different order), and can
+ * contain any number of entries.
+ *
+ * This is faster than calling `eqs_tensormap_blocks_matching` for each entry,
+ * since the blocks are found with a single lookup in the keys for each entry.
+ *
+ * @param tensor pointer to an existing tensor map
+ * @param block_indexes array to be filled with the index of the block
+ *                      matching each entry of the `selection`, or -1 if there
+ *                      is no block matching this entry
+ * @param count number of entries in `block_indexes`, which must be the same
+ *              as the number of entries in `selection`
+ * @param selection labels describing the requested blocks
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_blocks_matching_keys(const struct eqs_tensormap_t *tensor,
+                                                int64_t *block_indexes,
+                                                uintptr_t count,
+                                                struct eqs_labels_t selection);
+
 /**
  * Merge blocks with the same value for selected keys dimensions along the
  * property axis.
@@ -712,8 +993,9 @@ struct eqs_tensormap_t *eqs_tensormap_keys_to_samples(const struct eqs_tensormap
  * `eqs_tensormap_free`.
  *
  * `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file
- * without compression (storage method is STORED), where each file is stored as
- * a `.npy` array. Both the ZIP and NPY format are well documented:
+ * without compression by default (storage method is STORED, DEFLATE is also
+ * supported), where each file is stored as a `.npy` array. Both the ZIP and
+ * NPY format are well documented:
  *
  * - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>
  * - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>
@@ -721,7 +1003,8 @@ struct eqs_tensormap_t *eqs_tensormap_keys_to_samples(const struct eqs_tensormap
  * We add other restriction on top of these formats when saving/loading data.
  * First, `Labels` instances are saved as structured array, see the `labels`
  * module for more information. Only 32-bit integers are supported for Labels,
- * and only 64-bit floats are supported for data (values and gradients).
+ * and only 64-bit, 32-bit and 16-bit floats are supported for data (values and
+ * gradients). The data is always loaded as 64-bit floats.
  *
  * Second, the path of the files in the archive also carry meaning. The keys of
  * the `TensorMap` are stored in `/keys.npy`, and then different blocks are
@@ -754,6 +1037,123 @@ struct eqs_tensormap_t *eqs_tensormap_keys_to_samples(const struct eqs_tensormap
 struct eqs_tensormap_t *eqs_tensormap_load(const char *path,
                                            eqs_create_array_callback_t create_array);
 
+/**
+ * Load a tensor map from the file at the given path, using multiple threads.
+ *
+ * The file format is the same as for `eqs_tensormap_load`. The data arrays
+ * are read and the labels are decoded in parallel, using `n_threads` threads.
+ * If `n_threads` is 0, the number of threads is picked automatically (usually
+ * as many as there are CPU cores).
+ *
+ * All the arrays are created with `create_array` from the calling thread, the
+ * other threads only write to the data pointer of these arrays.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_tensormap_free`.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ * @param create_array callback function that will be used to create data
+ *                     arrays inside each block
+ * @param n_threads number of threads to use
+ *
+ * @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_tensormap_t *eqs_tensormap_load_parallel(const char *path,
+                                                    eqs_create_array_callback_t create_array,
+                                                    uintptr_t n_threads);
+
+/**
+ * Load a tensor map from the file at the given path, mapping the file in
+ * memory instead of reading the data.
+ *
+ * The file format is the same as for `eqs_tensormap_load`. The values and
+ * gradients arrays are not copied, and the data is only paged in memory when
+ * it is accessed. These arrays use the `"equistore.io.mmap"` data origin. The
+ * file is mapped copy-on-write: the data can be modified, but modifications
+ * are never written back to the file. The file should not be modified while
+ * the tensor map (or any array coming from it) is alive.
+ *
+ * Arrays can only be mapped if they are stored without compression and
+ * aligned in the file (which is the case for files written by
+ * `eqs_tensormap_save`), other arrays are read in memory.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_tensormap_free`.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ *
+ * @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_tensormap_t *eqs_tensormap_load_mmap(const char *path);
+
+/**
+ * Load a tensor map from the given in-memory buffer.
+ *
+ * The buffer should contain the same data as a file created by
+ * `eqs_tensormap_save`, for example as written by `eqs_tensormap_save_buffer`.
+ * See `eqs_tensormap_load` for more information on the format.
+ *
+ * Arrays for the values and gradient data will be created with the given
+ * `create_array` callback, and filled by this function with the corresponding
+ * data. The buffer is not used after this function returns.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_tensormap_free`.
+ *
+ * @param buffer buffer containing a serialized tensor map
+ * @param buffer_count number of bytes in the buffer
+ * @param create_array callback function that will be used to create data
+ *                     arrays inside each block
+ *
+ * @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_tensormap_t *eqs_tensormap_load_buffer(const uint8_t *buffer,
+                                                  uintptr_t buffer_count,
+                                                  eqs_create_array_callback_t create_array);
+
+/**
+ * Load the parts of a tensor map matching a selection from the file at the
+ * given path.
+ *
+ * The file format is the same as for `eqs_tensormap_load`. Only the blocks
+ * with a key matching one of the entries in `keys` are loaded, and inside
+ * these blocks only the samples matching one of the entries in `samples` and
+ * the properties matching one of the entries in `properties` are kept. Each of
+ * these labels can contain a subset of the corresponding dimensions, and can
+ * be `NULL` to load all the entries.
+ *
+ * Blocks are read in the same order as in the file. The gradients are
+ * filtered in the same way as the values, and their `"sample"` dimension is
+ * updated to refer to the new samples. For data stored without compression,
+ * only the selected rows are read from the file.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_tensormap_free`.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ * @param create_array callback function that will be used to create data
+ *                     arrays inside each block
+ * @param keys selection on the keys, or `NULL` to load all blocks
+ * @param samples selection on the samples, or `NULL` to load all samples
+ * @param properties selection on the properties, or `NULL` to load all
+ *                   properties
+ *
+ * @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_tensormap_t *eqs_tensormap_load_selected(const char *path,
+                                                    eqs_create_array_callback_t create_array,
+                                                    const struct eqs_labels_t *keys,
+                                                    const struct eqs_labels_t *samples,
+                                                    const struct eqs_labels_t *properties);
+
 /**
  * Save a tensor map to the file at the given path.
  *
@@ -768,6 +1168,174 @@ struct eqs_tensormap_t *eqs_tensormap_load(const char *path,
  */
 eqs_status_t eqs_tensormap_save(const char *path, const struct eqs_tensormap_t *tensor);
 
+/**
+ * Save a tensor map to the file at the given path, using multiple threads.
+ *
+ * The labels and headers of the arrays are encoded in parallel using
+ * `n_threads` threads, and then written to the file. If `n_threads` is 0, the
+ * number of threads is picked automatically (usually as many as there are CPU
+ * cores). The file is the same as the one created by `eqs_tensormap_save`,
+ * with all the entries in the same order.
+ *
+ * If the file already exists, it is overwritten.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ * @param tensor tensor map to save to the file
+ * @param n_threads number of threads to use
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_save_parallel(const char *path,
+                                         const struct eqs_tensormap_t *tensor,
+                                         uintptr_t n_threads);
+
+/**
+ * Save a tensor map to the file at the given path, with additional options
+ * controlling how the data is stored.
+ *
+ * If `compress` is true, all the files in the archive are compressed with
+ * DEFLATE. The resulting files can still be read by `numpy.load`, but the
+ * data can not be memory-mapped by `eqs_tensormap_load_mmap`.
+ *
+ * `data_type` controls the type used to store the values and gradients data,
+ * and should be one of `"float64"`, `"float32"` or `"float16"`. Using a
+ * smaller type reduces the size of the file, but loses precision. The data is
+ * converted back to 64-bit floats when loading the file.
+ *
+ * The labels and headers of the arrays are encoded using `n_threads` threads,
+ * see `eqs_tensormap_save_parallel` for more information.
+ *
+ * If the file already exists, it is overwritten.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ * @param tensor tensor map to save to the file
+ * @param compress should we compress the files in the archive?
+ * @param data_type type used to store the data, as a NULL-terminated UTF-8
+ *                  string
+ * @param n_threads number of threads to use
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_save_with_options(const char *path,
+                                             const struct eqs_tensormap_t *tensor,
+                                             bool compress,
+                                             const char *data_type,
+                                             uintptr_t n_threads);
+
+/**
+ * Save a tensor map to an in-memory buffer.
+ *
+ * The content of the buffer is the same as the file created by
+ * `eqs_tensormap_save`. On input, `*buffer` should contain the address of a
+ * starting buffer (which can be `NULL`) and `*buffer_count` should contain
+ * the size of the allocation. The buffer is grown with the `realloc`
+ * callback to fit the serialized tensor map, and on output `*buffer` contains
+ * the address of the buffer and `*buffer_count` the number of bytes written
+ * to it.
+ *
+ * @param buffer pointer to the buffer, which will be updated by this function
+ * @param buffer_count pointer to the buffer size, which will be updated by
+ *                     this function
+ * @param realloc_user_data custom data given to the `realloc` function
+ * @param realloc function used to allocate memory for the buffer
+ * @param tensor tensor map to save to the buffer
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_save_buffer(uint8_t **buffer,
+                                       uintptr_t *buffer_count,
+                                       void *realloc_user_data,
+                                       eqs_realloc_buffer_t realloc,
+                                       const struct eqs_tensormap_t *tensor);
+
+/**
+ * Create a new writer for tensor maps, writing to the file at the given path.
+ *
+ * Instead of building a full tensor map in memory before saving it, this
+ * writer allows to add blocks (and the corresponding keys) to the file one at
+ * a time with `eqs_tensormap_writer_add_block`. The keys are written to the
+ * file by `eqs_tensormap_writer_finish`. The resulting file is the same as
+ * the one created by `eqs_tensormap_save` for a tensor map containing the
+ * same keys and blocks.
+ *
+ * If the file already exists, it is overwritten.
+ *
+ * The memory allocated by this function should be released using
+ * `eqs_tensormap_writer_free`.
+ *
+ * @param path path to the file as a NULL-terminated UTF-8 string
+ * @param keys_names names of the keys dimensions
+ * @param keys_names_count number of entries in the `keys_names` array
+ *
+ * @returns A pointer to the newly allocated writer, or a `NULL` pointer in
+ *          case of error. In case of error, you can use `eqs_last_error()`
+ *          to get the error message.
+ */
+struct eqs_tensormap_writer_t *eqs_tensormap_writer(const char *path,
+                                                    const char *const *keys_names,
+                                                    uintptr_t keys_names_count);
+
+/**
+ * Write the `block` associated with the given `key` to the file.
+ *
+ * The block is not modified and still owned by the caller, it can be released
+ * with `eqs_block_free` as soon as this function returns. All the blocks must
+ * have the same labels names and set of gradients, and all the keys must be
+ * different.
+ *
+ * @param writer writer created with `eqs_tensormap_writer`
+ * @param key values of the key associated with this block
+ * @param key_count number of entries in the `key` array, this must match the
+ *                  number of keys names given to `eqs_tensormap_writer`
+ * @param block block to write to the file
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_writer_add_block(struct eqs_tensormap_writer_t *writer,
+                                            const int32_t *key,
+                                            uintptr_t key_count,
+                                            const struct eqs_block_t *block);
+
+/**
+ * Write the keys and finish writing the file.
+ *
+ * This function must be called once all the blocks have been added, otherwise
+ * the file will not be a valid tensor map. No more blocks can be added after
+ * calling this function. The writer should still be released with
+ * `eqs_tensormap_writer_free`.
+ *
+ * @param writer writer created with `eqs_tensormap_writer`
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_writer_finish(struct eqs_tensormap_writer_t *writer);
+
+/**
+ * Free the memory associated with a `writer` previously created with
+ * `eqs_tensormap_writer`.
+ *
+ * If `eqs_tensormap_writer_finish` was not called on this writer, the file
+ * will not contain a valid tensor map. If `writer` is `NULL`, this function
+ * does nothing.
+ *
+ * @param writer pointer to an existing writer, or `NULL`
+ *
+ * @returns The status code of this operation. If the status is not
+ *          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+ *          error message.
+ */
+eqs_status_t eqs_tensormap_writer_free(struct eqs_tensormap_writer_t *writer);
+
 #ifdef __cplusplus
 } // extern "C"
 #endif // __cplusplus
@@ -486,6 +486,189 @@ public:
         return result;
     }
 
+    /// Get the positions of multiple entries in these Labels at once.
+    ///
+    /// `values` should be a 2D array with one row per entry to look up, and
+    /// `size()` columns. The returned vector contains the position of each
+    /// entry, or -1 for entries which are not part of these Labels.
+    std::vector<int64_t> positions(const NDArray<int32_t>& values) const {
+        assert(labels_.internal_ptr_ != nullptr);
+
+        if (values.shape().size() != 2 || values.shape()[1] != this->size()) {
+            throw Error(
+                "expected a 2D array with " + std::to_string(this->size()) +
+                " columns in Labels::positions"
+            );
+        }
+
+        auto results = std::vector<int64_t>(values.shape()[0], -1);
+        details::check_status(eqs_labels_positions(
+            labels_, values.data(), values.shape()[0], results.data()
+        ));
+        return results;
+    }
+
+    /// Take the union of these `Labels` with `other`.
+    ///
+    /// The union contains all the entries of these `Labels`, followed by the
+    /// entries of `other` which are not already present. If requested, this
+    /// function can also give the positions in the union where each entry of
+    /// the input `Labels` ended up.
+    ///
+    /// @param other the `Labels` we want to take the union with
+    /// @param first_mapping if you want the mapping from the positions of
+    ///        entries in `this` to the positions in the union, this should be
+    ///        a pointer to an array containing `this->count()` elements, to be
+    ///        filled by this function. Otherwise it should be a `nullptr`.
+    /// @param first_mapping_count number of elements in `first_mapping`
+    /// @param second_mapping if you want the mapping from the positions of
+    ///        entries in `other` to the positions in the union, this should be
+    ///        a pointer to an array containing `other.count()` elements, to be
+    ///        filled by this function. Otherwise it should be a `nullptr`.
+    /// @param second_mapping_count number of elements in `second_mapping`
+    Labels set_union(
+        const Labels& other,
+        int64_t* first_mapping = nullptr,
+        size_t first_mapping_count = 0,
+        int64_t* second_mapping = nullptr,
+        size_t second_mapping_count = 0
+    ) const {
+        eqs_labels_t result;
+        std::memset(&result, 0, sizeof(result));
+
+        details::check_status(eqs_labels_union(
+            labels_,
+            other.labels_,
+            &result,
+            first_mapping,
+            first_mapping_count,
+            second_mapping,
+            second_mapping_count
+        ));
+
+        return Labels(result);
+    }
+
+    /// Variant of `Labels::set_union` filling the mappings as `std::vector`
+    Labels set_union(
+        const Labels& other,
+        std::vector<int64_t>& first_mapping,
+        std::vector<int64_t>& second_mapping
+    ) const {
+        first_mapping.resize(this->count(), -1);
+        second_mapping.resize(other.count(), -1);
+
+        return this->set_union(
+            other,
+            first_mapping.data(),
+            first_mapping.size(),
+            second_mapping.data(),
+            second_mapping.size()
+        );
+    }
+
+    /// Take the intersection of these `Labels` with `other`.
+    ///
+    /// The intersection contains all the entries of these `Labels` which are
+    /// also in `other`, in the same order. If requested, this function can
+    /// also give the positions in the intersection where each entry of the
+    /// input `Labels` ended up.
+    ///
+    /// @param other the `Labels` we want to take the intersection with
+    /// @param first_mapping if you want the mapping from the positions of
+    ///        entries in `this` to the positions in the intersection, this
+    ///        should be a pointer to an array containing `this->count()`
+    ///        elements, to be filled by this function. Otherwise it should be a
+    ///        `nullptr`. Entries not in the intersection are mapped to -1.
+    /// @param first_mapping_count number of elements in `first_mapping`
+    /// @param second_mapping if you want the mapping from the positions of
+    ///        entries in `other` to the positions in the intersection, this
+    ///        should be a pointer to an array containing `other.count()`
+    ///        elements, to be filled by this function. Otherwise it should be a
+    ///        `nullptr`. Entries not in the intersection are mapped to -1.
+    /// @param second_mapping_count number of elements in `second_mapping`
+    Labels set_intersection(
+        const Labels& other,
+        int64_t* first_mapping = nullptr,
+        size_t first_mapping_count = 0,
+        int64_t* second_mapping = nullptr,
+        size_t second_mapping_count = 0
+    ) const {
+        eqs_labels_t result;
+        std::memset(&result, 0, sizeof(result));
+
+        details::check_status(eqs_labels_intersection(
+            labels_,
+            other.labels_,
+            &result,
+            first_mapping,
+            first_mapping_count,
+            second_mapping,
+            second_mapping_count
+        ));
+
+        return Labels(result);
+    }
+
+    /// Variant of `Labels::set_intersection` filling the mappings as
+    /// `std::vector`
+    Labels set_intersection(
+        const Labels& other,
+        std::vector<int64_t>& first_mapping,
+        std::vector<int64_t>& second_mapping
+    ) const {
+        first_mapping.resize(this->count(), -1);
+        second_mapping.resize(other.count(), -1);
+
+        return this->set_intersection(
+            other,
+            first_mapping.data(),
+            first_mapping.size(),
+            second_mapping.data(),
+            second_mapping.size()
+        );
+    }
+
+    /// Take the difference of these `Labels` with `other`.
+    ///
+    /// The difference contains all the entries of these `Labels` which are
+    /// not in `other`, in the same order. If requested, this function can
+    /// also give the positions in the difference where each entry of these
+    /// `Labels` ended up.
+    ///
+    /// @param other the `Labels` we want to take the difference with
+    /// @param first_mapping if you want the mapping from the positions of
+    ///        entries in `this` to the positions in the difference, this
+    ///        should be a pointer to an array containing `this->count()`
+    ///        elements, to be filled by this function. Otherwise it should be a
+    ///        `nullptr`. Entries not in the difference are mapped to -1.
+    /// @param first_mapping_count number of elements in `first_mapping`
+    Labels set_difference(
+        const Labels& other,
+        int64_t* first_mapping = nullptr,
+        size_t first_mapping_count = 0
+    ) const {
+        eqs_labels_t result;
+        std::memset(&result, 0, sizeof(result));
+
+        details::check_status(eqs_labels_difference(
+            labels_,
+            other.labels_,
+            &result,
+            first_mapping,
+            first_mapping_count
+        ));
+
+        return Labels(result);
+    }
+
+    /// Variant of `Labels::set_difference` filling the mapping as
+    /// `std::vector`
+    Labels set_difference(const Labels& other, std::vector<int64_t>& first_mapping) const {
+        first_mapping.resize(this->count(), -1);
+        return this->set_difference(other, first_mapping.data(), first_mapping.size());
+    }
+
     /// Get the value inside these `Labels` at the given index
     int32_t operator()(size_t i, size_t j) const {
         return NDArray<int32_t>::operator()(i, j);
@@ -1304,6 +1487,34 @@ public:
         return result;
     }
 
+    /// Reduce this block over the samples dimensions in `sample_names`,
+    /// combining all the samples which only differ by the values taken by
+    /// these dimensions with the given `reduction` (one of `"sum"`, `"mean"`,
+    /// `"var"` or `"std"`). The gradients are reduced as well.
+    ///
+    /// This requires the data of all the arrays in this block to be
+    /// accessible with `DataArrayBase::data`.
+    ///
+    /// @param sample_names names of the samples dimensions to reduce over
+    /// @param reduction how to combine the samples together
+    TensorBlock reduce_over_samples(const std::vector<std::string>& sample_names, const std::string& reduction) const {
+        auto c_sample_names = std::vector<const char*>();
+        for (const auto& name: sample_names) {
+            c_sample_names.push_back(name.c_str());
+        }
+
+        auto result = TensorBlock();
+        result.is_view_ = false;
+        result.block_ = eqs_block_reduce_samples(
+            block_,
+            c_sample_names.data(),
+            c_sample_names.size(),
+            reduction.c_str()
+        );
+        details::check_pointer(result.block_);
+        return result;
+    }
+
     /// Get the gradient of the `values()` in this block with respect to
     /// the given `parameter`.
     ///
@@ -1523,6 +1734,22 @@ public:
         return matching;
     }
 
+    /// Get the index of the block matching each entry in `selection`, or -1
+    /// if there is no block matching this entry. The `selection` must contain
+    /// all the dimensions of the keys.
+    std::vector<int64_t> blocks_matching_keys(const Labels& selection) const {
+        auto matching = std::vector<int64_t>(selection.count());
+
+        details::check_status(eqs_tensormap_blocks_matching_keys(
+            tensor_,
+            matching.data(),
+            matching.size(),
+            selection.as_eqs_labels_t()
+        ));
+
+        return matching;
+    }
+
     /// Get a block inside this TensorMap by it's index/the index of the
     /// corresponding key.
     ///
@@ -1669,36 +1896,157 @@ public:
     /// Load a previously saved `TensorMap` from the given path.
     ///
     /// `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP
-    /// file without compression (storage method is `STORED`), where each file
-    /// is stored as a `.npy` array. See the C API documentation for more
+    /// file without compression by default (storage method is `STORED`,
+    /// `DEFLATE` is also supported), where each file is stored as a `.npy`
+    /// array. The data can be stored as 64-bit, 32-bit or 16-bit floats, and
+    /// is always loaded as 64-bit floats. See the C API documentation for more
     /// information on the format.
-    static TensorMap load(const std::string& path) {
-        auto ptr = eqs_tensormap_load(
-            path.c_str(),
-            [](const uintptr_t* shape_ptr, uintptr_t shape_count, eqs_array_t *array){
-                auto shape = std::vector<size_t>();
-                for (size_t i=0; i<shape_count; i++) {
-                    shape.push_back(static_cast<size_t>(shape_ptr[i]));
-                }
+    ///
+    /// The data is read and the labels decoded using `threads` threads. If
+    /// `threads` is 0, as many threads as there are CPU cores are used.
+    static TensorMap load(const std::string& path, size_t threads = 1) {
+        eqs_tensormap_t* ptr = nullptr;
+        if (threads == 1) {
+            ptr = eqs_tensormap_load(path.c_str(), create_simple_array);
+        } else {
+            ptr = eqs_tensormap_load_parallel(path.c_str(), create_simple_array, threads);
+        }
+        details::check_pointer(ptr);
+        return TensorMap(ptr);
+    }
 
-                auto cxx_array = std::unique_ptr<DataArrayBase>(new SimpleDataArray(shape));
-                *array = DataArrayBase::to_eqs_array_t(std::move(cxx_array));
+    /// Load the parts of a previously saved `TensorMap` matching a selection
+    /// from the given path.
+    ///
+    /// Only the blocks with a key matching one of the entries in `keys`, and
+    /// inside these blocks only the samples matching one of the entries in
+    /// `samples` and the properties matching one of the entries in
+    /// `properties` are loaded. Each selection can contain a subset of the
+    /// corresponding dimensions, or be `nullptr` to load all the entries. See
+    /// the C API documentation for more information.
+    static TensorMap load_selected(
+        const std::string& path,
+        const Labels* keys,
+        const Labels* samples = nullptr,
+        const Labels* properties = nullptr
+    ) {
+        eqs_labels_t c_keys = {};
+        eqs_labels_t c_samples = {};
+        eqs_labels_t c_properties = {};
+        if (keys != nullptr) {
+            c_keys = keys->as_eqs_labels_t();
+        }
+        if (samples != nullptr) {
+            c_samples = samples->as_eqs_labels_t();
+        }
+        if (properties != nullptr) {
+            c_properties = properties->as_eqs_labels_t();
+        }
 
-                return EQS_SUCCESS;
-            }
+        auto ptr = eqs_tensormap_load_selected(
+            path.c_str(),
+            create_simple_array,
+            keys != nullptr ? &c_keys : nullptr,
+            samples != nullptr ? &c_samples : nullptr,
+            properties != nullptr ? &c_properties : nullptr
         );
         details::check_pointer(ptr);
         return TensorMap(ptr);
     }
 
+    /// Load a previously saved `TensorMap` from the in-memory `buffer`,
+    /// containing `buffer_count` bytes.
+    ///
+    /// The buffer should contain the same data as a file written by
+    /// `TensorMap::save`, for example as created by `TensorMap::save_buffer`.
+    static TensorMap load_buffer(const uint8_t* buffer, size_t buffer_count) {
+        auto ptr = eqs_tensormap_load_buffer(buffer, buffer_count, create_simple_array);
+        details::check_pointer(ptr);
+        return TensorMap(ptr);
+    }
+
+    /// Load a previously saved `TensorMap` from the in-memory `buffer`.
+    static TensorMap load_buffer(const std::vector<uint8_t>& buffer) {
+        return TensorMap::load_buffer(buffer.data(), buffer.size());
+    }
+
+    /// Load a previously saved `TensorMap` from the given path, mapping the
+    /// file in memory instead of reading the data.
+    ///
+    /// The data of the values and gradients is only paged in memory when
+    /// accessed. Modifications of this data are never written back to the
+    /// file. The file should not be modified while the `TensorMap` (or any
+    /// array coming from it) is alive.
+    /// See the C API documentation for more information.
+    static TensorMap load_mmap(const std::string& path) {
+        auto ptr = eqs_tensormap_load_mmap(path.c_str());
+        details::check_pointer(ptr);
+        return TensorMap(ptr);
+    }
+
     /// "Save the given `TensorMap` to a file at `path`.
     ///
     /// `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP
     /// file without compression (storage method is `STORED`), where each file
-    /// is stored as a `.npy` array. See the C API documentation for more
-    /// information on the format.
-    static void save(const std::string& path, const TensorMap& tensor) {
-        details::check_status(eqs_tensormap_save(path.c_str(), tensor.tensor_));
+    /// is stored as a `.npy` array. Use `TensorMap::save_with_options` to
+    /// compress the file or store the data with reduced precision. See the C
+    /// API documentation for more information on the format.
+    ///
+    /// The labels are encoded using `threads` threads. If `threads` is 0, as
+    /// many threads as there are CPU cores are used. The file is the same
+    /// regardless of the number of threads.
+    static void save(const std::string& path, const TensorMap& tensor, size_t threads = 1) {
+        if (threads == 1) {
+            details::check_status(eqs_tensormap_save(path.c_str(), tensor.tensor_));
+        } else {
+            details::check_status(eqs_tensormap_save_parallel(path.c_str(), tensor.tensor_, threads));
+        }
+    }
+
+    /// Save the given `TensorMap` to an in-memory buffer, containing the same
+    /// data as the file written by `TensorMap::save`.
+    static std::vector<uint8_t> save_buffer(const TensorMap& tensor) {
+        auto buffer = std::vector<uint8_t>();
+        auto realloc_vector = [](void* user_data, uint8_t*, uintptr_t new_size) {
+            auto* buffer = static_cast<std::vector<uint8_t>*>(user_data);
+            buffer->resize(new_size, 0);
+            return buffer->data();
+        };
+
+        uint8_t* buffer_ptr = nullptr;
+        uintptr_t buffer_count = 0;
+        details::check_status(eqs_tensormap_save_buffer(
+            &buffer_ptr,
+            &buffer_count,
+            &buffer,
+            realloc_vector,
+            tensor.tensor_
+        ));
+
+        buffer.resize(buffer_count);
+        return buffer;
+    }
+
+    /// Save the given `TensorMap` to a file at `path`, optionally compressing
+    /// the files in the archive and storing the data with a smaller type.
+    ///
+    /// `data_type` should be one of `"float64"`, `"float32"` or `"float16"`.
+    /// The data is converted back to 64-bit floats when loading the file. See
+    /// the C API documentation for more information.
+    static void save_with_options(
+        const std::string& path,
+        const TensorMap& tensor,
+        bool compress,
+        const std::string& data_type = "float64",
+        size_t threads = 1
+    ) {
+        details::check_status(eqs_tensormap_save_with_options(
+            path.c_str(),
+            tensor.tensor_,
+            compress,
+            data_type.c_str(),
+            threads
+        ));
     }
 
     /// Get the `eqs_tensormap_t` pointer corresponding to this `TensorMap`.
@@ -1723,10 +2071,92 @@ public:
     TensorMap(eqs_tensormap_t* tensor): tensor_(tensor) {}
 
 private:
+    /// Callback creating `SimpleDataArray` when loading tensor maps
+    static eqs_status_t create_simple_array(const uintptr_t* shape_ptr, uintptr_t shape_count, eqs_array_t *array) {
+        auto shape = std::vector<size_t>();
+        for (size_t i=0; i<shape_count; i++) {
+            shape.push_back(static_cast<size_t>(shape_ptr[i]));
+        }
+
+        auto cxx_array = std::unique_ptr<DataArrayBase>(new SimpleDataArray(shape));
+        *array = DataArrayBase::to_eqs_array_t(std::move(cxx_array));
+
+        return EQS_SUCCESS;
+    }
+
     eqs_tensormap_t* tensor_;
 };
 
 
+/// Incremental writer for `TensorMap`, adding blocks to a file one at a time.
+///
+/// This allows to save a `TensorMap` without having all the blocks in memory
+/// at the same time. Blocks are written to the file as soon as they are added
+/// with `TensorMapWriter::add`, and the keys are written by
+/// `TensorMapWriter::finish`. The resulting file is the same as the one
+/// created by `TensorMap::save` for a `TensorMap` containing the same keys and
+/// blocks.
+class TensorMapWriter final {
+public:
+    /// Create a new writer for the file at `path`, where the keys contain the
+    /// given `names`. If the file already exists, it is overwritten.
+    TensorMapWriter(const std::string& path, const std::vector<std::string>& names) {
+        auto c_names = std::vector<const char*>();
+        for (const auto& name: names) {
+            c_names.push_back(name.c_str());
+        }
+
+        writer_ = eqs_tensormap_writer(path.c_str(), c_names.data(), c_names.size());
+        details::check_pointer(writer_);
+    }
+
+    ~TensorMapWriter() {
+        eqs_tensormap_writer_free(writer_);
+    }
+
+    /// TensorMapWriter can NOT be copy constructed
+    TensorMapWriter(const TensorMapWriter&) = delete;
+    /// TensorMapWriter can NOT be copy assigned
+    TensorMapWriter& operator=(const TensorMapWriter&) = delete;
+
+    /// TensorMapWriter can be move constructed
+    TensorMapWriter(TensorMapWriter&& other) noexcept : writer_(nullptr) {
+        *this = std::move(other);
+    }
+
+    /// TensorMapWriter can be move assigned
+    TensorMapWriter& operator=(TensorMapWriter&& other) noexcept {
+        eqs_tensormap_writer_free(writer_);
+
+        this->writer_ = other.writer_;
+        other.writer_ = nullptr;
+
+        return *this;
+    }
+
+    /// Write the `block` associated with the given `key` to the file. All the
+    /// blocks must have the same labels names and set of gradients, and all
+    /// the keys must be different.
+    void add(const std::vector<int32_t>& key, const TensorBlock& block) {
+        details::check_status(eqs_tensormap_writer_add_block(
+            writer_,
+            key.data(),
+            key.size(),
+            block.as_eqs_block_t()
+        ));
+    }
+
+    /// Write the keys and finish writing the file. No more blocks can be added
+    /// after calling this function.
+    void finish() {
+        details::check_status(eqs_tensormap_writer_finish(writer_));
+    }
+
+private:
+    eqs_tensormap_writer_t* writer_;
+};
+
+
 }
 
 #endif /* EQUISTORE_HPP */
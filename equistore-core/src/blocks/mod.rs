@@ -4,9 +4,13 @@ use std::collections::{HashMap, BTreeSet};
 
 use crate::utils::ConstCString;
 use crate::{Labels, LabelsBuilder};
+use crate::labels::LabelsInterner;
 use crate::{eqs_array_t, get_data_origin};
 use crate::Error;
 
+mod reduce_over_samples;
+pub use self::reduce_over_samples::SamplesReduction;
+
 /// A `Vec` which can not be modified
 #[derive(Debug, Clone, PartialEq, Eq)]
 pub struct ImmutableVec<T>(Vec<T>);
@@ -176,6 +180,15 @@ impl BasicBlock {
         Ok(())
     }
 
+    /// Replace the components and properties labels of this block with the
+    /// labels with the same content in `interner`
+    fn intern_labels(&mut self, interner: &mut LabelsInterner) {
+        for component in &mut self.components.0 {
+            *component = interner.intern(component);
+        }
+        self.properties = interner.intern(&self.properties);
+    }
+
     /// Try to copy this `BasicBlock`. This can fail if we are unable to copy
     /// the underlying `eqs_array_t` data array
     pub fn try_clone(&self) -> Result<BasicBlock, Error> {
@@ -356,6 +369,16 @@ impl TensorBlock {
         return Ok(())
     }
 
+    /// Share the components and properties labels of the values and gradients
+    /// of this block with other blocks through the `interner`, so identical
+    /// labels are only stored once.
+    pub(crate) fn intern_labels(&mut self, interner: &mut LabelsInterner) {
+        self.values.intern_labels(interner);
+        for gradient in self.gradients.values_mut() {
+            gradient.intern_labels(interner);
+        }
+    }
+
     pub(crate) fn components_to_properties(&mut self, dimensions: &[&str]) -> Result<(), Error> {
         if dimensions.is_empty() {
             return Ok(());
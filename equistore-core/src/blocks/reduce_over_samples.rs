@@ -0,0 +1,348 @@
+use std::collections::HashMap;
+use std::collections::hash_map::Entry;
+use std::sync::Arc;
+
+use smallvec::{SmallVec, smallvec};
+
+use crate::{Labels, LabelsBuilder, LabelValue};
+use crate::{Error, eqs_array_t};
+
+use super::TensorBlock;
+
+/// Operation used to combine multiple samples together in
+/// `TensorBlock::reduce_over_samples`
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum SamplesReduction {
+    /// Sum of the samples
+    Sum,
+    /// Arithmetic mean of the samples
+    Mean,
+    /// Variance of the samples
+    Var,
+    /// Standard deviation of the samples
+    Std,
+}
+
+impl SamplesReduction {
+    /// Get the reduction corresponding to the given `name`, which should be
+    /// one of `"sum"`, `"mean"`, `"var"` or `"std"`.
+    pub fn from_name(name: &str) -> Result<SamplesReduction, Error> {
+        match name {
+            "sum" => Ok(SamplesReduction::Sum),
+            "mean" => Ok(SamplesReduction::Mean),
+            "var" => Ok(SamplesReduction::Var),
+            "std" => Ok(SamplesReduction::Std),
+            _ => Err(Error::InvalidParameter(format!(
+                "unknown reduction '{}', expected one of 'sum', 'mean', 'var' or 'std'",
+                name
+            ))),
+        }
+    }
+
+    /// Does this reduction require the mean and variance of the values?
+    fn needs_moments(self) -> bool {
+        matches!(self, SamplesReduction::Var | SamplesReduction::Std)
+    }
+}
+
+/// Reduced values for a block, together with the intermediary results needed
+/// to reduce the gradients
+struct ReducedValues {
+    /// result of the reduction
+    values: Vec<f64>,
+    /// mean of the values in each group, only set for var/std reductions
+    mean: Vec<f64>,
+}
+
+impl TensorBlock {
+    /// Reduce this block over the samples dimensions listed in `sample_names`,
+    /// combining all the samples which only differ by the values taken by
+    /// these dimensions with the given `reduction`. The gradients are reduced
+    /// as well.
+    ///
+    /// The grouping of the samples and the accumulation are done in a single
+    /// pass over the data. The new samples contain the remaining dimensions,
+    /// sorted in lexicographic order. If all dimensions are reduced over, the
+    /// new samples contain a single `"_"` dimension.
+    ///
+    /// This function requires access to the data of all the arrays in this
+    /// block (i.e. `eqs_array_t.data` must succeed).
+    pub fn reduce_over_samples(&self, sample_names: &[&str], reduction: SamplesReduction) -> Result<TensorBlock, Error> {
+        let samples = &self.values.samples;
+        let all_names = samples.names();
+        for name in sample_names {
+            if !all_names.contains(name) {
+                return Err(Error::InvalidParameter(format!(
+                    "'{}' is not part of the samples of this block, expected one of [{}]",
+                    name, all_names.join(", ")
+                )));
+            }
+        }
+
+        let remaining = all_names.iter()
+            .enumerate()
+            .filter(|(_, name)| !sample_names.contains(name))
+            .map(|(i, _)| i)
+            .collect::<Vec<_>>();
+
+        let (new_samples, sample_groups) = if remaining.is_empty() && !samples.is_empty() {
+            group_entries(vec!["_"], samples.iter().map(|_| smallvec![LabelValue::new(0)]))?
+        } else {
+            let names = remaining.iter().map(|&i| all_names[i]).collect();
+            let entries = samples.iter().map(|sample| {
+                remaining.iter().map(|&i| sample[i]).collect()
+            });
+            group_entries(names, entries)?
+        };
+
+        let shape = self.values.data.shape()?;
+        let values = array_data(&self.values.data)?;
+        let stride = shape[1..].iter().product::<usize>();
+        let reduced = reduce_values(values, stride, &sample_groups, new_samples.count(), reduction);
+
+        let mut new_shape = shape.to_vec();
+        new_shape[0] = new_samples.count();
+        let new_values = create_array(&self.values.data, &new_shape, &reduced.values)?;
+
+        let mut new_block = TensorBlock::new(
+            new_values,
+            Arc::new(new_samples),
+            self.values.components.to_vec(),
+            Arc::clone(&self.values.properties),
+        )?;
+
+        for parameter in &self.gradient_parameters {
+            let parameter = parameter.as_str();
+            let gradient = &self.gradients[parameter];
+
+            let mut entries = Vec::with_capacity(gradient.samples.count());
+            for grad_sample in gradient.samples.iter() {
+                let sample = grad_sample[0];
+                if sample.isize() < 0 || sample.usize() >= sample_groups.len() {
+                    return Err(Error::InvalidParameter(format!(
+                        "invalid gradient sample with respect to '{}': it refers \
+                        to sample {} but there are only {} samples in this block",
+                        parameter, sample, sample_groups.len()
+                    )));
+                }
+
+                let mut entry = SmallVec::<[LabelValue; 4]>::from_slice(grad_sample);
+                entry[0] = LabelValue::from(sample_groups[sample.usize()]);
+                entries.push(entry);
+            }
+            let (new_gradient_samples, gradient_groups) = group_entries(
+                gradient.samples.names(), entries.into_iter()
+            )?;
+
+            let gradient_shape = gradient.data.shape()?;
+            let gradient_data = array_data(&gradient.data)?;
+            let gradient_stride = gradient_shape[1..].iter().product::<usize>();
+            let n_gradient_groups = new_gradient_samples.count();
+
+            let mut counts = vec![0_usize; n_gradient_groups];
+            let mut sums = vec![0.0; n_gradient_groups * gradient_stride];
+            let mut values_times_gradient = if reduction.needs_moments() {
+                vec![0.0; n_gradient_groups * gradient_stride]
+            } else {
+                Vec::new()
+            };
+
+            for (row, &group) in gradient_groups.iter().enumerate() {
+                counts[group] += 1;
+
+                let input = &gradient_data[row * gradient_stride..(row + 1) * gradient_stride];
+                let output = &mut sums[group * gradient_stride..(group + 1) * gradient_stride];
+                for (output, input) in output.iter_mut().zip(input) {
+                    *output += input;
+                }
+
+                if reduction.needs_moments() {
+                    // the gradient can contain additional components before the
+                    // values components, so the values are repeated every
+                    // `stride` elements
+                    let sample_i = gradient.samples[row][0].usize();
+                    let sample_values = &values[sample_i * stride..(sample_i + 1) * stride];
+
+                    let output = &mut values_times_gradient[group * gradient_stride..(group + 1) * gradient_stride];
+                    for (j, (output, input)) in output.iter_mut().zip(input).enumerate() {
+                        *output += input * sample_values[j % stride];
+                    }
+                }
+            }
+
+            for (group, &count) in counts.iter().enumerate() {
+                let range = group * gradient_stride..(group + 1) * gradient_stride;
+                let new_sample_i = new_gradient_samples[group][0].usize();
+                #[allow(clippy::cast_precision_loss)]
+                let count = count as f64;
+
+                match reduction {
+                    SamplesReduction::Sum => {},
+                    SamplesReduction::Mean => {
+                        for value in &mut sums[range] {
+                            *value /= count;
+                        }
+                    },
+                    SamplesReduction::Var | SamplesReduction::Std => {
+                        let mean = &reduced.mean[new_sample_i * stride..(new_sample_i + 1) * stride];
+                        let std = &reduced.values[new_sample_i * stride..(new_sample_i + 1) * stride];
+
+                        let values_times_gradient = &values_times_gradient[range.clone()];
+                        for (j, (value, vtg)) in sums[range].iter_mut().zip(values_times_gradient).enumerate() {
+                            let centered = vtg / count - (*value / count) * mean[j % stride];
+                            if reduction == SamplesReduction::Var {
+                                *value = 2.0 * centered;
+                            } else {
+                                let result = centered / std[j % stride];
+                                *value = if result.is_finite() { result } else { 0.0 };
+                            }
+                        }
+                    },
+                }
+            }
+
+            let mut new_gradient_shape = gradient_shape.to_vec();
+            new_gradient_shape[0] = n_gradient_groups;
+            let new_gradient = create_array(&self.values.data, &new_gradient_shape, &sums)?;
+
+            new_block.add_gradient(
+                parameter,
+                new_gradient,
+                Arc::new(new_gradient_samples),
+                gradient.components.to_vec(),
+            )?;
+        }
+
+        return Ok(new_block);
+    }
+}
+
+/// Group together identical `entries`, returning the labels containing the
+/// unique entries (with the given `names`, sorted in lexicographic order) and
+/// the index of the group for each entry.
+fn group_entries(
+    names: Vec<&str>,
+    entries: impl Iterator<Item=SmallVec<[LabelValue; 4]>>,
+) -> Result<(Labels, Vec<usize>), Error> {
+    let mut positions = HashMap::<_, usize, ahash::RandomState>::default();
+    let mut unique = Vec::new();
+    let mut groups = Vec::with_capacity(entries.size_hint().0);
+
+    for entry in entries {
+        let group = match positions.entry(entry) {
+            Entry::Occupied(entry) => *entry.get(),
+            Entry::Vacant(entry) => {
+                let group = unique.len();
+                unique.push(entry.key().clone());
+                entry.insert(group);
+                group
+            }
+        };
+        groups.push(group);
+    }
+
+    let mut order = (0..unique.len()).collect::<Vec<_>>();
+    order.sort_unstable_by(|&a, &b| unique[a].cmp(&unique[b]));
+
+    let mut new_group = vec![0; unique.len()];
+    let mut builder = LabelsBuilder::new(names);
+    builder.reserve(unique.len());
+    for (new, &old) in order.iter().enumerate() {
+        new_group[old] = new;
+        builder.add(&unique[old])?;
+    }
+
+    for group in &mut groups {
+        *group = new_group[*group];
+    }
+
+    return Ok((builder.finish(), groups));
+}
+
+/// Accumulate `values` (containing rows of size `stride`) according to
+/// `groups`, and apply the `reduction`.
+fn reduce_values(
+    values: &[f64],
+    stride: usize,
+    groups: &[usize],
+    n_groups: usize,
+    reduction: SamplesReduction,
+) -> ReducedValues {
+    let mut counts = vec![0_usize; n_groups];
+    let mut sums = vec![0.0; n_groups * stride];
+    let mut sums_squared = if reduction.needs_moments() {
+        vec![0.0; n_groups * stride]
+    } else {
+        Vec::new()
+    };
+
+    for (sample_i, &group) in groups.iter().enumerate() {
+        counts[group] += 1;
+
+        let input = &values[sample_i * stride..(sample_i + 1) * stride];
+        let output = &mut sums[group * stride..(group + 1) * stride];
+        for (output, input) in output.iter_mut().zip(input) {
+            *output += input;
+        }
+
+        if reduction.needs_moments() {
+            let output = &mut sums_squared[group * stride..(group + 1) * stride];
+            for (output, input) in output.iter_mut().zip(input) {
+                *output += input * input;
+            }
+        }
+    }
+
+    if reduction == SamplesReduction::Sum {
+        return ReducedValues { values: sums, mean: Vec::new() };
+    }
+
+    for (group, &count) in counts.iter().enumerate() {
+        #[allow(clippy::cast_precision_loss)]
+        let count = count as f64;
+        for value in &mut sums[group * stride..(group + 1) * stride] {
+            *value /= count;
+        }
+
+        if reduction.needs_moments() {
+            for value in &mut sums_squared[group * stride..(group + 1) * stride] {
+                *value /= count;
+            }
+        }
+    }
+
+    if reduction == SamplesReduction::Mean {
+        return ReducedValues { values: sums, mean: Vec::new() };
+    }
+
+    let mean = sums;
+    let mut values = sums_squared;
+    for (value, mean) in values.iter_mut().zip(&mean) {
+        *value -= mean * mean;
+        if reduction == SamplesReduction::Std {
+            *value = value.sqrt();
+        }
+    }
+
+    return ReducedValues { values, mean };
+}
+
+/// Get the data of `array`, allowing for arrays without any element
+fn array_data(array: &eqs_array_t) -> Result<&[f64], Error> {
+    if array.shape()?.iter().product::<usize>() == 0 {
+        return Ok(&[]);
+    }
+
+    return array.data();
+}
+
+/// Create a new array with the same origin as `reference` with the given
+/// `shape`, and fill it with `data`
+fn create_array(reference: &eqs_array_t, shape: &[usize], data: &[f64]) -> Result<eqs_array_t, Error> {
+    let mut array = reference.create(shape)?;
+    if !data.is_empty() {
+        array.data_mut()?.copy_from_slice(data);
+    }
+
+    return Ok(array);
+}
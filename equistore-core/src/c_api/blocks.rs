@@ -2,7 +2,7 @@ use std::sync::Arc;
 use std::os::raw::c_char;
 use std::ffi::CStr;
 
-use crate::{TensorBlock, Error, eqs_array_t};
+use crate::{TensorBlock, SamplesReduction, Error, eqs_array_t};
 
 use super::labels::{eqs_labels_t, rust_to_eqs_labels, eqs_labels_to_rust};
 
@@ -333,3 +333,68 @@ pub unsafe extern fn eqs_block_gradients_list(
         Ok(())
     })
 }
+
+/// Reduce the given `block` over the samples dimensions listed in
+/// `sample_names`, combining all the samples which only differ by the values
+/// taken by these dimensions. The gradients of the block are reduced as well.
+///
+/// The new samples contain the remaining samples dimensions, sorted in
+/// lexicographic order. If all the samples dimensions are reduced over, the
+/// new samples contain a single `"_"` dimension.
+///
+/// This function requires the `data` callback of all the arrays in the block
+/// to be implemented.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_block_free`, or moved into a tensor map using `eqs_tensormap`.
+///
+/// @param block pointer to an existing block
+/// @param sample_names names of the samples dimensions to reduce over
+/// @param sample_names_count number of entries in `sample_names`
+/// @param reduction reduction to use, one of `"sum"`, `"mean"`, `"var"` or
+///                  `"std"`
+///
+/// @returns A pointer to the newly allocated block, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_block_reduce_samples(
+    block: *const eqs_block_t,
+    sample_names: *const *const c_char,
+    sample_names_count: usize,
+    reduction: *const c_char,
+) -> *mut eqs_block_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(block, reduction);
+
+        let mut rust_sample_names = Vec::new();
+        if sample_names_count != 0 {
+            check_pointers!(sample_names);
+            for &name in std::slice::from_raw_parts(sample_names, sample_names_count) {
+                check_pointers!(name);
+                let name = CStr::from_ptr(name).to_str().expect("invalid utf8");
+                rust_sample_names.push(name);
+            }
+        }
+
+        let reduction = CStr::from_ptr(reduction).to_str().expect("invalid utf8");
+        let reduction = SamplesReduction::from_name(reduction)?;
+
+        let new_block = (*block).reduce_over_samples(&rust_sample_names, reduction)?;
+        let boxed = Box::new(eqs_block_t(new_block));
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = Box::into_raw(boxed);
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
@@ -1,7 +1,7 @@
-use std::os::raw::c_char;
+use std::os::raw::{c_char, c_void};
 use std::ffi::CStr;
 
-use crate::eqs_data_origin_t;
+use crate::{eqs_data_origin_t, Error};
 
 use super::{eqs_status_t, catch_unwind};
 use super::utils::copy_str_to_c;
@@ -55,3 +55,90 @@ pub unsafe extern fn eqs_get_data_origin(
         return copy_str_to_c(&origin, buffer, buffer_size);
     })
 }
+
+
+/// Description of an array of 64-bit floating point values living in CPU
+/// memory owned by someone else, which allows to implement the `shape` and
+/// `data` functions of `eqs_array_t` without calling back into user code.
+///
+/// To use it, `eqs_array_t.ptr` should point to an `eqs_cpu_buffer_t`, and
+/// `eqs_array_t.shape`/`eqs_array_t.data` should be set to
+/// `eqs_cpu_buffer_shape`/`eqs_cpu_buffer_data`. The other functions in
+/// `eqs_array_t` get the same pointer and can use `user_data` to find the
+/// array owning the data. Since `user_data` is the first member, a pointer to
+/// the `eqs_cpu_buffer_t` is also a pointer to `user_data`.
+///
+/// The owner of the array is responsible for keeping the `eqs_cpu_buffer_t`
+/// and the memory it points to alive, and updating them when the array
+/// changes (for example in `eqs_array_t.reshape` or `eqs_array_t.swap_axes`).
+#[repr(C)]
+#[allow(non_camel_case_types)]
+pub struct eqs_cpu_buffer_t {
+    /// User-provided data, not used by equistore
+    pub user_data: *mut c_void,
+    /// Pointer to the data of the array, stored as a C-contiguous array. This
+    /// should be `NULL` if the data is not available in this form.
+    pub data: *mut f64,
+    /// Shape of the array
+    pub shape: *const usize,
+    /// Number of dimensions of the array, i.e. number of elements in `shape`
+    pub shape_count: usize,
+}
+
+/// Implementation of `eqs_array_t.shape` for arrays where `eqs_array_t.ptr`
+/// points to an `eqs_cpu_buffer_t`.
+///
+/// @param array pointer to an `eqs_cpu_buffer_t`
+/// @param shape pointer to be filled with the shape of the array
+/// @param shape_count pointer to be filled with the number of dimensions
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_cpu_buffer_shape(
+    array: *const c_void,
+    shape: *mut *const usize,
+    shape_count: *mut usize,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(array, shape, shape_count);
+
+        let buffer = &*array.cast::<eqs_cpu_buffer_t>();
+        *shape = buffer.shape;
+        *shape_count = buffer.shape_count;
+
+        Ok(())
+    })
+}
+
+/// Implementation of `eqs_array_t.data` for arrays where `eqs_array_t.ptr`
+/// points to an `eqs_cpu_buffer_t`. This fails if `eqs_cpu_buffer_t.data` is
+/// `NULL`.
+///
+/// @param array pointer to an `eqs_cpu_buffer_t`
+/// @param data pointer to be filled with the data pointer of the array
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_cpu_buffer_data(
+    array: *mut c_void,
+    data: *mut *mut f64,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(array, data);
+
+        let buffer = &*array.cast::<eqs_cpu_buffer_t>();
+        if buffer.data.is_null() {
+            return Err(Error::InvalidParameter(
+                "the data of this array is not available as a C-contiguous \
+                array of 64-bit floating point values".into()
+            ));
+        }
+        *data = buffer.data;
+
+        Ok(())
+    })
+}
@@ -1,13 +1,16 @@
-use std::os::raw::c_char;
+use std::os::raw::{c_char, c_void};
 use std::ffi::CStr;
 use std::fs::File;
-use std::io::{BufReader, BufWriter};
+use std::io::{BufReader, BufWriter, Cursor, Write};
 
-use crate::Error;
+use crate::{Error, LabelValue};
 use crate::data::eqs_array_t;
+use crate::io::{LoadSelection, SaveOptions, StorageType, TensorMapWriter};
 
 use super::status::{eqs_status_t, catch_unwind};
+use super::labels::{eqs_labels_t, eqs_labels_to_rust};
 use super::tensor::eqs_tensormap_t;
+use super::blocks::eqs_block_t;
 
 /// Function pointer to create a new `eqs_array_t` when de-serializing tensor
 /// maps.
@@ -26,6 +29,46 @@ type eqs_create_array_callback_t = unsafe extern fn(
     array: *mut eqs_array_t,
 ) -> eqs_status_t;
 
+/// Function pointer to grow in-memory buffers for `eqs_tensormap_save_buffer`.
+///
+/// This function takes an existing pointer in `ptr` and a new size in
+/// `new_size`, and should grow the allocation to (at least) `new_size` bytes,
+/// keeping the existing content. If `ptr` is `NULL`, it should create a new
+/// allocation. If it is unable to allocate memory, it should return a `NULL`
+/// pointer. This follows the API of the standard C function `realloc`, with an
+/// additional parameter `user_data` that can be used to hold custom data.
+#[allow(non_camel_case_types)]
+type eqs_realloc_buffer_t = unsafe extern fn(
+    user_data: *mut c_void,
+    ptr: *mut u8,
+    new_size: usize,
+) -> *mut u8;
+
+/// Create a new array with the given `shape` using the `create_array`
+/// callback. `function` is the name of the calling function, used in error
+/// messages.
+unsafe fn call_create_array(
+    create_array: eqs_create_array_callback_t,
+    shape: Vec<usize>,
+    function: &str,
+) -> Result<eqs_array_t, Error> {
+    let mut array = eqs_array_t::null();
+    let status = create_array(
+        shape.as_ptr(),
+        shape.len(),
+        &mut array
+    );
+
+    if status.is_success() {
+        return Ok(array);
+    } else {
+        return Err(Error::External {
+            status: status,
+            context: format!("failed to create a new array in {}", function)
+        });
+    }
+}
+
 /// Load a tensor map from the file at the given path.
 ///
 /// Arrays for the values and gradient data will be created with the given
@@ -36,8 +79,9 @@ type eqs_create_array_callback_t = unsafe extern fn(
 /// `eqs_tensormap_free`.
 ///
 /// `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file
-/// without compression (storage method is STORED), where each file is stored as
-/// a `.npy` array. Both the ZIP and NPY format are well documented:
+/// without compression by default (storage method is STORED, DEFLATE is also
+/// supported), where each file is stored as a `.npy` array. Both the ZIP and
+/// NPY format are well documented:
 ///
 /// - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>
 /// - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>
@@ -45,7 +89,8 @@ type eqs_create_array_callback_t = unsafe extern fn(
 /// We add other restriction on top of these formats when saving/loading data.
 /// First, `Labels` instances are saved as structured array, see the `labels`
 /// module for more information. Only 32-bit integers are supported for Labels,
-/// and only 64-bit floats are supported for data (values and gradients).
+/// and only 64-bit, 32-bit and 16-bit floats are supported for data (values and
+/// gradients). The data is always loaded as 64-bit floats.
 ///
 /// Second, the path of the files in the archive also carry meaning. The keys of
 /// the `TensorMap` are stored in `/keys.npy`, and then different blocks are
@@ -85,21 +130,7 @@ pub unsafe extern fn eqs_tensormap_load(
         check_pointers!(path);
 
         let create_array = |shape: Vec<usize>| {
-            let mut array = eqs_array_t::null();
-            let status = create_array(
-                shape.as_ptr(),
-                shape.len(),
-                &mut array
-            );
-
-            if status.is_success() {
-                return Ok(array);
-            } else {
-                return Err(Error::External {
-                    status: status,
-                    context: "failed to create a new array in eqs_tensormap_load".into()
-                });
-            }
+            call_create_array(create_array, shape, "eqs_tensormap_load")
         };
 
         let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
@@ -121,6 +152,249 @@ pub unsafe extern fn eqs_tensormap_load(
 }
 
 
+/// Load a tensor map from the file at the given path, using multiple threads.
+///
+/// The file format is the same as for `eqs_tensormap_load`. The data arrays
+/// are read and the labels are decoded in parallel, using `n_threads` threads.
+/// If `n_threads` is 0, the number of threads is picked automatically (usually
+/// as many as there are CPU cores).
+///
+/// All the arrays are created with `create_array` from the calling thread, the
+/// other threads only write to the data pointer of these arrays.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_tensormap_free`.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+/// @param create_array callback function that will be used to create data
+///                     arrays inside each block
+/// @param n_threads number of threads to use
+///
+/// @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_load_parallel(
+    path: *const c_char,
+    create_array: eqs_create_array_callback_t,
+    n_threads: usize,
+) -> *mut eqs_tensormap_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(path);
+
+        let create_array = |shape: Vec<usize>| {
+            call_create_array(create_array, shape, "eqs_tensormap_load_parallel")
+        };
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let tensor = crate::io::load_parallel(path, create_array, n_threads)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = eqs_tensormap_t::into_boxed_raw(tensor);
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
+
+
+/// Load a tensor map from the file at the given path, mapping the file in
+/// memory instead of reading the data.
+///
+/// The file format is the same as for `eqs_tensormap_load`. The values and
+/// gradients arrays are not copied, and the data is only paged in memory when
+/// it is accessed. These arrays use the `"equistore.io.mmap"` data origin. The
+/// file is mapped copy-on-write: the data can be modified, but modifications
+/// are never written back to the file. The file should not be modified while
+/// the tensor map (or any array coming from it) is alive.
+///
+/// Arrays can only be mapped if they are stored without compression and
+/// aligned in the file (which is the case for files written by
+/// `eqs_tensormap_save`), other arrays are read in memory.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_tensormap_free`.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+///
+/// @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_load_mmap(
+    path: *const c_char,
+) -> *mut eqs_tensormap_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(path);
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let tensor = crate::io::load_mmap(path)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = eqs_tensormap_t::into_boxed_raw(tensor);
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
+
+
+/// Load a tensor map from the given in-memory buffer.
+///
+/// The buffer should contain the same data as a file created by
+/// `eqs_tensormap_save`, for example as written by `eqs_tensormap_save_buffer`.
+/// See `eqs_tensormap_load` for more information on the format.
+///
+/// Arrays for the values and gradient data will be created with the given
+/// `create_array` callback, and filled by this function with the corresponding
+/// data. The buffer is not used after this function returns.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_tensormap_free`.
+///
+/// @param buffer buffer containing a serialized tensor map
+/// @param buffer_count number of bytes in the buffer
+/// @param create_array callback function that will be used to create data
+///                     arrays inside each block
+///
+/// @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_load_buffer(
+    buffer: *const u8,
+    buffer_count: usize,
+    create_array: eqs_create_array_callback_t,
+) -> *mut eqs_tensormap_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(buffer);
+
+        let create_array = |shape: Vec<usize>| {
+            call_create_array(create_array, shape, "eqs_tensormap_load_buffer")
+        };
+
+        let buffer = std::slice::from_raw_parts(buffer, buffer_count);
+        let tensor = crate::io::load(Cursor::new(buffer), create_array)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = eqs_tensormap_t::into_boxed_raw(tensor);
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
+
+
+/// Load the parts of a tensor map matching a selection from the file at the
+/// given path.
+///
+/// The file format is the same as for `eqs_tensormap_load`. Only the blocks
+/// with a key matching one of the entries in `keys` are loaded, and inside
+/// these blocks only the samples matching one of the entries in `samples` and
+/// the properties matching one of the entries in `properties` are kept. Each of
+/// these labels can contain a subset of the corresponding dimensions, and can
+/// be `NULL` to load all the entries.
+///
+/// Blocks are read in the same order as in the file. The gradients are
+/// filtered in the same way as the values, and their `"sample"` dimension is
+/// updated to refer to the new samples. For data stored without compression,
+/// only the selected rows are read from the file.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_tensormap_free`.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+/// @param create_array callback function that will be used to create data
+///                     arrays inside each block
+/// @param keys selection on the keys, or `NULL` to load all blocks
+/// @param samples selection on the samples, or `NULL` to load all samples
+/// @param properties selection on the properties, or `NULL` to load all
+///                   properties
+///
+/// @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_load_selected(
+    path: *const c_char,
+    create_array: eqs_create_array_callback_t,
+    keys: *const eqs_labels_t,
+    samples: *const eqs_labels_t,
+    properties: *const eqs_labels_t,
+) -> *mut eqs_tensormap_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(path);
+
+        let create_array = |shape: Vec<usize>| {
+            call_create_array(create_array, shape, "eqs_tensormap_load_selected")
+        };
+
+        let to_rust = |labels: *const eqs_labels_t| {
+            if labels.is_null() {
+                Ok(None)
+            } else {
+                eqs_labels_to_rust(&*labels).map(Some)
+            }
+        };
+        let keys = to_rust(keys)?;
+        let samples = to_rust(samples)?;
+        let properties = to_rust(properties)?;
+
+        let selection = LoadSelection {
+            keys: keys.as_deref(),
+            samples: samples.as_deref(),
+            properties: properties.as_deref(),
+        };
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let tensor = crate::io::load_selected(path, create_array, selection)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = eqs_tensormap_t::into_boxed_raw(tensor);
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
+
+
+/// Size of the output buffer used when saving tensor maps. Large data arrays
+/// are written directly to the file, this buffer groups together all the small
+/// writes (zip and npy headers, labels, etc.)
+const SAVE_BUFFER_SIZE: usize = 1024 * 1024;
+
 /// Save a tensor map to the file at the given path.
 ///
 /// If the file already exists, it is overwritten.
@@ -140,9 +414,318 @@ pub unsafe extern fn eqs_tensormap_save(
         check_pointers!(path, tensor);
 
         let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
-        let file = BufWriter::new(File::create(path)?);
+        let file = BufWriter::with_capacity(SAVE_BUFFER_SIZE, File::create(path)?);
         crate::io::save(file, &*tensor)?;
 
         Ok(())
     })
 }
+
+
+/// Save a tensor map to the file at the given path, using multiple threads.
+///
+/// The labels and headers of the arrays are encoded in parallel using
+/// `n_threads` threads, and then written to the file. If `n_threads` is 0, the
+/// number of threads is picked automatically (usually as many as there are CPU
+/// cores). The file is the same as the one created by `eqs_tensormap_save`,
+/// with all the entries in the same order.
+///
+/// If the file already exists, it is overwritten.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+/// @param tensor tensor map to save to the file
+/// @param n_threads number of threads to use
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_save_parallel(
+    path: *const c_char,
+    tensor: *const eqs_tensormap_t,
+    n_threads: usize,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(path, tensor);
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let file = BufWriter::with_capacity(SAVE_BUFFER_SIZE, File::create(path)?);
+        crate::io::save_parallel(file, &*tensor, SaveOptions::default(), n_threads)?;
+
+        Ok(())
+    })
+}
+
+
+/// Save a tensor map to the file at the given path, with additional options
+/// controlling how the data is stored.
+///
+/// If `compress` is true, all the files in the archive are compressed with
+/// DEFLATE. The resulting files can still be read by `numpy.load`, but the
+/// data can not be memory-mapped by `eqs_tensormap_load_mmap`.
+///
+/// `data_type` controls the type used to store the values and gradients data,
+/// and should be one of `"float64"`, `"float32"` or `"float16"`. Using a
+/// smaller type reduces the size of the file, but loses precision. The data is
+/// converted back to 64-bit floats when loading the file.
+///
+/// The labels and headers of the arrays are encoded using `n_threads` threads,
+/// see `eqs_tensormap_save_parallel` for more information.
+///
+/// If the file already exists, it is overwritten.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+/// @param tensor tensor map to save to the file
+/// @param compress should we compress the files in the archive?
+/// @param data_type type used to store the data, as a NULL-terminated UTF-8
+///                  string
+/// @param n_threads number of threads to use
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_save_with_options(
+    path: *const c_char,
+    tensor: *const eqs_tensormap_t,
+    compress: bool,
+    data_type: *const c_char,
+    n_threads: usize,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(path, tensor, data_type);
+
+        let data_type = CStr::from_ptr(data_type).to_str().expect("invalid UTF-8 data type");
+        let options = SaveOptions {
+            compress: compress,
+            data_type: StorageType::from_name(data_type)?,
+        };
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let file = BufWriter::with_capacity(SAVE_BUFFER_SIZE, File::create(path)?);
+        if n_threads == 1 {
+            crate::io::save_with_options(file, &*tensor, options)?;
+        } else {
+            crate::io::save_parallel(file, &*tensor, options, n_threads)?;
+        }
+
+        Ok(())
+    })
+}
+
+
+/// Save a tensor map to an in-memory buffer.
+///
+/// The content of the buffer is the same as the file created by
+/// `eqs_tensormap_save`. On input, `*buffer` should contain the address of a
+/// starting buffer (which can be `NULL`) and `*buffer_count` should contain
+/// the size of the allocation. The buffer is grown with the `realloc`
+/// callback to fit the serialized tensor map, and on output `*buffer` contains
+/// the address of the buffer and `*buffer_count` the number of bytes written
+/// to it.
+///
+/// @param buffer pointer to the buffer, which will be updated by this function
+/// @param buffer_count pointer to the buffer size, which will be updated by
+///                     this function
+/// @param realloc_user_data custom data given to the `realloc` function
+/// @param realloc function used to allocate memory for the buffer
+/// @param tensor tensor map to save to the buffer
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_save_buffer(
+    buffer: *mut *mut u8,
+    buffer_count: *mut usize,
+    realloc_user_data: *mut c_void,
+    realloc: eqs_realloc_buffer_t,
+    tensor: *const eqs_tensormap_t,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(buffer, buffer_count, tensor);
+
+        let mut cursor = Cursor::new(Vec::new());
+        crate::io::save(&mut cursor, &*tensor)?;
+        let data = cursor.into_inner();
+
+        let new_buffer = realloc(realloc_user_data, *buffer, data.len());
+        if new_buffer.is_null() {
+            return Err(Error::BufferSize(format!(
+                "failed to allocate {} bytes with realloc in eqs_tensormap_save_buffer", data.len()
+            )));
+        }
+
+        std::ptr::copy_nonoverlapping(data.as_ptr(), new_buffer, data.len());
+        *buffer = new_buffer;
+        *buffer_count = data.len();
+
+        Ok(())
+    })
+}
+
+
+/// Opaque type representing a `TensorMapWriter`, used to write a tensor map to
+/// a file one block at a time.
+#[allow(non_camel_case_types)]
+pub struct eqs_tensormap_writer_t(Option<TensorMapWriter<BufWriter<File>>>);
+
+/// Create a new writer for tensor maps, writing to the file at the given path.
+///
+/// Instead of building a full tensor map in memory before saving it, this
+/// writer allows to add blocks (and the corresponding keys) to the file one at
+/// a time with `eqs_tensormap_writer_add_block`. The keys are written to the
+/// file by `eqs_tensormap_writer_finish`. The resulting file is the same as
+/// the one created by `eqs_tensormap_save` for a tensor map containing the
+/// same keys and blocks.
+///
+/// If the file already exists, it is overwritten.
+///
+/// The memory allocated by this function should be released using
+/// `eqs_tensormap_writer_free`.
+///
+/// @param path path to the file as a NULL-terminated UTF-8 string
+/// @param keys_names names of the keys dimensions
+/// @param keys_names_count number of entries in the `keys_names` array
+///
+/// @returns A pointer to the newly allocated writer, or a `NULL` pointer in
+///          case of error. In case of error, you can use `eqs_last_error()`
+///          to get the error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_writer(
+    path: *const c_char,
+    keys_names: *const *const c_char,
+    keys_names_count: usize,
+) -> *mut eqs_tensormap_writer_t {
+    let mut result = std::ptr::null_mut();
+    let unwind_wrapper = std::panic::AssertUnwindSafe(&mut result);
+    let status = catch_unwind(move || {
+        check_pointers!(path, keys_names);
+
+        let mut names = Vec::new();
+        for &name in std::slice::from_raw_parts(keys_names, keys_names_count) {
+            check_pointers!(name);
+            let name = CStr::from_ptr(name).to_str().expect("invalid utf8");
+            if !crate::labels::is_valid_label_name(name) {
+                return Err(Error::InvalidParameter(format!(
+                    "'{}' is not a valid label name", name
+                )));
+            }
+            names.push(name);
+        }
+
+        let path = CStr::from_ptr(path).to_str().expect("use UTF-8 for path");
+        let file = BufWriter::with_capacity(SAVE_BUFFER_SIZE, File::create(path)?);
+        let writer = TensorMapWriter::new(file, names, SaveOptions::default());
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *(unwind_wrapper.0) = Box::into_raw(Box::new(eqs_tensormap_writer_t(Some(writer))));
+        Ok(())
+    });
+
+    if !status.is_success() {
+        return std::ptr::null_mut();
+    }
+
+    return result;
+}
+
+/// Write the `block` associated with the given `key` to the file.
+///
+/// The block is not modified and still owned by the caller, it can be released
+/// with `eqs_block_free` as soon as this function returns. All the blocks must
+/// have the same labels names and set of gradients, and all the keys must be
+/// different.
+///
+/// @param writer writer created with `eqs_tensormap_writer`
+/// @param key values of the key associated with this block
+/// @param key_count number of entries in the `key` array, this must match the
+///                  number of keys names given to `eqs_tensormap_writer`
+/// @param block block to write to the file
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_writer_add_block(
+    writer: *mut eqs_tensormap_writer_t,
+    key: *const i32,
+    key_count: usize,
+    block: *const eqs_block_t,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(writer, block);
+        if key_count != 0 {
+            check_pointers!(key);
+        }
+
+        let key = if key_count == 0 {
+            &[]
+        } else {
+            std::slice::from_raw_parts(key.cast::<LabelValue>(), key_count)
+        };
+
+        match &mut (*writer).0 {
+            Some(writer) => writer.add_block(key, &*block),
+            None => Err(Error::InvalidParameter(
+                "can not add blocks to a writer after calling eqs_tensormap_writer_finish".into()
+            )),
+        }
+    })
+}
+
+/// Write the keys and finish writing the file.
+///
+/// This function must be called once all the blocks have been added, otherwise
+/// the file will not be a valid tensor map. No more blocks can be added after
+/// calling this function. The writer should still be released with
+/// `eqs_tensormap_writer_free`.
+///
+/// @param writer writer created with `eqs_tensormap_writer`
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_writer_finish(writer: *mut eqs_tensormap_writer_t) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(writer);
+
+        match (*writer).0.take() {
+            Some(writer) => {
+                let mut file = writer.finish()?;
+                file.flush()?;
+                Ok(())
+            },
+            None => Err(Error::InvalidParameter(
+                "eqs_tensormap_writer_finish has already been called on this writer".into()
+            )),
+        }
+    })
+}
+
+/// Free the memory associated with a `writer` previously created with
+/// `eqs_tensormap_writer`.
+///
+/// If `eqs_tensormap_writer_finish` was not called on this writer, the file
+/// will not contain a valid tensor map. If `writer` is `NULL`, this function
+/// does nothing.
+///
+/// @param writer pointer to an existing writer, or `NULL`
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_tensormap_writer_free(writer: *mut eqs_tensormap_writer_t) -> eqs_status_t {
+    catch_unwind(|| {
+        if !writer.is_null() {
+            let boxed = Box::from_raw(writer);
+            std::mem::drop(boxed);
+        }
+
+        Ok(())
+    })
+}
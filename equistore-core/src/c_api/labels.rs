@@ -14,7 +14,9 @@ use super::status::{eqs_status_t, catch_unwind};
 ///
 /// `eqs_labels_t` with a non-NULL `internal_ptr_` correspond to a
 /// reference-counted Rust data structure, which allow for fast lookup inside
-/// the labels with `eqs_labels_positions`.
+/// the labels with `eqs_labels_positions`. These labels are shared (by
+/// increasing the reference count) instead of being copied when they are
+/// used to create blocks or tensor maps.
 
 // An `eqs_labels_t` can either correspond to a Rust `Arc<Labels>` (`labels_ptr`
 // is non-NULL, and corresponds to the pointer `Arc::into_raw` gives); or to a
@@ -175,6 +177,61 @@ pub unsafe extern fn eqs_labels_position(
     })
 }
 
+/// Get the positions of multiple entries defined by the `values` array in the
+/// given set of `labels`, in a single call. This operation is only available if
+/// the labels correspond to a set of Rust Labels (i.e. `labels.internal_ptr_`
+/// is not NULL).
+///
+/// @param labels set of labels with an associated Rust data structure
+/// @param values 2D row-major array containing the entries to lookup. Each row
+///               contains `labels.size` elements, and there are `values_count`
+///               rows in total.
+/// @param values_count number of entries (rows) in the `values` array
+/// @param results array of `values_count` elements, on output will contain the
+///                position of each entry in the labels or -1 if the entry was
+///                not found
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_labels_positions(
+    labels: eqs_labels_t,
+    values: *const i32,
+    values_count: usize,
+    results: *mut i64,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        if !labels.is_rust() {
+            return Err(Error::InvalidParameter(
+                "these labels do not support calling eqs_labels_positions, \
+                call eqs_labels_create first".into()
+            ));
+        }
+
+        if values_count == 0 {
+            return Ok(());
+        }
+
+        check_pointers!(results);
+
+        let labels = &(*labels.internal_ptr_.cast::<Labels>());
+        let results = std::slice::from_raw_parts_mut(results, values_count);
+        if labels.size() == 0 {
+            results.fill(-1);
+            return Ok(());
+        }
+
+        check_pointers!(values);
+        let values = std::slice::from_raw_parts(values.cast::<LabelValue>(), values_count * labels.size());
+        for (label, result) in values.chunks_exact(labels.size()).zip(results) {
+            *result = labels.position(label).map_or(-1, |p| p as i64);
+        }
+
+        Ok(())
+    })
+}
+
 
 /// Finish the creation of `eqs_labels_t` by associating it to Rust-owned
 /// labels.
@@ -284,3 +341,212 @@ pub unsafe extern fn eqs_labels_free(
         Ok(())
     })
 }
+
+/// Get a mutable slice for the `mapping` array passed to the set operations on
+/// labels. If `mapping` is NULL, the slice is empty, and the mapping will not
+/// be computed.
+unsafe fn mapping_slice<'a>(mapping: *mut i64, mapping_count: usize, labels: &Labels, name: &str) -> Result<&'a mut [i64], Error> {
+    if mapping.is_null() {
+        return Ok(&mut []);
+    }
+
+    if mapping_count != labels.count() {
+        return Err(Error::InvalidParameter(format!(
+            "`{}` should have space for {} values, got {}",
+            name, labels.count(), mapping_count
+        )));
+    }
+
+    if mapping_count == 0 {
+        return Ok(&mut []);
+    }
+
+    return Ok(std::slice::from_raw_parts_mut(mapping, mapping_count));
+}
+
+/// Take the union of two `eqs_labels_t`.
+///
+/// The union contains all the entries of `first`, followed by the entries of
+/// `second` which are not already in `first`. If requested, this function can
+/// also give the positions in the union where each entry of the input
+/// `eqs_labels_t` ended up.
+///
+/// This function allocates memory for `result` which must be released
+/// `eqs_labels_free` when you don't need it anymore.
+///
+/// @param first first set of labels
+/// @param second second set of labels
+/// @param result empty labels, on output will contain the union of `first` and
+///        `second`
+/// @param first_mapping if you want the mapping from the positions of entries
+///        in `first` to the positions in `result`, this should be a pointer to
+///        an array containing `first.count` elements, to be filled by this
+///        function. Otherwise it should be a `NULL` pointer.
+/// @param first_mapping_count number of elements in `first_mapping`
+/// @param second_mapping if you want the mapping from the positions of entries
+///        in `second` to the positions in `result`, this should be a pointer
+///        to an array containing `second.count` elements, to be filled by this
+///        function. Otherwise it should be a `NULL` pointer.
+/// @param second_mapping_count number of elements in `second_mapping`
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_labels_union(
+    first: eqs_labels_t,
+    second: eqs_labels_t,
+    result: *mut eqs_labels_t,
+    first_mapping: *mut i64,
+    first_mapping_count: usize,
+    second_mapping: *mut i64,
+    second_mapping_count: usize,
+) -> eqs_status_t {
+    let unwind_wrapper = std::panic::AssertUnwindSafe(result);
+    catch_unwind(|| {
+        check_pointers!(result);
+        if (*result).is_rust() {
+            return Err(Error::InvalidParameter(
+                "output labels already contain some data".into()
+            ));
+        }
+
+        let first = eqs_labels_to_rust(&first)?;
+        let second = eqs_labels_to_rust(&second)?;
+
+        let first_mapping = mapping_slice(first_mapping, first_mapping_count, &first, "first_mapping")?;
+        let second_mapping = mapping_slice(second_mapping, second_mapping_count, &second, "second_mapping")?;
+
+        let union = first.union(&second, first_mapping, second_mapping)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *unwind_wrapper.0 = rust_to_eqs_labels(Arc::new(union));
+
+        Ok(())
+    })
+}
+
+/// Take the intersection of two `eqs_labels_t`.
+///
+/// The intersection contains all the entries of `first` which are also in
+/// `second`, in the same order as in `first`. If requested, this function can
+/// also give the positions in the intersection where each entry of the input
+/// `eqs_labels_t` ended up.
+///
+/// This function allocates memory for `result` which must be released
+/// `eqs_labels_free` when you don't need it anymore.
+///
+/// @param first first set of labels
+/// @param second second set of labels
+/// @param result empty labels, on output will contain the intersection of
+///        `first` and `second`
+/// @param first_mapping if you want the mapping from the positions of entries
+///        in `first` to the positions in `result`, this should be a pointer to
+///        an array containing `first.count` elements, to be filled by this
+///        function. Otherwise it should be a `NULL` pointer. If an entry in
+///        `first` is not used in `result`, the mapping will be set to -1.
+/// @param first_mapping_count number of elements in `first_mapping`
+/// @param second_mapping if you want the mapping from the positions of entries
+///        in `second` to the positions in `result`, this should be a pointer
+///        to an array containing `second.count` elements, to be filled by this
+///        function. Otherwise it should be a `NULL` pointer. If an entry in
+///        `second` is not used in `result`, the mapping will be set to -1.
+/// @param second_mapping_count number of elements in `second_mapping`
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_labels_intersection(
+    first: eqs_labels_t,
+    second: eqs_labels_t,
+    result: *mut eqs_labels_t,
+    first_mapping: *mut i64,
+    first_mapping_count: usize,
+    second_mapping: *mut i64,
+    second_mapping_count: usize,
+) -> eqs_status_t {
+    let unwind_wrapper = std::panic::AssertUnwindSafe(result);
+    catch_unwind(|| {
+        check_pointers!(result);
+        if (*result).is_rust() {
+            return Err(Error::InvalidParameter(
+                "output labels already contain some data".into()
+            ));
+        }
+
+        let first = eqs_labels_to_rust(&first)?;
+        let second = eqs_labels_to_rust(&second)?;
+
+        let first_mapping = mapping_slice(first_mapping, first_mapping_count, &first, "first_mapping")?;
+        let second_mapping = mapping_slice(second_mapping, second_mapping_count, &second, "second_mapping")?;
+
+        let intersection = first.intersection(&second, first_mapping, second_mapping)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *unwind_wrapper.0 = rust_to_eqs_labels(Arc::new(intersection));
+
+        Ok(())
+    })
+}
+
+/// Take the difference of two `eqs_labels_t`.
+///
+/// The difference contains all the entries of `first` which are not in
+/// `second`, in the same order as in `first`. If requested, this function can
+/// also give the positions in the difference where each entry of `first` ended
+/// up.
+///
+/// This function allocates memory for `result` which must be released
+/// `eqs_labels_free` when you don't need it anymore.
+///
+/// @param first first set of labels
+/// @param second second set of labels
+/// @param result empty labels, on output will contain the difference of
+///        `first` and `second`
+/// @param first_mapping if you want the mapping from the positions of entries
+///        in `first` to the positions in `result`, this should be a pointer to
+///        an array containing `first.count` elements, to be filled by this
+///        function. Otherwise it should be a `NULL` pointer. If an entry in
+///        `first` is not used in `result`, the mapping will be set to -1.
+/// @param first_mapping_count number of elements in `first_mapping`
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+pub unsafe extern fn eqs_labels_difference(
+    first: eqs_labels_t,
+    second: eqs_labels_t,
+    result: *mut eqs_labels_t,
+    first_mapping: *mut i64,
+    first_mapping_count: usize,
+) -> eqs_status_t {
+    let unwind_wrapper = std::panic::AssertUnwindSafe(result);
+    catch_unwind(|| {
+        check_pointers!(result);
+        if (*result).is_rust() {
+            return Err(Error::InvalidParameter(
+                "output labels already contain some data".into()
+            ));
+        }
+
+        let first = eqs_labels_to_rust(&first)?;
+        let second = eqs_labels_to_rust(&second)?;
+
+        let first_mapping = mapping_slice(first_mapping, first_mapping_count, &first, "first_mapping")?;
+
+        let difference = first.difference(&second, first_mapping)?;
+
+        // force the closure to capture the full unwind_wrapper, not just
+        // unwind_wrapper.0
+        let _ = &unwind_wrapper;
+        *unwind_wrapper.0 = rust_to_eqs_labels(Arc::new(difference));
+
+        Ok(())
+    })
+}
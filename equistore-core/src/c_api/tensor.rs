@@ -271,6 +271,61 @@ pub unsafe extern fn eqs_tensormap_blocks_matching(
 }
 
 
+/// Get the index of the block corresponding to each entry of the `selection`
+/// in this `tensor`. The `selection` should have all the names/dimensions of
+/// the keys for this tensor map (potentially in a different order), and can
+/// contain any number of entries.
+///
+/// This is faster than calling `eqs_tensormap_blocks_matching` for each entry,
+/// since the blocks are found with a single lookup in the keys for each entry.
+///
+/// @param tensor pointer to an existing tensor map
+/// @param block_indexes array to be filled with the index of the block
+///                      matching each entry of the `selection`, or -1 if there
+///                      is no block matching this entry
+/// @param count number of entries in `block_indexes`, which must be the same
+///              as the number of entries in `selection`
+/// @param selection labels describing the requested blocks
+///
+/// @returns The status code of this operation. If the status is not
+///          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full
+///          error message.
+#[no_mangle]
+#[allow(clippy::cast_possible_wrap)]
+pub unsafe extern fn eqs_tensormap_blocks_matching_keys(
+    tensor: *const eqs_tensormap_t,
+    block_indexes: *mut i64,
+    count: usize,
+    selection: eqs_labels_t,
+) -> eqs_status_t {
+    catch_unwind(|| {
+        check_pointers!(tensor);
+
+        let selection = eqs_labels_to_rust(&selection)?;
+        if count != selection.count() {
+            return Err(Error::InvalidParameter(format!(
+                "expected space for {} indices as input to eqs_tensormap_blocks_matching_keys, got space for {}",
+                selection.count(), count
+            )));
+        }
+
+        let rust_blocks = (*tensor).blocks_matching_keys(&selection)?;
+        if count != 0 {
+            check_pointers!(block_indexes);
+            let block_indexes = std::slice::from_raw_parts_mut(block_indexes, count);
+            for (output, block) in block_indexes.iter_mut().zip(rust_blocks) {
+                *output = match block {
+                    Some(block) => block as i64,
+                    None => -1,
+                };
+            }
+        }
+
+        Ok(())
+    })
+}
+
+
 /// Merge blocks with the same value for selected keys dimensions along the
 /// property axis.
 ///
@@ -5,6 +5,7 @@ use std::sync::Mutex;
 use once_cell::sync::Lazy;
 
 use crate::c_api::eqs_status_t;
+use crate::c_api::data::{eqs_cpu_buffer_t, eqs_cpu_buffer_data};
 use crate::Error;
 
 /// A single 64-bit integer representing a data origin (numpy ndarray, rust
@@ -78,7 +79,7 @@ pub struct eqs_array_t {
     /// `origin`. Users of `eqs_array_t` should register a single data
     /// origin with `eqs_register_data_origin`, and use it for all compatible
     /// arrays.
-    origin: Option<unsafe extern fn(
+    pub(crate) origin: Option<unsafe extern fn(
         array: *const c_void,
         origin: *mut eqs_data_origin_t
     ) -> eqs_status_t>,
@@ -88,7 +89,7 @@ pub struct eqs_array_t {
     /// This function is allowed to fail if the data is not accessible in RAM,
     /// not stored as 64-bit floating point values, or not stored as a
     /// C-contiguous array.
-    data: Option<unsafe extern fn(
+    pub(crate) data: Option<unsafe extern fn(
         array: *mut c_void,
         data: *mut *mut f64,
     ) -> eqs_status_t>,
@@ -96,7 +97,7 @@ pub struct eqs_array_t {
     /// Get the shape of the array managed by this `eqs_array_t` in the `*shape`
     /// pointer, and the number of dimension (size of the `*shape` array) in
     /// `*shape_count`.
-    shape: Option<unsafe extern fn(
+    pub(crate) shape: Option<unsafe extern fn(
         array: *const c_void,
         shape: *mut *const usize,
         shape_count: *mut usize,
@@ -105,14 +106,14 @@ pub struct eqs_array_t {
     /// Change the shape of the array managed by this `eqs_array_t` to the given
     /// `shape`. `shape_count` must contain the number of elements in the
     /// `shape` array
-    reshape: Option<unsafe extern fn(
+    pub(crate) reshape: Option<unsafe extern fn(
         array: *mut c_void,
         shape: *const usize,
         shape_count: usize,
     ) -> eqs_status_t>,
 
     /// Swap the axes `axis_1` and `axis_2` in this `array`.
-    swap_axes: Option<unsafe extern fn(
+    pub(crate) swap_axes: Option<unsafe extern fn(
         array: *mut c_void,
         axis_1: usize,
         axis_2: usize,
@@ -124,7 +125,7 @@ pub struct eqs_array_t {
     /// in `shape_count`.
     ///
     /// The new array should be filled with zeros.
-    create: Option<unsafe extern fn(
+    pub(crate) create: Option<unsafe extern fn(
         array: *const c_void,
         shape: *const usize,
         shape_count: usize,
@@ -135,14 +136,14 @@ pub struct eqs_array_t {
     ///
     /// The new array is expected to have the same data origin and parameters
     /// (data type, data location, etc.)
-    copy: Option<unsafe extern fn(
+    pub(crate) copy: Option<unsafe extern fn(
         array: *const c_void,
         new_array: *mut eqs_array_t,
     ) -> eqs_status_t>,
 
     /// Remove this array and free the associated memory. This function can be
     /// set to `NULL` is there is no memory management to do.
-    destroy: Option<unsafe extern fn(array: *mut c_void)>,
+    pub(crate) destroy: Option<unsafe extern fn(array: *mut c_void)>,
 
     /// Set entries in the `output` array (the current array) taking data from
     /// the `input` array. The `output` array is guaranteed to be created by
@@ -155,7 +156,12 @@ pub struct eqs_array_t {
     /// This function should copy data from `input[samples[i].input, ..., :]` to
     /// `array[samples[i].output, ..., property_start:property_end]` for `i` up
     /// to `samples_count`. All indexes are 0-based.
-    move_samples_from: Option<unsafe extern fn(
+    ///
+    /// If both `input` and `output` use `eqs_cpu_buffer_data` for
+    /// `eqs_array_t.data` and the corresponding buffers give access to the
+    /// data, equistore copies the data directly and this function is not
+    /// called.
+    pub(crate) move_samples_from: Option<unsafe extern fn(
         output: *mut c_void,
         input: *const c_void,
         samples: *const eqs_sample_mapping_t,
@@ -442,12 +448,20 @@ impl eqs_array_t {
     /// This function should copy data from `input[sample.input, ..., :]` to
     /// `array[sample.output, ..., properties]` for all `sample` in `samples`.
     /// All indexes are 0-based.
+    ///
+    /// When both arrays are described by an `eqs_cpu_buffer_t` giving access
+    /// to their data, the data is copied directly without calling
+    /// `eqs_array_t.move_samples_from`.
     pub fn move_samples_from(
         &mut self,
         input: &eqs_array_t,
         samples: &[eqs_sample_mapping_t],
         properties: Range<usize>,
     ) -> Result<(), Error> {
+        if self.move_samples_from_data(input, samples, properties.clone()) {
+            return Ok(());
+        }
+
         let function = self.move_samples_from.expect("eqs_array_t.move_samples_from function is NULL");
 
         let status = unsafe {
@@ -469,6 +483,94 @@ impl eqs_array_t {
 
         return Ok(());
     }
+
+    /// Get the `eqs_cpu_buffer_t` describing this array, if the array uses
+    /// `eqs_cpu_buffer_data` and its data is available.
+    ///
+    /// This only reads the buffer and never calls the functions of the array:
+    /// external functions failing here would leave state behind (e.g. a stored
+    /// exception in Python) for an error that is never reported.
+    fn cpu_buffer(&self) -> Option<&eqs_cpu_buffer_t> {
+        let is_cpu_buffer = matches!(
+            self.data, Some(function) if function as usize == eqs_cpu_buffer_data as usize
+        );
+        if !is_cpu_buffer || self.ptr.is_null() {
+            return None;
+        }
+
+        let buffer = unsafe { &*self.ptr.cast::<eqs_cpu_buffer_t>() };
+        if buffer.data.is_null() || buffer.shape.is_null() {
+            return None;
+        }
+
+        return Some(buffer);
+    }
+
+    /// Try to move samples from `input` to `self` by copying data directly
+    /// between the data pointers of both arrays. This returns `false` without
+    /// modifying anything if one of the arrays does not give access to its
+    /// data through an `eqs_cpu_buffer_t`, or if the shapes of the arrays are
+    /// not compatible.
+    fn move_samples_from_data(
+        &mut self,
+        input: &eqs_array_t,
+        samples: &[eqs_sample_mapping_t],
+        properties: Range<usize>,
+    ) -> bool {
+        let (output, input) = match (self.cpu_buffer(), input.cpu_buffer()) {
+            (Some(output), Some(input)) => (output, input),
+            _ => return false,
+        };
+
+        let output_shape = unsafe { std::slice::from_raw_parts(output.shape, output.shape_count) };
+        let input_shape = unsafe { std::slice::from_raw_parts(input.shape, input.shape_count) };
+
+        let n_dims = output_shape.len();
+        if n_dims < 2 || input_shape.len() != n_dims || output_shape[1..n_dims - 1] != input_shape[1..n_dims - 1] {
+            return false;
+        }
+
+        let input_properties = input_shape[n_dims - 1];
+        let output_properties = output_shape[n_dims - 1];
+        if properties.end > output_properties || properties.len() != input_properties {
+            return false;
+        }
+
+        let valid_samples = samples.iter().all(|sample| {
+            sample.input < input_shape[0] && sample.output < output_shape[0]
+        });
+        if !valid_samples {
+            return false;
+        }
+
+        if samples.is_empty() || input_properties == 0 || input_shape.contains(&0) {
+            return true;
+        }
+
+        let input_data = unsafe {
+            std::slice::from_raw_parts(input.data, input_shape.iter().product())
+        };
+        let output_data = unsafe {
+            std::slice::from_raw_parts_mut(output.data, output_shape.iter().product())
+        };
+
+        let n_components = output_shape[1..n_dims - 1].iter().product::<usize>();
+        let input_stride = n_components * input_properties;
+        let output_stride = n_components * output_properties;
+
+        for sample in samples {
+            let input_sample = &input_data[sample.input * input_stride..][..input_stride];
+            let output_sample = &mut output_data[sample.output * output_stride..][..output_stride];
+
+            let input_rows = input_sample.chunks_exact(input_properties);
+            let output_rows = output_sample.chunks_exact_mut(output_properties);
+            for (output_row, input_row) in output_rows.zip(input_rows) {
+                output_row[properties.clone()].copy_from_slice(input_row);
+            }
+        }
+
+        return true;
+    }
 }
 
 #[cfg(test)]
@@ -477,6 +579,7 @@ pub(crate) use self::tests::TestArray;
 #[cfg(test)]
 mod tests {
     use crate::c_api::EQS_SUCCESS;
+    use crate::c_api::data::eqs_cpu_buffer_shape;
 
     use super::*;
 
@@ -566,4 +669,60 @@ mod tests {
             data.ptr
         ));
     }
+
+    /// Create an `eqs_array_t` described by the given `buffer`
+    fn cpu_buffer_array(buffer: &mut eqs_cpu_buffer_t) -> eqs_array_t {
+        let mut array = eqs_array_t::null();
+        array.ptr = (buffer as *mut eqs_cpu_buffer_t).cast();
+        array.data = Some(eqs_cpu_buffer_data);
+        array.shape = Some(eqs_cpu_buffer_shape);
+        return array;
+    }
+
+    #[test]
+    fn move_samples_from_data() {
+        let input_shape = [2, 2, 1];
+        let mut input_data = vec![1.0, 2.0, 3.0, 4.0];
+        let mut input_buffer = eqs_cpu_buffer_t {
+            user_data: std::ptr::null_mut(),
+            data: input_data.as_mut_ptr(),
+            shape: input_shape.as_ptr(),
+            shape_count: input_shape.len(),
+        };
+
+        let output_shape = [3, 2, 3];
+        let mut output_data = vec![0.0; 18];
+        let mut output_buffer = eqs_cpu_buffer_t {
+            user_data: std::ptr::null_mut(),
+            data: output_data.as_mut_ptr(),
+            shape: output_shape.as_ptr(),
+            shape_count: output_shape.len(),
+        };
+
+        let input = cpu_buffer_array(&mut input_buffer);
+        let mut output = cpu_buffer_array(&mut output_buffer);
+
+        let samples = [
+            eqs_sample_mapping_t { input: 1, output: 0 },
+            eqs_sample_mapping_t { input: 0, output: 2 },
+        ];
+        // `move_samples_from` is NULL, so this would panic if the data was not
+        // copied directly
+        output.move_samples_from(&input, &samples, 1..2).unwrap();
+
+        assert_eq!(output_data, [
+            0.0, 3.0, 0.0, 0.0, 4.0, 0.0,
+            0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0, 2.0, 0.0,
+        ]);
+
+        // the data is not used directly if it is not available in the buffer,
+        // or for arrays not using `eqs_cpu_buffer_t`
+        assert!(input.cpu_buffer().is_some());
+        input_buffer.data = std::ptr::null_mut();
+        assert!(input.cpu_buffer().is_none());
+
+        let array = TestArray::new(vec![2, 2, 1]);
+        assert!(array.cpu_buffer().is_none());
+    }
 }
@@ -1,10 +1,10 @@
 use std::fmt::Write;
 
-use byteorder::{LittleEndian, ReadBytesExt, BigEndian, WriteBytesExt, NativeEndian};
+use byteorder::{LittleEndian, ReadBytesExt, BigEndian};
 use py_literal::Value as PyValue;
 
 use super::{Header, check_for_extra_bytes};
-use crate::{Error, Labels, LabelsBuilder, LabelValue};
+use crate::{Error, Labels, LabelsBuilder};
 
 /// Read `Labels` stored using numpy's NPY format.
 ///
@@ -31,8 +31,9 @@ pub fn read_npy_labels<R: std::io::Read>(mut reader: R) -> Result<Labels, Error>
     check_for_extra_bytes(&mut reader)?;
 
     let mut builder = LabelsBuilder::new(names.iter().map(|s| &**s).collect());
+    builder.reserve(header.shape[0]);
     for chunk in data.chunks_exact(names.len()) {
-        builder.add(&chunk.iter().map(|&i| LabelValue::new(i)).collect::<Vec<_>>())?;
+        builder.add(chunk)?;
     }
 
     return Ok(builder.finish());
@@ -61,11 +62,14 @@ pub fn write_npy_labels<W: std::io::Write>(writer: &mut W, labels: &Labels) -> R
     };
     header.write(&mut *writer)?;
 
+    // convert all the values to bytes first, and write them in a single call
+    let mut buffer = Vec::with_capacity(labels.count() * labels.size() * std::mem::size_of::<i32>());
     for entry in labels {
         for value in entry {
-            writer.write_i32::<NativeEndian>(value.i32())?;
+            buffer.extend_from_slice(&value.i32().to_ne_bytes());
         }
     }
+    writer.write_all(&buffer)?;
 
     return Ok(());
 }
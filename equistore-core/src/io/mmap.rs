@@ -0,0 +1,364 @@
+use std::os::raw::c_void;
+use std::sync::Arc;
+
+use memmap2::{MmapMut, MmapOptions};
+use py_literal::Value as PyValue;
+use zip::{ZipArchive, CompressionMethod};
+use zip::read::ZipFile;
+
+use crate::c_api::{catch_unwind, eqs_status_t};
+use crate::data::{eqs_array_t, eqs_data_origin_t, eqs_sample_mapping_t};
+use crate::{TensorMap, Error, register_data_origin};
+
+use super::{Header, load_archive, read_data};
+
+/// Name of the data origin used by arrays created in [`load_mmap`]
+pub const MMAP_ARRAY_ORIGIN: &str = "equistore.io.mmap";
+
+/// Load the serialized tensor map from the file at the given `path`, using a
+/// memory map of the file instead of reading the data.
+///
+/// The format is the same as for [`super::load`]. The values and gradients
+/// data is not copied, and only paged in memory when accessed. The
+/// corresponding arrays use the [`MMAP_ARRAY_ORIGIN`] data origin.
+///
+/// The file is mapped with copy-on-write semantics: the data of the arrays can
+/// be modified, and the modified pages are then private copies which are never
+/// written back to the file.
+///
+/// Data arrays can only be mapped when they are stored without compression,
+/// as native-endian 64-bit floats, and aligned on 8 bytes in the file; which
+/// is the case for files written by [`super::save`]. Other arrays are read in
+/// memory instead.
+///
+/// The file should not be modified while the tensor map (or any array coming
+/// from it) is alive.
+pub fn load_mmap(path: &str) -> Result<TensorMap, Error> {
+    let file = std::fs::File::open(path)?;
+    // SAFETY: the file could be modified by another process while it is
+    // mapped, this is documented as unsupported above.
+    let mut mmap = unsafe { MmapOptions::new().map_copy(&file)? };
+    let mmap = SharedMmap {
+        start: mmap.as_mut_ptr(),
+        mmap: Arc::new(mmap),
+    };
+
+    let archive = ZipArchive::new(std::io::Cursor::new(&mmap.mmap[..])).map_err(|e| ("<root>".into(), e))?;
+    return load_archive(archive, |archive, path| {
+        let data_file = archive.by_name(&path).map_err(|e| (path, e))?;
+        return map_data(&mmap, data_file);
+    });
+}
+
+/// Copy-on-write memory map shared between all the arrays loaded from a file
+#[derive(Clone)]
+struct SharedMmap {
+    mmap: Arc<MmapMut>,
+    /// pointer to the start of `mmap`, taken when creating it since writing
+    /// through the pointer from `Deref` would not be allowed
+    start: *mut u8,
+}
+
+// Create a memory-mapped array for the data in the given file, or read the
+// data in memory if it can not be mapped.
+fn map_data(mmap: &SharedMmap, file: ZipFile) -> Result<(eqs_array_t, Vec<usize>), Error> {
+    let create_array = |shape: Vec<usize>| Ok(MmapArray::owned(shape));
+    if file.compression() != CompressionMethod::Stored {
+        // the data of compressed files is not directly available in the
+        // mapped file, read it through the zip archive instead
+        return read_data(file, &create_array);
+    }
+
+    let start = usize::try_from(file.data_start()).expect("file is too big for this platform");
+    let size = usize::try_from(file.size()).expect("file is too big for this platform");
+    let bytes = start.checked_add(size)
+        .and_then(|end| mmap.mmap.get(start..end))
+        .ok_or_else(|| Error::Serialization(format!(
+            "data for '{}' is outside of the file", file.name()
+        )))?;
+
+    let mut reader = bytes;
+    let header = Header::from_reader(&mut reader)?;
+    let offset = start + (bytes.len() - reader.len());
+
+    let native_type = if cfg!(target_endian = "little") { "<f8" } else { ">f8" };
+    let is_native = matches!(&header.type_descriptor, PyValue::String(s) if s == native_type);
+    let is_aligned = (mmap.start as usize + offset) % std::mem::align_of::<f64>() == 0;
+
+    if header.fortran_order || !is_native || !is_aligned {
+        // fallback to reading the data, this will also handle errors in the
+        // header
+        return read_data(bytes, &create_array);
+    }
+
+    let shape = header.shape;
+    let expected_size = shape.iter().product::<usize>() * std::mem::size_of::<f64>();
+    if reader.len() != expected_size {
+        return Err(Error::Serialization(format!(
+            "expected {} bytes of data for '{}', got {}",
+            expected_size, file.name(), reader.len()
+        )));
+    }
+
+    let array = MmapArray::mapped(mmap.clone(), offset, shape.clone());
+    return Ok((array, shape));
+}
+
+/// Storage for the data of a `MmapArray`
+enum Storage {
+    /// Data from a memory-mapped file, starting `offset` bytes after the start
+    /// of the file. Different arrays never use overlapping parts of the file.
+    Mapped {
+        mmap: SharedMmap,
+        offset: usize,
+    },
+    /// Data owned by the array
+    Owned(Vec<f64>),
+}
+
+/// Implementation of `eqs_array_t` for arrays loaded with [`load_mmap`].
+///
+/// Arrays are created pointing to the data inside the mapped file, and are
+/// converted to owned data when the layout of the data changes (i.e. in
+/// `swap_axes`). All arrays created from these ones (with `create` or `copy`)
+/// contain owned data.
+pub struct MmapArray {
+    storage: Storage,
+    shape: Vec<usize>,
+}
+
+impl MmapArray {
+    /// Create an array using the data `offset` bytes after the start of `mmap`
+    fn mapped(mmap: SharedMmap, offset: usize, shape: Vec<usize>) -> eqs_array_t {
+        let array = MmapArray {
+            storage: Storage::Mapped { mmap, offset },
+            shape: shape,
+        };
+        return array.into_eqs_array();
+    }
+
+    /// Create an array with owned data, filled with zeros
+    fn owned(shape: Vec<usize>) -> eqs_array_t {
+        let array = MmapArray {
+            storage: Storage::Owned(vec![0.0; shape.iter().product()]),
+            shape: shape,
+        };
+        return array.into_eqs_array();
+    }
+
+    fn into_eqs_array(self) -> eqs_array_t {
+        let mut array = eqs_array_t::null();
+        array.ptr = Box::into_raw(Box::new(self)).cast();
+        array.origin = Some(MmapArray::origin);
+        array.data = Some(MmapArray::data);
+        array.shape = Some(MmapArray::shape);
+        array.reshape = Some(MmapArray::reshape);
+        array.swap_axes = Some(MmapArray::swap_axes);
+        array.create = Some(MmapArray::create);
+        array.copy = Some(MmapArray::copy);
+        array.destroy = Some(MmapArray::destroy);
+        array.move_samples_from = Some(MmapArray::move_samples_from);
+        return array;
+    }
+
+    /// Get a pointer to the start of the data of this array
+    #[allow(clippy::cast_ptr_alignment)]
+    fn as_mut_ptr(&mut self) -> *mut f64 {
+        match &mut self.storage {
+            // SAFETY: the size and alignment of the data were checked when
+            // creating the array
+            Storage::Mapped { mmap, offset } => unsafe { mmap.start.add(*offset).cast::<f64>() },
+            Storage::Owned(data) => data.as_mut_ptr(),
+        }
+    }
+
+    fn as_slice(&self) -> &[f64] {
+        match &self.storage {
+            Storage::Mapped { mmap, offset } => {
+                let len = self.shape.iter().product();
+                // SAFETY: the size and alignment of the data were checked
+                // when creating the array
+                #[allow(clippy::cast_ptr_alignment)]
+                unsafe {
+                    std::slice::from_raw_parts(mmap.start.add(*offset).cast::<f64>(), len)
+                }
+            }
+            Storage::Owned(data) => data,
+        }
+    }
+
+    fn as_mut_slice(&mut self) -> &mut [f64] {
+        let len = self.shape.iter().product();
+        // SAFETY: the mapping is copy-on-write and private to this process,
+        // and no other array uses the same part of the file
+        return unsafe { std::slice::from_raw_parts_mut(self.as_mut_ptr(), len) };
+    }
+
+    unsafe extern fn origin(_: *const c_void, origin: *mut eqs_data_origin_t) -> eqs_status_t {
+        catch_unwind(|| {
+            *origin = register_data_origin(MMAP_ARRAY_ORIGIN.into());
+            Ok(())
+        })
+    }
+
+    unsafe extern fn data(array: *mut c_void, data: *mut *mut f64) -> eqs_status_t {
+        catch_unwind(|| {
+            let array = &mut *array.cast::<MmapArray>();
+            // the mapping is copy-on-write, so the data can be modified
+            // through this pointer without touching the file
+            *data = array.as_mut_ptr();
+            Ok(())
+        })
+    }
+
+    unsafe extern fn shape(array: *const c_void, shape: *mut *const usize, shape_count: *mut usize) -> eqs_status_t {
+        catch_unwind(|| {
+            let array = array.cast::<MmapArray>();
+            *shape = (*array).shape.as_ptr();
+            *shape_count = (*array).shape.len();
+            Ok(())
+        })
+    }
+
+    unsafe extern fn reshape(array: *mut c_void, shape: *const usize, shape_count: usize) -> eqs_status_t {
+        catch_unwind(|| {
+            let array = array.cast::<MmapArray>();
+            let new_shape = std::slice::from_raw_parts(shape, shape_count);
+            if new_shape.iter().product::<usize>() != (*array).shape.iter().product::<usize>() {
+                return Err(Error::InvalidParameter(format!(
+                    "can not reshape array with shape {:?} to {:?}",
+                    (*array).shape, new_shape
+                )));
+            }
+
+            (*array).shape = new_shape.to_vec();
+            Ok(())
+        })
+    }
+
+    unsafe extern fn swap_axes(array: *mut c_void, axis_1: usize, axis_2: usize) -> eqs_status_t {
+        catch_unwind(|| {
+            let array = &mut *array.cast::<MmapArray>();
+            let shape = &array.shape;
+            if axis_1 >= shape.len() || axis_2 >= shape.len() {
+                return Err(Error::InvalidParameter(format!(
+                    "can not swap axes {} and {} in array with {} dimensions",
+                    axis_1, axis_2, shape.len()
+                )));
+            }
+
+            let mut old_strides = vec![1; shape.len()];
+            for i in (0..shape.len().saturating_sub(1)).rev() {
+                old_strides[i] = old_strides[i + 1] * shape[i + 1];
+            }
+
+            let mut new_shape = shape.clone();
+            new_shape.swap(axis_1, axis_2);
+            old_strides.swap(axis_1, axis_2);
+
+            let old_data = array.as_slice();
+            let mut new_data = vec![0.0; old_data.len()];
+            let mut index = vec![0; new_shape.len()];
+            for value in &mut new_data {
+                let old_position = index.iter().zip(&old_strides).map(|(i, s)| i * s).sum::<usize>();
+                *value = old_data[old_position];
+
+                for (dimension, size) in new_shape.iter().enumerate().rev() {
+                    index[dimension] += 1;
+                    if index[dimension] < *size {
+                        break;
+                    }
+                    index[dimension] = 0;
+                }
+            }
+
+            array.storage = Storage::Owned(new_data);
+            array.shape = new_shape;
+            Ok(())
+        })
+    }
+
+    unsafe extern fn create(
+        _: *const c_void,
+        shape: *const usize,
+        shape_count: usize,
+        new_array: *mut eqs_array_t,
+    ) -> eqs_status_t {
+        catch_unwind(|| {
+            let shape = std::slice::from_raw_parts(shape, shape_count);
+            *new_array = MmapArray::owned(shape.to_vec());
+            Ok(())
+        })
+    }
+
+    unsafe extern fn copy(array: *const c_void, new_array: *mut eqs_array_t) -> eqs_status_t {
+        catch_unwind(|| {
+            let array = &*array.cast::<MmapArray>();
+            // mapped data can be modified, so it can not be shared between
+            // copies
+            let copy = MmapArray {
+                storage: Storage::Owned(array.as_slice().to_vec()),
+                shape: array.shape.clone(),
+            };
+            *new_array = copy.into_eqs_array();
+            Ok(())
+        })
+    }
+
+    unsafe extern fn destroy(array: *mut c_void) {
+        let array = array.cast::<MmapArray>();
+        let boxed = Box::from_raw(array);
+        std::mem::drop(boxed);
+    }
+
+    unsafe extern fn move_samples_from(
+        output: *mut c_void,
+        input: *const c_void,
+        samples: *const eqs_sample_mapping_t,
+        samples_count: usize,
+        property_start: usize,
+        property_end: usize,
+    ) -> eqs_status_t {
+        catch_unwind(|| {
+            if samples_count == 0 {
+                return Ok(());
+            }
+
+            let output = &mut *output.cast::<MmapArray>();
+            let input = &*input.cast::<MmapArray>();
+            let samples = std::slice::from_raw_parts(samples, samples_count);
+
+            let n_properties = input.shape[input.shape.len() - 1];
+            if property_end - property_start != n_properties {
+                return Err(Error::InvalidParameter(format!(
+                    "invalid properties range {}..{} in move_samples_from, \
+                    the input array has {} properties",
+                    property_start, property_end, n_properties
+                )));
+            }
+
+            if n_properties == 0 {
+                return Ok(());
+            }
+
+            let input_stride = input.shape[1..].iter().product::<usize>();
+            let output_properties = output.shape[output.shape.len() - 1];
+            let output_stride = output.shape[1..].iter().product::<usize>();
+
+            let input_data = input.as_slice();
+            let output_data = output.as_mut_slice();
+            for sample in samples {
+                let input_rows = input_data[sample.input * input_stride..(sample.input + 1) * input_stride]
+                    .chunks_exact(n_properties);
+                let output_rows = output_data[sample.output * output_stride..(sample.output + 1) * output_stride]
+                    .chunks_exact_mut(output_properties);
+
+                for (input_row, output_row) in input_rows.zip(output_rows) {
+                    output_row[property_start..property_end].copy_from_slice(input_row);
+                }
+            }
+
+            Ok(())
+        })
+    }
+}
@@ -1,10 +1,11 @@
 use std::sync::Arc;
 
-use byteorder::{LittleEndian, BigEndian, ReadBytesExt, WriteBytesExt, NativeEndian};
+use byteorder::{ByteOrder, LittleEndian, BigEndian, ReadBytesExt};
+use half::f16;
 use py_literal::Value as PyValue;
 use zip::{ZipArchive, ZipWriter, DateTime};
 
-use crate::{TensorMap, Error, TensorBlock, eqs_array_t};
+use crate::{TensorMap, Error, TensorBlock, Labels, eqs_array_t};
 
 
 mod npy_header;
@@ -13,6 +14,18 @@ pub use self::npy_header::Header;
 mod labels;
 use self::labels::{read_npy_labels, write_npy_labels};
 
+mod mmap;
+pub use self::mmap::{load_mmap, MMAP_ARRAY_ORIGIN};
+
+mod parallel;
+pub use self::parallel::{load_parallel, save_parallel};
+
+mod writer;
+pub use self::writer::TensorMapWriter;
+
+mod select;
+pub use self::select::{load_selected, LoadSelection};
+
 /// Load the serialized tensor map from the given path.
 ///
 /// Arrays for the values and gradient data will be created with the given
@@ -20,8 +33,9 @@ use self::labels::{read_npy_labels, write_npy_labels};
 /// data.
 ///
 /// `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file
-/// without compression (storage method is STORED), where each file is stored as
-/// a `.npy` array. Both the ZIP and NPY format are well documented:
+/// without compression by default (storage method is STORED, DEFLATE is also
+/// supported), where each file is stored as a `.npy` array. Both the ZIP and
+/// NPY format are well documented:
 ///
 /// - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>
 /// - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>
@@ -29,7 +43,8 @@ use self::labels::{read_npy_labels, write_npy_labels};
 /// We add other restriction on top of these formats when saving/loading data.
 /// First, `Labels` instances are saved as structured array, see the `labels`
 /// module for more information. Only 32-bit integers are supported for Labels,
-/// and only 64-bit floats are supported for data (values and gradients).
+/// and only 64-bit, 32-bit and 16-bit floats are supported for data (values and
+/// gradients). The data is always loaded as 64-bit floats.
 ///
 /// Second, the path of the files in the archive also carry meaning. The keys of
 /// the `TensorMap` are stored in `/keys.npy`, and then different blocks are
@@ -54,25 +69,28 @@ pub fn load<R, F>(reader: R, create_array: F) -> Result<TensorMap, Error>
     where R: std::io::Read + std::io::Seek,
           F: Fn(Vec<usize>) -> Result<eqs_array_t, Error>
 {
-    let mut archive = ZipArchive::new(reader).map_err(|e| ("<root>".into(), e))?;
+    let archive = ZipArchive::new(reader).map_err(|e| ("<root>".into(), e))?;
+    return load_archive(archive, |archive, path| {
+        let data_file = archive.by_name(&path).map_err(|e| (path, e))?;
+        return read_data(data_file, &create_array);
+    });
+}
 
+/// Load a tensor map from the given zip `archive`, using `load_data` to get
+/// the data array (and its shape) stored in the file with the given path.
+fn load_archive<R, F>(mut archive: ZipArchive<R>, mut load_data: F) -> Result<TensorMap, Error>
+    where R: std::io::Read + std::io::Seek,
+          F: FnMut(&mut ZipArchive<R>, String) -> Result<(eqs_array_t, Vec<usize>), Error>
+{
     let path = String::from("keys.npy");
     let keys = read_npy_labels(archive.by_name(&path).map_err(|e| (path, e))?)?;
 
-    let mut parameters = Vec::new();
-    for name in archive.file_names() {
-        if name.starts_with("blocks/0/gradients/") && name.ends_with("/data.npy") {
-            let (_, parameter) = name.split_at(19);
-            let (parameter, _) = parameter.split_at(parameter.len() - 9);
-            parameters.push(parameter.to_string());
-        }
-    }
+    let parameters = gradient_parameters(&archive);
 
     let mut blocks = Vec::new();
     for block_i in 0..keys.count() {
         let path = format!("blocks/{}/values/data.npy", block_i);
-        let data_file = archive.by_name(&path).map_err(|e| (path, e))?;
-        let (data, shape) = read_data(data_file, &create_array)?;
+        let (data, shape) = load_data(&mut archive, path)?;
 
         let path = format!("blocks/{}/values/samples.npy", block_i);
         let samples_file = archive.by_name(&path).map_err(|e| (path, e))?;
@@ -93,8 +111,7 @@ pub fn load<R, F>(reader: R, create_array: F) -> Result<TensorMap, Error>
 
         for parameter in &parameters {
             let path = format!("blocks/{}/gradients/{}/data.npy", block_i, parameter);
-            let data_file = archive.by_name(&path).map_err(|e| (path, e))?;
-            let (data, shape) = read_data(data_file, &create_array)?;
+            let (data, shape) = load_data(&mut archive, path)?;
 
             let path = format!("blocks/{}/gradients/{}/samples.npy", block_i, parameter);
             let samples_file = archive.by_name(&path).map_err(|e| (path, e))?;
@@ -116,60 +133,196 @@ pub fn load<R, F>(reader: R, create_array: F) -> Result<TensorMap, Error>
     return TensorMap::new(keys, blocks);
 }
 
+/// Get the list of gradient parameters stored in the given `archive`
+fn gradient_parameters<R>(archive: &ZipArchive<R>) -> Vec<String> {
+    let mut parameters = Vec::new();
+    for name in archive.file_names() {
+        if name.starts_with("blocks/0/gradients/") && name.ends_with("/data.npy") {
+            let (_, parameter) = name.split_at(19);
+            let (parameter, _) = parameter.split_at(parameter.len() - 9);
+            parameters.push(parameter.to_string());
+        }
+    }
+    return parameters;
+}
+
+
+/// Type used to store the values and gradients data when saving tensor maps.
+///
+/// Data is always loaded as 64-bit floats, using a smaller type allows to
+/// reduce the size of the files at the cost of losing precision.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum StorageType {
+    /// 64-bit floating point numbers, without any loss of precision
+    Float64,
+    /// 32-bit floating point numbers
+    Float32,
+    /// 16-bit floating point numbers
+    Float16,
+}
+
+impl StorageType {
+    /// Get the storage type corresponding to the given `name`, which should
+    /// be one of `"float64"`, `"float32"` or `"float16"`.
+    pub fn from_name(name: &str) -> Result<StorageType, Error> {
+        match name {
+            "float64" => Ok(StorageType::Float64),
+            "float32" => Ok(StorageType::Float32),
+            "float16" => Ok(StorageType::Float16),
+            _ => Err(Error::InvalidParameter(format!(
+                "unknown storage type '{}', expected one of 'float64', 'float32' or 'float16'",
+                name
+            ))),
+        }
+    }
+
+    /// Get the NPY type descriptor for this type, using the native endianness
+    fn type_descriptor(self) -> &'static str {
+        let little_endian = cfg!(target_endian = "little");
+        match (self, little_endian) {
+            (StorageType::Float64, true) => "'<f8'",
+            (StorageType::Float64, false) => "'>f8'",
+            (StorageType::Float32, true) => "'<f4'",
+            (StorageType::Float32, false) => "'>f4'",
+            (StorageType::Float16, true) => "'<f2'",
+            (StorageType::Float16, false) => "'>f2'",
+        }
+    }
+}
+
+/// Options controlling how tensor maps are saved
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct SaveOptions {
+    /// Should we compress all the files in the archive with DEFLATE? Files
+    /// compressed this way can still be loaded by `numpy.load`, but can not
+    /// be loaded with [`load_mmap`] without making a copy of the data.
+    pub compress: bool,
+    /// Type used to store the values and gradients data
+    pub data_type: StorageType,
+}
+
+impl Default for SaveOptions {
+    fn default() -> SaveOptions {
+        SaveOptions {
+            compress: false,
+            data_type: StorageType::Float64,
+        }
+    }
+}
+
+/// Alignment (in bytes) of the data files inside the zip archive. NPY headers
+/// are padded to a multiple of 64 bytes, so the array data is aligned as well.
+const DATA_ALIGNMENT: u16 = 64;
 
 /// Save the given tensor to a file (or any other writer).
 ///
 /// The format used is documented in the [`load`] function, and is based on
 /// numpy's NPZ format (i.e. zip archive containing NPY files).
 pub fn save<W: std::io::Write + std::io::Seek>(writer: W, tensor: &TensorMap) -> Result<(), Error> {
+    return save_with_options(writer, tensor, SaveOptions::default());
+}
+
+/// Save the given tensor to a file (or any other writer), using the given
+/// `options` to control how the data is stored.
+///
+/// The format is the same as for [`save`], with files in the archive
+/// optionally compressed with DEFLATE, and the data optionally stored as
+/// 32-bit or 16-bit floats. All these files can be read with [`load`], and are
+/// still valid NPZ files.
+pub fn save_with_options<W>(writer: W, tensor: &TensorMap, options: SaveOptions) -> Result<(), Error>
+    where W: std::io::Write + std::io::Seek
+{
     let mut archive = ZipWriter::new(writer);
-    let options = zip::write::FileOptions::default()
-        .compression_method(zip::CompressionMethod::Stored)
+    for (path, entry) in archive_entries(tensor) {
+        write_entry(&mut archive, path, &entry, options)?;
+    }
+
+    archive.finish().map_err(|e| ("<root>".into(), e))?;
+
+    return Ok(());
+}
+
+/// Options used for all the files in the archive
+fn file_options(compress: bool) -> zip::write::FileOptions {
+    let method = if compress {
+        zip::CompressionMethod::Deflated
+    } else {
+        zip::CompressionMethod::Stored
+    };
+
+    return zip::write::FileOptions::default()
+        .compression_method(method)
         .large_file(true)
         .last_modified_time(DateTime::from_date_and_time(2000, 1, 1, 0, 0, 0).expect("invalid datetime"));
+}
 
-    let path = String::from("keys.npy");
-    archive.start_file(&path, options).map_err(|e| (path, e))?;
-    write_npy_labels(&mut archive, tensor.keys())?;
+/// Content of a single file in the archive
+enum ArchiveEntry<'a> {
+    Labels(&'a Labels),
+    Data(&'a eqs_array_t),
+}
 
+/// Get all the files needed to serialize `tensor`, together with their path
+/// in the archive, in the order in which they should be written.
+///
+/// The keys are written last, to allow writing blocks one at a time with
+/// [`TensorMapWriter`] and still produce the same file.
+fn archive_entries(tensor: &TensorMap) -> Vec<(String, ArchiveEntry<'_>)> {
+    let mut entries = Vec::new();
     for (block_i, block) in tensor.blocks().iter().enumerate() {
-        let path = format!("blocks/{}/values/data.npy", block_i);
-        archive.start_file(&path, options).map_err(|e| (path, e))?;
-        write_data(&mut archive, &block.values().data)?;
+        entries.extend(block_entries(block_i, block));
+    }
+    entries.push((String::from("keys.npy"), ArchiveEntry::Labels(tensor.keys())));
 
-        let path = format!("blocks/{}/values/samples.npy", block_i);
-        archive.start_file(&path, options).map_err(|e| (path, e))?;
-        write_npy_labels(&mut archive, &block.values().samples)?;
+    return entries;
+}
 
-        for (i, component) in block.values().components.iter().enumerate() {
-            let path = format!("blocks/{}/values/components/{}.npy", block_i, i);
-            archive.start_file(&path, options).map_err(|e| (path, e))?;
-            write_npy_labels(&mut archive, component)?;
+/// Get all the files needed to serialize the `block` at index `block_i` in a
+/// tensor map, together with their path in the archive.
+fn block_entries(block_i: usize, block: &TensorBlock) -> Vec<(String, ArchiveEntry<'_>)> {
+    let mut entries = Vec::new();
+
+    let values = block.values();
+    let prefix = format!("blocks/{}/values", block_i);
+    entries.push((format!("{}/data.npy", prefix), ArchiveEntry::Data(&values.data)));
+    entries.push((format!("{}/samples.npy", prefix), ArchiveEntry::Labels(&values.samples)));
+    for (i, component) in values.components.iter().enumerate() {
+        entries.push((format!("{}/components/{}.npy", prefix, i), ArchiveEntry::Labels(component)));
+    }
+    entries.push((format!("{}/properties.npy", prefix), ArchiveEntry::Labels(&values.properties)));
+
+    // sort the gradients to get a deterministic order in the file
+    let mut gradients = block.gradients().iter().collect::<Vec<_>>();
+    gradients.sort_unstable_by(|a, b| a.0.cmp(b.0));
+    for (parameter, gradient) in gradients {
+        let prefix = format!("blocks/{}/gradients/{}", block_i, parameter);
+        entries.push((format!("{}/data.npy", prefix), ArchiveEntry::Data(&gradient.data)));
+        entries.push((format!("{}/samples.npy", prefix), ArchiveEntry::Labels(&gradient.samples)));
+        for (i, component) in gradient.components.iter().enumerate() {
+            entries.push((format!("{}/components/{}.npy", prefix, i), ArchiveEntry::Labels(component)));
         }
+    }
 
-        let path = format!("blocks/{}/values/properties.npy", block_i);
-        archive.start_file(&path, options).map_err(|e| (path, e))?;
-        write_npy_labels(&mut archive, &block.values().properties)?;
-
-        for (parameter, gradient) in block.gradients() {
-            let path = format!("blocks/{}/gradients/{}/data.npy", block_i, parameter);
-            archive.start_file(&path, options).map_err(|e| (path, e))?;
-            write_data(&mut archive, &gradient.data)?;
-
-            let path = format!("blocks/{}/gradients/{}/samples.npy", block_i, parameter);
-            archive.start_file(&path, options).map_err(|e| (path, e))?;
-            write_npy_labels(&mut archive, &gradient.samples)?;
+    return entries;
+}
 
-            for (i, component) in gradient.components.iter().enumerate() {
-                let path = format!("blocks/{}/gradients/{}/components/{}.npy", block_i, parameter, i);
-                archive.start_file(&path, options).map_err(|e| (path, e))?;
-                write_npy_labels(&mut archive, component)?;
-            }
+/// Write a single `entry` at the given `path` in the archive
+fn write_entry<W>(archive: &mut ZipWriter<W>, path: String, entry: &ArchiveEntry<'_>, options: SaveOptions) -> Result<(), Error>
+    where W: std::io::Write + std::io::Seek
+{
+    let file_options = file_options(options.compress);
+    match entry {
+        ArchiveEntry::Labels(labels) => {
+            archive.start_file(&path, file_options).map_err(|e| (path, e))?;
+            write_npy_labels(archive, labels)?;
+        }
+        ArchiveEntry::Data(array) => {
+            // align the data to allow loading it with `load_mmap`
+            archive.start_file_aligned(&path, file_options, DATA_ALIGNMENT).map_err(|e| (path, e))?;
+            write_data(archive, array, options.data_type)?;
         }
     }
 
-    archive.finish().map_err(|e| ("<root>".into(), e))?;
-
     return Ok(());
 }
 
@@ -177,32 +330,99 @@ pub fn save<W: std::io::Write + std::io::Seek>(writer: W, tensor: &TensorMap) ->
 fn read_data<R, F>(mut reader: R, create_array: &F) -> Result<(eqs_array_t, Vec<usize>), Error>
     where R: std::io::Read, F: Fn(Vec<usize>) -> Result<eqs_array_t, Error>
 {
-    let header = Header::from_reader(&mut reader)?;
+    let header = read_data_header(&mut reader)?;
+
+    let shape = header.shape;
+    let mut array = create_array(shape.clone())?;
+    read_data_values(reader, &header.type_descriptor, array.data_mut()?)?;
+
+    return Ok((array, shape));
+}
+
+// Read the NPY header of a data array from the given reader
+fn read_data_header<R: std::io::Read>(reader: &mut R) -> Result<Header, Error> {
+    let header = Header::from_reader(reader)?;
     if header.fortran_order {
         return Err(Error::Serialization("data can not be loaded from fortran-order arrays".into()));
     }
 
-    let shape = header.shape;
-    let mut array = create_array(shape.clone())?;
+    return Ok(header);
+}
+
+// Read the values of a data array (stored with the given NPY type descriptor)
+// from the given reader into `data`, checking that there is no more data
+// after them
+fn read_data_values<R: std::io::Read>(mut reader: R, type_descriptor: &PyValue, data: &mut [f64]) -> Result<(), Error> {
+    read_values(&mut reader, type_descriptor, data)?;
+    check_for_extra_bytes(&mut reader)?;
 
-    match header.type_descriptor {
+    return Ok(());
+}
+
+// Read `data.len()` values stored with the given NPY type descriptor from the
+// given reader into `data`
+fn read_values<R: std::io::Read>(reader: &mut R, type_descriptor: &PyValue, data: &mut [f64]) -> Result<(), Error> {
+    // `read_f64_into` reads all the data in a single `read_exact` call, and
+    // then converts the endianness in place if needed. Smaller types are read
+    // by chunks and widened to f64.
+    match type_descriptor {
         PyValue::String(s) if s == "<f8" => {
-            reader.read_f64_into::<LittleEndian>(array.data_mut()?)?;
+            reader.read_f64_into::<LittleEndian>(data)?;
         }
         PyValue::String(s) if s == ">f8" => {
-            reader.read_f64_into::<BigEndian>(array.data_mut()?)?;
+            reader.read_f64_into::<BigEndian>(data)?;
+        }
+        PyValue::String(s) if s == "<f4" => {
+            read_f32_values::<_, LittleEndian>(reader, data)?;
+        }
+        PyValue::String(s) if s == ">f4" => {
+            read_f32_values::<_, BigEndian>(reader, data)?;
+        }
+        PyValue::String(s) if s == "<f2" => {
+            read_f16_values::<_, LittleEndian>(reader, data)?;
+        }
+        PyValue::String(s) if s == ">f2" => {
+            read_f16_values::<_, BigEndian>(reader, data)?;
         }
         _ => {
             return Err(Error::Serialization(format!(
-                "unknown type for data array, expected 64-bit floating points, got {}",
-                header.type_descriptor
+                "unknown type for data array, expected 64-bit, 32-bit or 16-bit floating points, got {}",
+                type_descriptor
             )));
         }
     }
 
-    check_for_extra_bytes(&mut reader)?;
+    return Ok(());
+}
 
-    return Ok((array, shape));
+/// Number of values converted at once when reading or writing data stored
+/// with a different type than f64
+const CONVERSION_CHUNK_SIZE: usize = 64 * 1024;
+
+// Read 32-bit floats from the reader, and store them in `data`
+fn read_f32_values<R: std::io::Read, B: ByteOrder>(reader: &mut R, data: &mut [f64]) -> Result<(), Error> {
+    let mut buffer = vec![0.0_f32; CONVERSION_CHUNK_SIZE.min(data.len())];
+    for chunk in data.chunks_mut(CONVERSION_CHUNK_SIZE) {
+        let buffer = &mut buffer[..chunk.len()];
+        reader.read_f32_into::<B>(buffer)?;
+        for (value, &stored) in chunk.iter_mut().zip(&*buffer) {
+            *value = f64::from(stored);
+        }
+    }
+    return Ok(());
+}
+
+// Read 16-bit floats from the reader, and store them in `data`
+fn read_f16_values<R: std::io::Read, B: ByteOrder>(reader: &mut R, data: &mut [f64]) -> Result<(), Error> {
+    let mut buffer = vec![0_u16; CONVERSION_CHUNK_SIZE.min(data.len())];
+    for chunk in data.chunks_mut(CONVERSION_CHUNK_SIZE) {
+        let buffer = &mut buffer[..chunk.len()];
+        reader.read_u16_into::<B>(buffer)?;
+        for (value, &stored) in chunk.iter_mut().zip(&*buffer) {
+            *value = f16::from_bits(stored).to_f64();
+        }
+    }
+    return Ok(());
 }
 
 // returns an error if the given reader contains any more data
@@ -216,24 +436,57 @@ fn check_for_extra_bytes<R: std::io::Read>(reader: &mut R) -> Result<(), Error>
 }
 
 // Write an array to the given writer, using numpy's NPY format
-fn write_data<W: std::io::Write>(writer: &mut W, array: &eqs_array_t) -> Result<(), Error> {
-    let type_descriptor = if cfg!(target_endian = "little") {
-        "'<f8'"
-    } else {
-        "'>f8'"
-    };
+fn write_data<W: std::io::Write>(writer: &mut W, array: &eqs_array_t, data_type: StorageType) -> Result<(), Error> {
+    data_header(array.shape()?.to_vec(), data_type).write(&mut *writer)?;
+    write_data_values(writer, array.data()?, data_type)?;
 
-    let header = Header {
-        type_descriptor: type_descriptor.parse().expect("invalid dtype"),
-        fortran_order: false,
-        shape: array.shape()?.to_vec(),
-    };
+    return Ok(());
+}
 
-    header.write(&mut *writer)?;
+// Write the values of a data array to the given writer, converting them to
+// `data_type` with the native endianness
+fn write_data_values<W: std::io::Write>(writer: &mut W, data: &[f64], data_type: StorageType) -> Result<(), Error> {
+    if data_type == StorageType::Float64 {
+        // the data is stored with the native endianness, so we can write all
+        // of it in a single call instead of converting values one by one
+        writer.write_all(f64_as_bytes(data))?;
+        return Ok(());
+    }
 
-    for &value in array.data()? {
-        writer.write_f64::<NativeEndian>(value)?;
+    let mut buffer = Vec::with_capacity(CONVERSION_CHUNK_SIZE.min(data.len()) * 4);
+    for chunk in data.chunks(CONVERSION_CHUNK_SIZE) {
+        buffer.clear();
+        if data_type == StorageType::Float32 {
+            for &value in chunk {
+                #[allow(clippy::cast_possible_truncation)]
+                let value = value as f32;
+                buffer.extend_from_slice(&value.to_ne_bytes());
+            }
+        } else {
+            for &value in chunk {
+                buffer.extend_from_slice(&f16::from_f64(value).to_ne_bytes());
+            }
+        }
+        writer.write_all(&buffer)?;
     }
 
     return Ok(());
 }
+
+// Get the NPY header for a data array with the given shape
+fn data_header(shape: Vec<usize>, data_type: StorageType) -> Header {
+    return Header {
+        type_descriptor: data_type.type_descriptor().parse().expect("invalid dtype"),
+        fortran_order: false,
+        shape: shape,
+    };
+}
+
+/// Get a view of the memory backing the `data` as bytes
+fn f64_as_bytes(data: &[f64]) -> &[u8] {
+    // SAFETY: u8 has no alignment requirement, f64 does not contain any
+    // padding and any bit pattern is a valid u8
+    unsafe {
+        std::slice::from_raw_parts(data.as_ptr().cast(), std::mem::size_of_val(data))
+    }
+}
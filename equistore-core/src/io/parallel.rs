@@ -0,0 +1,211 @@
+use std::io::{Cursor, Write};
+use std::sync::Arc;
+
+use memmap2::Mmap;
+use rayon::prelude::*;
+use zip::{ZipArchive, ZipWriter};
+
+use crate::{TensorMap, TensorBlock, Labels, Error, eqs_array_t};
+
+use super::labels::{read_npy_labels, write_npy_labels};
+use super::{ArchiveEntry, archive_entries, file_options, gradient_parameters};
+use super::{data_header, write_data_values, read_data_header, read_data_values};
+use super::{SaveOptions, DATA_ALIGNMENT};
+
+/// Create a thread pool with `n_threads` threads. If `n_threads` is 0, the
+/// number of threads is picked automatically (usually as many as there are
+/// CPU cores).
+fn thread_pool(n_threads: usize) -> Result<rayon::ThreadPool, Error> {
+    return rayon::ThreadPoolBuilder::new()
+        .num_threads(n_threads)
+        .build()
+        .map_err(|e| Error::Internal(format!("failed to create the thread pool: {}", e)));
+}
+
+/// Load the serialized tensor map from the file at the given `path`, using
+/// `n_threads` threads to read the data and decode the labels.
+///
+/// The format is the same as for [`super::load`], and the file is read with
+/// positional reads inside a memory map of the file, allowing multiple threads
+/// to read different parts of the file at the same time. If `n_threads` is 0,
+/// the number of threads is picked automatically.
+///
+/// The arrays for the values and gradient data are all created with
+/// `create_array` on the calling thread, which is also the only thread calling
+/// functions from the `eqs_array_t` (the other threads only write to the data
+/// pointer).
+pub fn load_parallel<F>(path: &str, create_array: F, n_threads: usize) -> Result<TensorMap, Error>
+    where F: Fn(Vec<usize>) -> Result<eqs_array_t, Error>
+{
+    let pool = thread_pool(n_threads)?;
+
+    let file = std::fs::File::open(path)?;
+    // SAFETY: the file could be modified by another process while it is
+    // mapped, in which case we would read garbage data. The mapping does not
+    // outlive this function.
+    let mmap = unsafe { Mmap::map(&file)? };
+    let mut archive = ZipArchive::new(Cursor::new(&mmap[..])).map_err(|e| ("<root>".into(), e))?;
+
+    let path = String::from("keys.npy");
+    let keys = read_npy_labels(archive.by_name(&path).map_err(|e| (path, e))?)?;
+    let parameters = gradient_parameters(&archive);
+
+    // prefix of all the arrays in the archive (and whether they are values or
+    // gradients), in the order in which they are used to build the blocks
+    let mut prefixes = Vec::new();
+    for block_i in 0..keys.count() {
+        prefixes.push((format!("blocks/{}/values", block_i), true));
+        for parameter in &parameters {
+            prefixes.push((format!("blocks/{}/gradients/{}", block_i, parameter), false));
+        }
+    }
+
+    // create all the arrays on this thread, only reading the NPY headers, and
+    // get the paths of all the labels to read
+    let mut arrays = Vec::with_capacity(prefixes.len());
+    let mut headers = Vec::with_capacity(prefixes.len());
+    let mut labels_paths = Vec::new();
+    for (prefix, is_values) in &prefixes {
+        let path = format!("{}/data.npy", prefix);
+        let mut data_file = archive.by_name(&path).map_err(|e| (path, e))?;
+        let header = read_data_header(&mut data_file)?;
+        arrays.push(create_array(header.shape.clone())?);
+
+        labels_paths.push(format!("{}/samples.npy", prefix));
+        for i in 0..(header.shape.len() - 2) {
+            labels_paths.push(format!("{}/components/{}.npy", prefix, i));
+        }
+        if *is_values {
+            labels_paths.push(format!("{}/properties.npy", prefix));
+        }
+
+        headers.push(header);
+    }
+
+    let mut data = arrays.iter_mut()
+        .map(eqs_array_t::data_mut)
+        .collect::<Result<Vec<_>, Error>>()?;
+
+    let labels = pool.install(|| {
+        prefixes.par_iter().zip(&headers).zip(&mut data).try_for_each(|(((prefix, _), header), data)| {
+            let mut archive = archive.clone();
+            let path = format!("{}/data.npy", prefix);
+            let mut data_file = archive.by_name(&path).map_err(|e| (path, e))?;
+            // skip the header, we already read it above
+            read_data_header(&mut data_file)?;
+            return read_data_values(data_file, &header.type_descriptor, data);
+        })?;
+
+        return labels_paths.par_iter().map(|path| {
+            let mut archive = archive.clone();
+            let labels_file = archive.by_name(path).map_err(|e| (path.clone(), e))?;
+            return read_npy_labels(labels_file).map(Arc::new);
+        }).collect::<Result<Vec<_>, Error>>();
+    })?;
+    drop(data);
+
+    let mut labels = labels.into_iter();
+    let mut next_labels = || labels.next().expect("missing labels");
+
+    let mut arrays = arrays.into_iter().zip(headers);
+    let mut blocks = Vec::new();
+    for _ in 0..keys.count() {
+        let (values, header) = arrays.next().expect("missing values");
+        let samples = next_labels();
+        let components = (0..(header.shape.len() - 2)).map(|_| next_labels()).collect();
+        let properties = next_labels();
+
+        let mut block = TensorBlock::new(values, samples, components, properties)?;
+
+        for parameter in &parameters {
+            let (gradient, header) = arrays.next().expect("missing gradient");
+            let samples = next_labels();
+            let components = (0..(header.shape.len() - 2)).map(|_| next_labels()).collect();
+
+            block.add_gradient(parameter, gradient, samples, components)?;
+        }
+
+        blocks.push(block);
+    }
+
+    return TensorMap::new(keys, blocks);
+}
+
+/// Content of a single file in the archive, before encoding
+enum PendingEntry<'a> {
+    Labels(&'a Labels),
+    /// Shape and data of an array
+    Data(Vec<usize>, &'a [f64]),
+}
+
+/// Content of a single file in the archive, ready to be written
+enum EncodedEntry<'a> {
+    /// Fully encoded labels
+    Labels(Vec<u8>),
+    /// Encoded NPY header, and the corresponding data
+    Data(Vec<u8>, &'a [f64]),
+}
+
+/// Save the given tensor to a file (or any other writer), using `n_threads`
+/// threads to encode the labels and NPY headers.
+///
+/// The file is exactly the same as the one produced by
+/// [`super::save_with_options`] with the same `options`: all the files are
+/// written to the archive in the same deterministic order, and the data is
+/// written directly from the arrays. If `n_threads` is 0, the number of threads
+/// is picked automatically.
+///
+/// Only the calling thread uses functions from `eqs_array_t`.
+pub fn save_parallel<W>(writer: W, tensor: &TensorMap, options: SaveOptions, n_threads: usize) -> Result<(), Error>
+    where W: std::io::Write + std::io::Seek
+{
+    let pool = thread_pool(n_threads)?;
+
+    let mut entries = Vec::new();
+    for (path, entry) in archive_entries(tensor) {
+        let entry = match entry {
+            ArchiveEntry::Labels(labels) => PendingEntry::Labels(labels),
+            ArchiveEntry::Data(array) => PendingEntry::Data(array.shape()?.to_vec(), array.data()?),
+        };
+        entries.push((path, entry));
+    }
+
+    let entries = pool.install(|| {
+        entries.into_par_iter().map(|(path, entry)| {
+            let mut buffer = Vec::new();
+            let entry = match entry {
+                PendingEntry::Labels(labels) => {
+                    write_npy_labels(&mut buffer, labels)?;
+                    EncodedEntry::Labels(buffer)
+                }
+                PendingEntry::Data(shape, data) => {
+                    data_header(shape, options.data_type).write(&mut buffer)?;
+                    EncodedEntry::Data(buffer, data)
+                }
+            };
+            return Ok((path, entry));
+        }).collect::<Result<Vec<_>, Error>>()
+    })?;
+
+    let mut archive = ZipWriter::new(writer);
+    let data_type = options.data_type;
+    let options = file_options(options.compress);
+    for (path, entry) in entries {
+        match entry {
+            EncodedEntry::Labels(bytes) => {
+                archive.start_file(&path, options).map_err(|e| (path, e))?;
+                archive.write_all(&bytes)?;
+            }
+            EncodedEntry::Data(header, data) => {
+                // align the data to allow loading it with `load_mmap`
+                archive.start_file_aligned(&path, options, DATA_ALIGNMENT).map_err(|e| (path, e))?;
+                archive.write_all(&header)?;
+                write_data_values(&mut archive, data, data_type)?;
+            }
+        }
+    }
+
+    archive.finish().map_err(|e| ("<root>".into(), e))?;
+
+    return Ok(());
+}
@@ -0,0 +1,362 @@
+use std::io::{Cursor, Read};
+use std::sync::Arc;
+
+use memmap2::Mmap;
+use py_literal::Value as PyValue;
+use zip::{ZipArchive, CompressionMethod};
+
+use crate::{TensorMap, TensorBlock, Labels, LabelsBuilder, LabelValue};
+use crate::{Error, eqs_array_t};
+
+use super::labels::read_npy_labels;
+use super::{Header, gradient_parameters, read_data, read_data_header, read_values};
+
+/// Parts of a tensor map to load with [`load_selected`]. Setting any of the
+/// fields to `None` loads all the corresponding entries.
+#[derive(Clone, Copy, Default)]
+pub struct LoadSelection<'a> {
+    /// Only load the blocks with a key matching one of the entries in these
+    /// labels. The labels can contain a subset of the keys dimensions.
+    pub keys: Option<&'a Labels>,
+    /// Only load the samples matching one of the entries in these labels. The
+    /// labels can contain a subset of the samples dimensions.
+    pub samples: Option<&'a Labels>,
+    /// Only load the properties matching one of the entries in these labels.
+    /// The labels can contain a subset of the properties dimensions.
+    pub properties: Option<&'a Labels>,
+}
+
+/// Load the parts of the serialized tensor map at the given `path` matching
+/// the `selection`.
+///
+/// The format is the same as for [`super::load`]. Only the blocks matching the
+/// keys selection are read, in the same order as in the file. Inside these
+/// blocks, only the rows corresponding to selected samples are read, and only
+/// the selected properties are kept. The gradients are filtered in the same
+/// way, and their `"sample"` dimension is updated to refer to the new samples.
+/// Blocks without any selected samples or properties are kept, with an empty
+/// dimension.
+///
+/// The file is mapped in memory, and for arrays stored without compression,
+/// the selected rows are read directly from their position in the file.
+/// Compressed arrays still need to be decompressed up to the last selected
+/// row.
+pub fn load_selected<F>(path: &str, create_array: F, selection: LoadSelection<'_>) -> Result<TensorMap, Error>
+    where F: Fn(Vec<usize>) -> Result<eqs_array_t, Error>
+{
+    let file = std::fs::File::open(path)?;
+    // SAFETY: the file could be modified by another process while it is
+    // mapped, in which case we would read garbage data. The mapping does not
+    // outlive this function.
+    let mmap = unsafe { Mmap::map(&file)? };
+    let mut archive = ZipArchive::new(Cursor::new(&mmap[..])).map_err(|e| ("<root>".into(), e))?;
+
+    let path = String::from("keys.npy");
+    let keys = read_npy_labels(archive.by_name(&path).map_err(|e| (path, e))?)?;
+    let parameters = gradient_parameters(&archive);
+
+    let selected_blocks = match selection.keys {
+        Some(selected) => matching_entries(&keys, selected, "keys")?,
+        None => (0..keys.count()).collect(),
+    };
+
+    let mut blocks = Vec::with_capacity(selected_blocks.len());
+    for &block_i in &selected_blocks {
+        let prefix = format!("blocks/{}/values", block_i);
+        let header = read_header(&mut archive, format!("{}/data.npy", prefix))?;
+
+        let samples = read_labels(&mut archive, format!("{}/samples.npy", prefix))?;
+        let mut components = Vec::new();
+        for i in 0..(header.shape.len() - 2) {
+            components.push(Arc::new(read_labels(&mut archive, format!("{}/components/{}.npy", prefix, i))?));
+        }
+        let properties = read_labels(&mut archive, format!("{}/properties.npy", prefix))?;
+
+        let rows = match selection.samples {
+            Some(selected) => Some(matching_entries(&samples, selected, "samples")?),
+            None => None,
+        };
+        let columns = match selection.properties {
+            Some(selected) => Some(matching_entries(&properties, selected, "properties")?),
+            None => None,
+        };
+
+        let values = read_selected_data(
+            &mmap, &mut archive, format!("{}/data.npy", prefix), rows.as_deref(), columns.as_deref(), &create_array
+        )?;
+
+        // position of the old samples in the new samples, if they are selected
+        let samples_mapping = match &rows {
+            Some(rows) => {
+                let mut mapping = vec![None; samples.count()];
+                for (new_sample, &sample) in rows.iter().enumerate() {
+                    mapping[sample] = Some(new_sample);
+                }
+                mapping
+            }
+            None => Vec::new(),
+        };
+
+        let samples = match &rows {
+            Some(rows) => select_entries(&samples, rows)?,
+            None => samples,
+        };
+        let properties = match &columns {
+            Some(columns) => select_entries(&properties, columns)?,
+            None => properties,
+        };
+
+        let mut block = TensorBlock::new(values, Arc::new(samples), components, Arc::new(properties))?;
+
+        for parameter in &parameters {
+            let prefix = format!("blocks/{}/gradients/{}", block_i, parameter);
+            let header = read_header(&mut archive, format!("{}/data.npy", prefix))?;
+
+            let samples = read_labels(&mut archive, format!("{}/samples.npy", prefix))?;
+            let mut components = Vec::new();
+            for i in 0..(header.shape.len() - 2) {
+                components.push(Arc::new(read_labels(&mut archive, format!("{}/components/{}.npy", prefix, i))?));
+            }
+
+            let (samples, rows) = if rows.is_some() {
+                let (samples, rows) = remap_gradient_samples(&samples, &samples_mapping, parameter)?;
+                (samples, Some(rows))
+            } else {
+                (samples, None)
+            };
+
+            let data = read_selected_data(
+                &mmap, &mut archive, format!("{}/data.npy", prefix), rows.as_deref(), columns.as_deref(), &create_array
+            )?;
+
+            block.add_gradient(parameter, data, Arc::new(samples), components)?;
+        }
+
+        blocks.push(block);
+    }
+
+    let keys = select_entries(&keys, &selected_blocks)?;
+    return TensorMap::new(keys, blocks);
+}
+
+/// Read the labels stored in the file at `path` in the `archive`
+fn read_labels(archive: &mut ZipArchive<Cursor<&[u8]>>, path: String) -> Result<Labels, Error> {
+    let file = archive.by_name(&path).map_err(|e| (path, e))?;
+    return read_npy_labels(file);
+}
+
+/// Read the NPY header of the data array stored in the file at `path` in the
+/// `archive`
+fn read_header(archive: &mut ZipArchive<Cursor<&[u8]>>, path: String) -> Result<Header, Error> {
+    let mut file = archive.by_name(&path).map_err(|e| (path.clone(), e))?;
+    let header = read_data_header(&mut file)?;
+    if header.shape.len() < 2 {
+        return Err(Error::Serialization(format!(
+            "data arrays must have at least two dimensions, got {} for '{}'",
+            header.shape.len(), path
+        )));
+    }
+
+    return Ok(header);
+}
+
+/// Get the indexes of the entries in `labels` matching one of the entries in
+/// `selection`, which can contain a subset of the dimensions of `labels`.
+/// `kind` is used in error messages.
+fn matching_entries(labels: &Labels, selection: &Labels, kind: &str) -> Result<Vec<usize>, Error> {
+    let names = labels.names();
+    let mut dimensions = Vec::new();
+    for requested in selection.names() {
+        match names.iter().position(|&name| name == requested) {
+            Some(i) => dimensions.push(i),
+            None => {
+                return Err(Error::InvalidParameter(format!(
+                    "'{}' is not part of the {} of this tensor",
+                    requested, kind
+                )));
+            }
+        }
+    }
+
+    let mut matching = Vec::new();
+    let mut candidate = Vec::with_capacity(dimensions.len());
+    for (i, entry) in labels.iter().enumerate() {
+        candidate.clear();
+        candidate.extend(dimensions.iter().map(|&d| entry[d]));
+        if selection.contains(&candidate) {
+            matching.push(i);
+        }
+    }
+
+    return Ok(matching);
+}
+
+/// Create new labels containing the given `entries` of `labels`
+fn select_entries(labels: &Labels, entries: &[usize]) -> Result<Labels, Error> {
+    let mut builder = LabelsBuilder::new(labels.names());
+    builder.reserve(entries.len());
+    for &i in entries {
+        builder.add(&labels[i])?;
+    }
+
+    return Ok(builder.finish());
+}
+
+/// Only keep the gradient samples referring to one of the selected samples,
+/// and update their `"sample"` dimension using `samples_mapping`. This returns
+/// the new gradient samples and the corresponding rows in the gradient data.
+fn remap_gradient_samples(
+    samples: &Labels,
+    samples_mapping: &[Option<usize>],
+    parameter: &str,
+) -> Result<(Labels, Vec<usize>), Error> {
+    let mut builder = LabelsBuilder::new(samples.names());
+    let mut rows = Vec::new();
+    let mut new_entry = Vec::with_capacity(samples.size());
+    for (row, entry) in samples.iter().enumerate() {
+        let sample = entry[0];
+        if sample.isize() < 0 || sample.usize() >= samples_mapping.len() {
+            return Err(Error::Serialization(format!(
+                "invalid gradient sample with respect to '{}': it refers \
+                to sample {} but there are only {} samples in this block",
+                parameter, sample, samples_mapping.len()
+            )));
+        }
+
+        if let Some(new_sample) = samples_mapping[sample.usize()] {
+            new_entry.clear();
+            new_entry.push(LabelValue::from(new_sample));
+            new_entry.extend_from_slice(&entry[1..]);
+            builder.add(&new_entry)?;
+            rows.push(row);
+        }
+    }
+
+    return Ok((builder.finish(), rows));
+}
+
+/// Get the size in bytes of the values stored with the given NPY type
+/// descriptor
+fn element_size(type_descriptor: &PyValue) -> Result<usize, Error> {
+    match type_descriptor {
+        PyValue::String(s) if s == "<f8" || s == ">f8" => Ok(8),
+        PyValue::String(s) if s == "<f4" || s == ">f4" => Ok(4),
+        PyValue::String(s) if s == "<f2" || s == ">f2" => Ok(2),
+        _ => Err(Error::Serialization(format!(
+            "unknown type for data array, expected 64-bit, 32-bit or 16-bit floating points, got {}",
+            type_descriptor
+        ))),
+    }
+}
+
+/// Read the `rows` and `columns` (i.e. entries along the last dimension) of
+/// the data array stored in the file at `path` in the `archive`. `None` means
+/// that all rows or columns should be read. The rows must be sorted in
+/// increasing order.
+fn read_selected_data<F>(
+    mmap: &[u8],
+    archive: &mut ZipArchive<Cursor<&[u8]>>,
+    path: String,
+    rows: Option<&[usize]>,
+    columns: Option<&[usize]>,
+    create_array: &F,
+) -> Result<eqs_array_t, Error>
+    where F: Fn(Vec<usize>) -> Result<eqs_array_t, Error>
+{
+    let mut file = archive.by_name(&path).map_err(|e| (path.clone(), e))?;
+    if rows.is_none() && columns.is_none() {
+        let (array, _) = read_data(file, create_array)?;
+        return Ok(array);
+    }
+
+    let header = read_data_header(&mut file)?;
+    let shape = header.shape;
+    let n_rows = shape[0];
+    let n_columns = shape[shape.len() - 1];
+    let row_size = shape[1..].iter().product::<usize>();
+    let row_bytes = row_size * element_size(&header.type_descriptor)?;
+
+    let all_rows;
+    let rows = match rows {
+        Some(rows) => rows,
+        None => {
+            all_rows = (0..n_rows).collect::<Vec<_>>();
+            &all_rows
+        }
+    };
+
+    let mut new_shape = shape.clone();
+    new_shape[0] = rows.len();
+    if let Some(columns) = columns {
+        new_shape[shape.len() - 1] = columns.len();
+    }
+    let new_row_size = new_shape[1..].iter().product::<usize>();
+
+    let mut array = create_array(new_shape)?;
+    if rows.is_empty() || new_row_size == 0 {
+        return Ok(array);
+    }
+    let data = array.data_mut()?;
+
+    // copy the selected columns of a single row from `row` to `output`
+    let gather = |row: &[f64], output: &mut [f64]| {
+        match columns {
+            None => output.copy_from_slice(row),
+            Some(columns) => {
+                let chunks = row.chunks_exact(n_columns).zip(output.chunks_exact_mut(columns.len()));
+                for (input, output) in chunks {
+                    for (output, &column) in output.iter_mut().zip(columns) {
+                        *output = input[column];
+                    }
+                }
+            }
+        }
+    };
+
+    let mut row = vec![0.0; row_size];
+    if file.compression() == CompressionMethod::Stored {
+        // the data is directly available in the mapped file, only read the
+        // selected rows
+        let start = usize::try_from(file.data_start()).expect("file is too big for this platform");
+        let size = usize::try_from(file.size()).expect("file is too big for this platform");
+        let bytes = start.checked_add(size)
+            .and_then(|end| mmap.get(start..end))
+            .ok_or_else(|| Error::Serialization(format!(
+                "data for '{}' is outside of the file", path
+            )))?;
+
+        let mut reader = bytes;
+        Header::from_reader(&mut reader)?;
+        if reader.len() != n_rows * row_bytes {
+            return Err(Error::Serialization(format!(
+                "expected {} bytes of data for '{}', got {}",
+                n_rows * row_bytes, path, reader.len()
+            )));
+        }
+
+        for (&row_i, output) in rows.iter().zip(data.chunks_exact_mut(new_row_size)) {
+            let mut input = &reader[row_i * row_bytes..(row_i + 1) * row_bytes];
+            read_values(&mut input, &header.type_descriptor, &mut row)?;
+            gather(&row, output);
+        }
+    } else {
+        // compressed data has to be read sequentially, skipping the rows we
+        // don't need
+        let mut current = 0;
+        for (&row_i, output) in rows.iter().zip(data.chunks_exact_mut(new_row_size)) {
+            let skipped = ((row_i - current) * row_bytes) as u64;
+            let copied = std::io::copy(&mut (&mut file).take(skipped), &mut std::io::sink())?;
+            if copied != skipped {
+                return Err(Error::Serialization(format!(
+                    "unexpected end of data for '{}'", path
+                )));
+            }
+
+            read_values(&mut file, &header.type_descriptor, &mut row)?;
+            gather(&row, output);
+            current = row_i + 1;
+        }
+    }
+
+    return Ok(array);
+}
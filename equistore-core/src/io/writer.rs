@@ -0,0 +1,78 @@
+use zip::ZipWriter;
+
+use crate::tensor::BlockStructure;
+use crate::{TensorBlock, LabelsBuilder, LabelValue, Error};
+
+use super::{ArchiveEntry, SaveOptions, block_entries, write_entry};
+
+/// Incremental writer for tensor maps, adding blocks to the file one at a
+/// time.
+///
+/// This allows to serialize a tensor map without keeping all the blocks in
+/// memory at the same time. Blocks are written as soon as they are added with
+/// [`TensorMapWriter::add_block`], and the keys are written when calling
+/// [`TensorMapWriter::finish`]. The resulting file is the same as the one
+/// produced by [`super::save_with_options`] for a tensor map containing the
+/// same keys and blocks.
+pub struct TensorMapWriter<W: std::io::Write + std::io::Seek> {
+    archive: ZipWriter<W>,
+    options: SaveOptions,
+    keys: LabelsBuilder,
+    /// number of blocks already written to the archive
+    n_blocks: usize,
+    /// structure of the first block, used to check that all blocks are
+    /// compatible with each other
+    structure: Option<BlockStructure>,
+}
+
+impl<W: std::io::Write + std::io::Seek> TensorMapWriter<W> {
+    /// Create a new `TensorMapWriter` writing to the given `writer`, with
+    /// keys containing the given `key_names`.
+    pub fn new(writer: W, key_names: Vec<&str>, options: SaveOptions) -> TensorMapWriter<W> {
+        TensorMapWriter {
+            archive: ZipWriter::new(writer),
+            options: options,
+            keys: LabelsBuilder::new(key_names),
+            n_blocks: 0,
+            structure: None,
+        }
+    }
+
+    /// Write the `block` associated with the given `key` to the file.
+    ///
+    /// All the blocks must have the same labels names and set of gradients,
+    /// and the keys must be unique.
+    pub fn add_block(&mut self, key: &[LabelValue], block: &TensorBlock) -> Result<(), Error> {
+        if key.len() != self.keys.size() {
+            return Err(Error::InvalidParameter(format!(
+                "expected a key with {} values, got {}",
+                self.keys.size(), key.len()
+            )));
+        }
+
+        match &self.structure {
+            Some(structure) => structure.check(block)?,
+            None => self.structure = Some(BlockStructure::new(block)),
+        }
+
+        self.keys.add(key)?;
+
+        for (path, entry) in block_entries(self.n_blocks, block) {
+            write_entry(&mut self.archive, path, &entry, self.options)?;
+        }
+        self.n_blocks += 1;
+
+        return Ok(());
+    }
+
+    /// Write the keys and finish writing the file, returning the underlying
+    /// writer.
+    pub fn finish(mut self) -> Result<W, Error> {
+        let keys = self.keys.finish();
+        write_entry(&mut self.archive, "keys.npy".into(), &ArchiveEntry::Labels(&keys), self.options)?;
+
+        let writer = self.archive.finish().map_err(|e| ("<root>".into(), e))?;
+
+        return Ok(writer);
+    }
+}
@@ -0,0 +1,28 @@
+use std::collections::HashSet;
+use std::sync::Arc;
+
+use super::Labels;
+
+/// Deduplicate `Labels` by content, to store identical labels only once.
+///
+/// This is used to share the components and properties labels between all the
+/// blocks of a tensor map, since they are often identical. Interned labels can
+/// then be compared in O(1) with `Arc::ptr_eq` (which is also the first check
+/// done by `Labels::eq`).
+#[derive(Default)]
+pub(crate) struct LabelsInterner {
+    labels: HashSet<Arc<Labels>, ahash::RandomState>,
+}
+
+impl LabelsInterner {
+    /// Get the interned labels with the same content as `labels`, adding
+    /// `labels` to the set of interned labels if they are not already there.
+    pub fn intern(&mut self, labels: &Arc<Labels>) -> Arc<Labels> {
+        if let Some(existing) = self.labels.get(labels) {
+            return Arc::clone(existing);
+        }
+
+        self.labels.insert(Arc::clone(labels));
+        return Arc::clone(labels);
+    }
+}
@@ -1,14 +1,23 @@
 #![allow(clippy::default_trait_access, clippy::module_name_repetitions)]
 
 use std::ffi::CString;
-use std::collections::{BTreeSet, HashMap};
-use std::collections::hash_map::Entry;
+use std::collections::BTreeSet;
+use std::hash::{Hash, Hasher};
 
+use once_cell::sync::OnceCell;
 use smallvec::SmallVec;
 
 use crate::Error;
 use crate::utils::ConstCString;
 
+mod positions;
+use self::positions::Positions;
+
+mod set_operations;
+
+mod interner;
+pub(crate) use self::interner::LabelsInterner;
+
 /// A single value inside a label. This is represented as a 32-bit signed
 /// integer, with a couple of helper function to get its value as usize/isize.
 #[derive(Clone, Copy, PartialEq, Eq, PartialOrd, Ord, Hash)]
@@ -98,7 +107,15 @@ pub struct LabelsBuilder {
     // cf `Labels` for the documentation of the fields
     names: Vec<String>,
     values: Vec<LabelValue>,
-    positions: HashMap<SmallVec<[LabelValue; 4]>, usize, ahash::RandomState>,
+    /// Number of entries added so far
+    count: usize,
+    /// Are all the entries added so far sorted in strictly increasing
+    /// lexicographic order? In this case, they are guaranteed to be unique and
+    /// `positions` does not need to be filled.
+    sorted: bool,
+    /// Positions of the entries, only filled once the entries are no longer
+    /// sorted, to check for uniqueness of the new entries.
+    positions: Positions,
 }
 
 impl LabelsBuilder {
@@ -114,14 +131,18 @@ impl LabelsBuilder {
         LabelsBuilder {
             names: names.into_iter().map(|s| s.into()).collect(),
             values: Vec::new(),
-            positions: Default::default(),
+            count: 0,
+            sorted: true,
+            positions: Positions::new(),
         }
     }
 
     /// Reserve space for `additional` other entries in the labels.
     pub fn reserve(&mut self, additional: usize) {
         self.values.reserve(additional * self.names.len());
-        self.positions.reserve(additional);
+        if !self.sorted {
+            self.positions.reserve(additional, &self.values, self.names.len());
+        }
     }
 
     /// Get the number of labels in a single value
@@ -131,8 +152,13 @@ impl LabelsBuilder {
 
     /// Add a single `entry` to this set of labels.
     ///
-    /// This function will panic when attempting to add the same `label` more
-    /// than once.
+    /// This function will return an error when attempting to add the same
+    /// `label` more than once.
+    ///
+    /// As long as the entries are added in strictly increasing lexicographic
+    /// order, checking for uniqueness only requires comparing the new entry
+    /// with the previous one. Otherwise, the entries are stored in a hash table
+    /// to detect duplicates.
     pub fn add<T>(&mut self, entry: &[T]) -> Result<(), Error> where T: Copy + Into<LabelValue> {
         assert_eq!(
             self.size(), entry.len(),
@@ -140,23 +166,35 @@ impl LabelsBuilder {
             entry.len(), self.size()
         );
 
-        let entry = entry.iter().copied().map(Into::into).collect::<SmallVec<_>>();
-        self.values.extend(&entry);
+        let entry = entry.iter().copied().map(Into::into).collect::<SmallVec<[LabelValue; 4]>>();
 
-        let new_position = self.positions.len();
-        match self.positions.entry(entry) {
-            Entry::Occupied(entry) => {
-                let values_display = entry.key().iter().map(|v| v.to_string()).collect::<Vec<_>>().join(", ");
-                return Err(Error::InvalidParameter(format!(
-                    "can not have the same label value multiple time: [{}] is already present at position {}",
-                    values_display, entry.get()
-                )));
-            },
-            Entry::Vacant(entry) => {
-                entry.insert(new_position);
+        let size = self.size();
+        if self.sorted {
+            let previous = self.count.checked_sub(1).map(|last| &self.values[last * size..]);
+            if previous.map_or(true, |previous| previous < &entry[..]) {
+                self.values.extend(&entry);
+                self.count += 1;
+                return Ok(());
             }
+
+            // the entries are no longer sorted, switch to the hash table based
+            // uniqueness check for this and all subsequent entries
+            self.sorted = false;
+            self.positions = Positions::build(&self.values, size);
         }
 
+        self.values.extend(&entry);
+        if let Err(existing) = self.positions.insert(&self.values, size, self.count) {
+            self.values.truncate(self.count * size);
+
+            let values_display = entry.iter().map(|v| v.to_string()).collect::<Vec<_>>().join(", ");
+            return Err(Error::InvalidParameter(format!(
+                "can not have the same label value multiple time: [{}] is already present at position {}",
+                values_display, existing
+            )));
+        }
+        self.count += 1;
+
         Ok(())
     }
 
@@ -167,7 +205,7 @@ impl LabelsBuilder {
             return Labels {
                 names: Vec::new(),
                 values: Vec::new(),
-                positions: Default::default(),
+                positions: OnceCell::new(),
             }
         }
 
@@ -175,10 +213,18 @@ impl LabelsBuilder {
             .map(|s| ConstCString::new(CString::new(s).expect("invalid C string")))
             .collect::<Vec<_>>();
 
+        // if we already had to build the positions to check for uniqueness,
+        // keep them around. Otherwise they will be built on first use.
+        let positions = if self.sorted {
+            OnceCell::new()
+        } else {
+            OnceCell::from(self.positions)
+        };
+
         return Labels {
             names: names,
             values: self.values,
-            positions: self.positions,
+            positions: positions,
         };
     }
 }
@@ -211,7 +257,7 @@ pub fn is_valid_label_name(name: &str) -> bool {
 /// often (but not always) sorted in  lexicographic order.
 ///
 /// The main way to construct a new set of labels is to use a `LabelsBuilder`.
-#[derive(Clone, PartialEq, Eq)]
+#[derive(Clone)]
 pub struct Labels {
     /// Names of the labels, stored as const C strings for easier integration
     /// with the C API
@@ -219,10 +265,35 @@ pub struct Labels {
     /// Values of the labels, as a linearized 2D array in row-major order
     values: Vec<LabelValue>,
     /// Store the position of all the known labels, for faster access later.
-    /// This uses `XxHash64` instead of the default hasher in std since
-    /// `XxHash64` is much faster and we don't need the cryptographic strength
-    /// hash from std.
-    positions: HashMap<SmallVec<[LabelValue; 4]>, usize, ahash::RandomState>,
+    /// This only stores the row of each entry, and compares entries against
+    /// `values`.
+    ///
+    /// This is only built on the first call to `Labels::position` or
+    /// `Labels::contains`, since most labels are never used for lookups.
+    positions: OnceCell<Positions>,
+}
+
+impl PartialEq for Labels {
+    fn eq(&self, other: &Labels) -> bool {
+        // labels shared between blocks (see `LabelsInterner`) are the same
+        // object, and can be compared without looking at the values
+        if std::ptr::eq(self, other) {
+            return true;
+        }
+
+        self.names == other.names && self.values == other.values
+    }
+}
+
+impl Eq for Labels {}
+
+impl Hash for Labels {
+    fn hash<H: Hasher>(&self, state: &mut H) {
+        for name in &self.names {
+            name.as_str().hash(state);
+        }
+        self.values.hash(state);
+    }
 }
 
 impl std::fmt::Debug for Labels {
@@ -277,7 +348,7 @@ impl Labels {
 
     /// Check whether the given `label` is part of this set of labels
     pub fn contains(&self, label: &[LabelValue]) -> bool {
-        self.positions.contains_key(label)
+        self.positions().get(&self.values, self.size(), label).is_some()
     }
 
     /// Get the position (i.e. row index) of the given label in the full labels
@@ -285,7 +356,12 @@ impl Labels {
     pub fn position(&self, value: &[LabelValue]) -> Option<usize> {
         assert!(value.len() == self.size(), "invalid size of index in Labels::position");
 
-        self.positions.get(value).copied()
+        self.positions().get(&self.values, self.size(), value)
+    }
+
+    /// Get the positions of the entries, building them if needed
+    fn positions(&self) -> &Positions {
+        self.positions.get_or_init(|| Positions::build(&self.values, self.size()))
     }
 
     /// Iterate over the entries in this set of labels
@@ -332,3 +408,53 @@ impl std::ops::Index<usize> for Labels {
         &self.values[start..stop]
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn uniqueness() {
+        // sorted entries
+        let mut builder = LabelsBuilder::new(vec!["foo", "bar"]);
+        builder.add(&[0, 1]).unwrap();
+        builder.add(&[0, 2]).unwrap();
+        builder.add(&[1, 0]).unwrap();
+        let error = builder.add(&[1, 0]).unwrap_err();
+        assert_eq!(
+            error.to_string(),
+            "invalid parameter: can not have the same label value multiple time: [1, 0] is already present at position 2"
+        );
+
+        // unsorted entries
+        let mut builder = LabelsBuilder::new(vec!["foo", "bar"]);
+        builder.add(&[1, 0]).unwrap();
+        builder.add(&[0, 2]).unwrap();
+        builder.add(&[0, 1]).unwrap();
+        let error = builder.add(&[0, 2]).unwrap_err();
+        assert_eq!(
+            error.to_string(),
+            "invalid parameter: can not have the same label value multiple time: [0, 2] is already present at position 1"
+        );
+    }
+
+    #[test]
+    fn positions() {
+        for entries in [[[0, 1], [0, 2], [1, 0]], [[1, 0], [0, 2], [0, 1]]] {
+            let mut builder = LabelsBuilder::new(vec!["foo", "bar"]);
+            for entry in &entries {
+                builder.add(entry).unwrap();
+            }
+            let labels = builder.finish();
+
+            for (i, entry) in entries.iter().enumerate() {
+                let entry = entry.iter().copied().map(LabelValue::new).collect::<Vec<_>>();
+                assert!(labels.contains(&entry));
+                assert_eq!(labels.position(&entry), Some(i));
+            }
+
+            assert!(!labels.contains(&[LabelValue::new(2), LabelValue::new(2)]));
+            assert_eq!(labels.position(&[LabelValue::new(2), LabelValue::new(2)]), None);
+        }
+    }
+}
@@ -0,0 +1,168 @@
+use std::hash::{BuildHasher, Hash, Hasher};
+
+use super::LabelValue;
+
+/// Marker for empty slots in `Positions`
+const EMPTY_SLOT: u32 = u32::MAX;
+
+/// A single slot in the `Positions` hash table
+#[derive(Clone, Copy)]
+struct Slot {
+    /// Upper bits of the hash of the entry, used to skip most comparisons
+    /// against the values of the labels
+    tag: u32,
+    /// Row of the entry in the labels, or `EMPTY_SLOT`
+    row: u32,
+}
+
+const EMPTY: Slot = Slot { tag: 0, row: EMPTY_SLOT };
+
+/// Hash table storing the position of the entries in a set of labels.
+///
+/// Instead of storing a copy of each entry as the key of a `HashMap`, this
+/// only stores the row of each entry together with part of its hash, and
+/// compares entries against the linearized values of the labels. These values
+/// (and the number of values per entry) must be passed to all the functions
+/// using the table. Collisions are resolved with linear probing.
+#[derive(Clone)]
+pub(super) struct Positions {
+    /// This uses `ahash` instead of the default hasher in std since it is much
+    /// faster and we don't need the cryptographic strength hash from std.
+    hasher: ahash::RandomState,
+    /// Slots of the table, the length is always zero or a power of two
+    slots: Vec<Slot>,
+    /// Number of non-empty slots
+    len: usize,
+}
+
+impl Positions {
+    /// Create a new empty table
+    pub fn new() -> Positions {
+        Positions {
+            hasher: ahash::RandomState::new(),
+            slots: Vec::new(),
+            len: 0,
+        }
+    }
+
+    /// Create a new table containing all the entries in `values`, which must
+    /// be unique.
+    pub fn build(values: &[LabelValue], size: usize) -> Positions {
+        let count = if size == 0 { 0 } else { values.len() / size };
+
+        let mut positions = Positions::new();
+        positions.reserve(count, values, size);
+        for row in 0..count {
+            let result = positions.insert(values, size, row);
+            debug_assert!(result.is_ok(), "duplicated entry in Labels");
+        }
+
+        return positions;
+    }
+
+    /// Get the row of `entry` in `values`, or `None` if `entry` is not part of
+    /// this table
+    pub fn get(&self, values: &[LabelValue], size: usize, entry: &[LabelValue]) -> Option<usize> {
+        if self.slots.is_empty() {
+            return None;
+        }
+
+        let slot = self.slots[self.probe(values, size, entry, self.hash(entry))];
+        if slot.row == EMPTY_SLOT {
+            return None;
+        } else {
+            return Some(slot.row as usize);
+        }
+    }
+
+    /// Add the entry at `row` in `values` to this table. If the same entry is
+    /// already present, this returns the row of the existing entry as an
+    /// error.
+    pub fn insert(&mut self, values: &[LabelValue], size: usize, row: usize) -> Result<(), usize> {
+        assert!(row < EMPTY_SLOT as usize, "Labels can not contain more than {} entries", EMPTY_SLOT);
+        self.reserve(1, values, size);
+
+        let entry = &values[row * size..(row + 1) * size];
+        let hash = self.hash(entry);
+        let slot = self.probe(values, size, entry, hash);
+        if self.slots[slot].row != EMPTY_SLOT {
+            return Err(self.slots[slot].row as usize);
+        }
+
+        #[allow(clippy::cast_possible_truncation)]
+        let row = row as u32;
+        self.slots[slot] = Slot { tag: tag(hash), row: row };
+        self.len += 1;
+
+        return Ok(());
+    }
+
+    /// Make sure the table can hold `additional` more entries, re-hashing the
+    /// entries in `values` if the table needs to grow.
+    pub fn reserve(&mut self, additional: usize, values: &[LabelValue], size: usize) {
+        let needed = self.len + additional;
+        // keep the load factor below 3/4
+        if 4 * needed <= 3 * self.slots.len() {
+            return;
+        }
+
+        let capacity = (4 * needed / 3 + 1).next_power_of_two().max(8);
+        let old_slots = std::mem::replace(&mut self.slots, vec![EMPTY; capacity]);
+        for old in old_slots {
+            if old.row == EMPTY_SLOT {
+                continue;
+            }
+
+            let row = old.row as usize;
+            let hash = self.hash(&values[row * size..(row + 1) * size]);
+            let mask = self.slots.len() - 1;
+            let mut slot = start(hash, mask);
+            while self.slots[slot].row != EMPTY_SLOT {
+                slot = (slot + 1) & mask;
+            }
+            self.slots[slot] = old;
+        }
+    }
+
+    /// Hash a single `entry`
+    fn hash(&self, entry: &[LabelValue]) -> u64 {
+        let mut hasher = self.hasher.build_hasher();
+        entry.hash(&mut hasher);
+        return hasher.finish();
+    }
+
+    /// Get the index of the slot containing `entry` (which has the given
+    /// `hash`), or of the empty slot where it should be inserted. The table
+    /// must contain at least one empty slot.
+    fn probe(&self, values: &[LabelValue], size: usize, entry: &[LabelValue], hash: u64) -> usize {
+        let mask = self.slots.len() - 1;
+        let tag = tag(hash);
+
+        let mut slot = start(hash, mask);
+        loop {
+            let current = self.slots[slot];
+            if current.row == EMPTY_SLOT {
+                return slot;
+            }
+
+            let row = current.row as usize;
+            if current.tag == tag && &values[row * size..(row + 1) * size] == entry {
+                return slot;
+            }
+
+            slot = (slot + 1) & mask;
+        }
+    }
+}
+
+/// Get the first slot to look at for the given `hash`
+#[allow(clippy::cast_possible_truncation)]
+fn start(hash: u64, mask: usize) -> usize {
+    return (hash as usize) & mask;
+}
+
+/// Get the tag stored alongside the row for the given `hash`
+#[allow(clippy::cast_possible_truncation)]
+fn tag(hash: u64) -> u32 {
+    return (hash >> 32) as u32;
+}
@@ -0,0 +1,238 @@
+use once_cell::sync::OnceCell;
+
+use crate::Error;
+use super::{Labels, LabelValue};
+
+impl Labels {
+    /// Get the union of `self` and `other`, containing all the entries of
+    /// `self` followed by the entries of `other` which are not already in
+    /// `self`.
+    ///
+    /// If they are not empty, `first_mapping` and `second_mapping` are filled
+    /// with the position in the union of each entry of `self` and `other`
+    /// respectively.
+    #[allow(clippy::cast_possible_wrap)]
+    pub fn union(&self, other: &Labels, first_mapping: &mut [i64], second_mapping: &mut [i64]) -> Result<Labels, Error> {
+        self.check_set_operation(other, "union", first_mapping, second_mapping)?;
+
+        let size = self.size();
+        if size == 0 {
+            return Ok(self.clone());
+        }
+
+        for (i, mapping) in first_mapping.iter_mut().enumerate() {
+            *mapping = i as i64;
+        }
+
+        let mut values = self.values.clone();
+        let mut count = self.count();
+        for (j, entry) in other.iter().enumerate() {
+            let position = match self.position(entry) {
+                Some(position) => position,
+                None => {
+                    values.extend_from_slice(entry);
+                    count += 1;
+                    count - 1
+                }
+            };
+
+            if !second_mapping.is_empty() {
+                second_mapping[j] = position as i64;
+            }
+        }
+
+        return Ok(self.with_values(values));
+    }
+
+    /// Get the intersection of `self` and `other`, containing all the entries
+    /// of `self` which are also in `other`, in the same order as in `self`.
+    ///
+    /// If they are not empty, `first_mapping` and `second_mapping` are filled
+    /// with the position in the intersection of each entry of `self` and
+    /// `other` respectively, or -1 if the entry is not in the intersection.
+    #[allow(clippy::cast_possible_wrap)]
+    pub fn intersection(&self, other: &Labels, first_mapping: &mut [i64], second_mapping: &mut [i64]) -> Result<Labels, Error> {
+        self.check_set_operation(other, "intersection", first_mapping, second_mapping)?;
+
+        let size = self.size();
+        if size == 0 {
+            return Ok(self.clone());
+        }
+
+        first_mapping.fill(-1);
+        second_mapping.fill(-1);
+
+        let mut values = Vec::new();
+        let mut count = 0;
+        for (i, entry) in self.iter().enumerate() {
+            if let Some(j) = other.position(entry) {
+                values.extend_from_slice(entry);
+
+                if !first_mapping.is_empty() {
+                    first_mapping[i] = count as i64;
+                }
+
+                if !second_mapping.is_empty() {
+                    second_mapping[j] = count as i64;
+                }
+
+                count += 1;
+            }
+        }
+
+        return Ok(self.with_values(values));
+    }
+
+    /// Get the difference of `self` and `other`, containing all the entries
+    /// of `self` which are not in `other`, in the same order as in `self`.
+    ///
+    /// If it is not empty, `first_mapping` is filled with the position in the
+    /// difference of each entry of `self`, or -1 if the entry is not in the
+    /// difference.
+    #[allow(clippy::cast_possible_wrap)]
+    pub fn difference(&self, other: &Labels, first_mapping: &mut [i64]) -> Result<Labels, Error> {
+        self.check_set_operation(other, "difference", first_mapping, &[])?;
+
+        let size = self.size();
+        if size == 0 {
+            return Ok(self.clone());
+        }
+
+        let mut values = Vec::new();
+        let mut count = 0;
+        for (i, entry) in self.iter().enumerate() {
+            let position = if other.contains(entry) {
+                -1
+            } else {
+                values.extend_from_slice(entry);
+                count += 1;
+                count - 1
+            };
+
+            if !first_mapping.is_empty() {
+                first_mapping[i] = position;
+            }
+        }
+
+        return Ok(self.with_values(values));
+    }
+
+    /// Check that `self` and `other` have the same names, and that the
+    /// mappings have the right size for the given `operation`.
+    fn check_set_operation(&self, other: &Labels, operation: &str, first_mapping: &[i64], second_mapping: &[i64]) -> Result<(), Error> {
+        if self.names != other.names {
+            return Err(Error::InvalidParameter(format!(
+                "can not take the {} of these Labels, they have different names: [{}] and [{}]",
+                operation, self.names().join(", "), other.names().join(", ")
+            )));
+        }
+
+        if !first_mapping.is_empty() && first_mapping.len() != self.count() {
+            return Err(Error::InvalidParameter(format!(
+                "expected the first mapping for the {} to have {} elements, got {}",
+                operation, self.count(), first_mapping.len()
+            )));
+        }
+
+        if !second_mapping.is_empty() && second_mapping.len() != other.count() {
+            return Err(Error::InvalidParameter(format!(
+                "expected the second mapping for the {} to have {} elements, got {}",
+                operation, other.count(), second_mapping.len()
+            )));
+        }
+
+        return Ok(());
+    }
+
+    /// Create new `Labels` with the same names as `self` and the given
+    /// `values`, which must contain unique entries.
+    fn with_values(&self, values: Vec<LabelValue>) -> Labels {
+        return Labels {
+            names: self.names.clone(),
+            values: values,
+            positions: OnceCell::new(),
+        };
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::LabelsBuilder;
+    use super::*;
+
+    fn labels(values: &[[i32; 2]]) -> Labels {
+        let mut builder = LabelsBuilder::new(vec!["foo", "bar"]);
+        for entry in values {
+            builder.add(entry).unwrap();
+        }
+        return builder.finish();
+    }
+
+    fn entries(labels: &Labels) -> Vec<Vec<i32>> {
+        return labels.iter().map(|entry| entry.iter().map(|v| v.i32()).collect()).collect();
+    }
+
+    #[test]
+    fn union() {
+        let first = labels(&[[0, 1], [1, 2], [0, 0]]);
+        let second = labels(&[[1, 2], [3, 4]]);
+
+        let mut first_mapping = vec![0; 3];
+        let mut second_mapping = vec![0; 2];
+        let union = first.union(&second, &mut first_mapping, &mut second_mapping).unwrap();
+
+        assert_eq!(entries(&union), [[0, 1], [1, 2], [0, 0], [3, 4]]);
+        assert_eq!(first_mapping, [0, 1, 2]);
+        assert_eq!(second_mapping, [1, 3]);
+        assert_eq!(union.position(&[LabelValue::new(3), LabelValue::new(4)]), Some(3));
+
+        let union = first.union(&second, &mut [], &mut []).unwrap();
+        assert_eq!(union.count(), 4);
+    }
+
+    #[test]
+    fn intersection() {
+        let first = labels(&[[0, 1], [1, 2], [0, 0]]);
+        let second = labels(&[[0, 0], [3, 4], [0, 1]]);
+
+        let mut first_mapping = vec![0; 3];
+        let mut second_mapping = vec![0; 3];
+        let intersection = first.intersection(&second, &mut first_mapping, &mut second_mapping).unwrap();
+
+        assert_eq!(entries(&intersection), [[0, 1], [0, 0]]);
+        assert_eq!(first_mapping, [0, -1, 1]);
+        assert_eq!(second_mapping, [1, -1, 0]);
+    }
+
+    #[test]
+    fn difference() {
+        let first = labels(&[[0, 1], [1, 2], [0, 0]]);
+        let second = labels(&[[0, 0], [3, 4]]);
+
+        let mut first_mapping = vec![0; 3];
+        let difference = first.difference(&second, &mut first_mapping).unwrap();
+
+        assert_eq!(entries(&difference), [[0, 1], [1, 2]]);
+        assert_eq!(first_mapping, [0, 1, -1]);
+    }
+
+    #[test]
+    fn errors() {
+        let first = labels(&[[0, 1]]);
+        let mut builder = LabelsBuilder::new(vec!["foo"]);
+        builder.add(&[0]).unwrap();
+        let second = builder.finish();
+
+        let error = first.union(&second, &mut [], &mut []).unwrap_err();
+        assert_eq!(
+            error.to_string(),
+            "invalid parameter: can not take the union of these Labels, they have different names: [foo, bar] and [foo]"
+        );
+
+        let error = first.intersection(&first, &mut [0; 3], &mut []).unwrap_err();
+        assert_eq!(
+            error.to_string(),
+            "invalid parameter: expected the first mapping for the intersection to have 1 elements, got 3"
+        );
+    }
+}
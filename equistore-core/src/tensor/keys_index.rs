@@ -0,0 +1,37 @@
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+
+use crate::{Labels, LabelValue};
+
+/// Index from the values taken by a subset of the keys dimensions to the
+/// position of all the blocks with these values
+type SubsetIndex = HashMap<Vec<LabelValue>, Vec<usize>>;
+
+/// Indexes used to select blocks with a subset of the dimensions of the keys.
+///
+/// There is one index for each set of dimensions used in a selection, created
+/// the first time this set of dimensions is used. Selections using all the
+/// dimensions of the keys do not need an additional index, and directly use
+/// the positions of the keys.
+#[derive(Debug, Default)]
+pub(super) struct KeysIndexes {
+    subsets: Mutex<HashMap<Vec<usize>, Arc<SubsetIndex>>>,
+}
+
+impl KeysIndexes {
+    /// Get the index corresponding to the given `dimensions` of the `keys`,
+    /// creating it if needed
+    pub fn subset(&self, keys: &Labels, dimensions: &[usize]) -> Arc<SubsetIndex> {
+        let mut subsets = self.subsets.lock().expect("mutex was poisoned");
+        let index = subsets.entry(dimensions.to_vec()).or_insert_with(|| {
+            let mut index = SubsetIndex::new();
+            for (block_i, key) in keys.iter().enumerate() {
+                let values = dimensions.iter().map(|&i| key[i]).collect();
+                index.entry(values).or_insert_with(Vec::new).push(block_i);
+            }
+            Arc::new(index)
+        });
+
+        return Arc::clone(index);
+    }
+}
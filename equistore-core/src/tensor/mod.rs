@@ -2,10 +2,13 @@ use std::collections::HashMap;
 use std::sync::Arc;
 
 use crate::{TensorBlock, BasicBlock};
-use crate::{Labels, Error};
+use crate::{Labels, LabelValue, Error};
+use crate::labels::LabelsInterner;
 use crate::get_data_origin;
 
 mod utils;
+mod keys_index;
+use self::keys_index::KeysIndexes;
 
 mod keys_to_samples;
 mod keys_to_properties;
@@ -24,13 +27,15 @@ mod keys_to_properties;
 pub struct TensorMap {
     keys: Arc<Labels>,
     blocks: Vec<TensorBlock>,
+    /// indexes used to select blocks with a subset of the keys dimensions
+    indexes: KeysIndexes,
     // TODO: arbitrary tensor-level metadata? e.g. using `HashMap<String, String>`
 }
 
 fn check_labels_names(
     block: &BasicBlock,
-    sample_names: &[&str],
-    components_names: &[Vec<&str>],
+    sample_names: &[String],
+    components_names: &[Vec<String>],
     context: &str,
 ) -> Result<(), Error> {
     if block.samples.names() != sample_names {
@@ -66,6 +71,90 @@ fn check_labels_names(
     Ok(())
 }
 
+fn owned_names(labels: &Labels) -> Vec<String> {
+    labels.names().into_iter().map(String::from).collect()
+}
+
+/// Names of all the labels in a block and its gradients. This is used to check
+/// that all the blocks in a tensor map contain the same kind of data, without
+/// having to keep the first block around.
+pub(crate) struct BlockStructure {
+    samples: Vec<String>,
+    components: Vec<Vec<String>>,
+    properties: Vec<String>,
+    /// sample and components names for each gradient
+    gradients: HashMap<String, (Vec<String>, Vec<Vec<String>>)>,
+}
+
+impl BlockStructure {
+    /// Get the structure of the given `block`
+    pub(crate) fn new(block: &TensorBlock) -> BlockStructure {
+        let values = block.values();
+        let gradients = block.gradients().iter()
+            .map(|(name, gradient)| {
+                let components = gradient.components.iter().map(|c| owned_names(c)).collect();
+                (name.clone(), (owned_names(&gradient.samples), components))
+            })
+            .collect();
+
+        BlockStructure {
+            samples: owned_names(&values.samples),
+            components: values.components.iter().map(|c| owned_names(c)).collect(),
+            properties: owned_names(&values.properties),
+            gradients: gradients,
+        }
+    }
+
+    /// Check that the given `block` has the same structure (labels names and
+    /// set of gradients) as this one
+    pub(crate) fn check(&self, block: &TensorBlock) -> Result<(), Error> {
+        check_labels_names(block.values(), &self.samples, &self.components, "")?;
+
+        if block.values().properties.names() != self.properties {
+            return Err(Error::InvalidParameter(format!(
+                "all blocks must have the same property label names, got [{}] and [{}]",
+                block.values().properties.names().join(", "),
+                self.properties.join(", "),
+            )));
+        }
+
+        if block.gradients().len() != self.gradients.len() {
+            return Err(Error::InvalidParameter(
+                "all blocks must contains the same set of gradients".into(),
+            ));
+        }
+
+        for (parameter, gradient) in block.gradients() {
+            match self.gradients.get(&**parameter) {
+                None => {
+                    return Err(Error::InvalidParameter(format!(
+                        "missing gradient with respect to {} in one of the blocks",
+                        parameter
+                    )));
+                },
+                Some((sample_names, components_names)) => {
+                    check_labels_names(
+                        gradient,
+                        sample_names,
+                        components_names,
+                        &format!(" for gradients with respect to {}", parameter),
+                    )?;
+                }
+            }
+        }
+
+        Ok(())
+    }
+}
+
+/// Share identical components and properties labels between all the `blocks`
+fn intern_labels(blocks: &mut [TensorBlock]) {
+    let mut interner = LabelsInterner::default();
+    for block in blocks {
+        block.intern_labels(&mut interner);
+    }
+}
+
 fn check_origin(blocks: &Vec<TensorBlock>) -> Result<(), Error> {
 
     if blocks.is_empty() {
@@ -92,8 +181,11 @@ impl TensorMap {
     /// The number of keys must match the number of blocks, and all the blocks
     /// must contain the same kind of data (same labels names, same gradients
     /// defined on all blocks).
+    ///
+    /// Identical components and properties labels are shared between all the
+    /// blocks and gradients, and only stored once.
     #[allow(clippy::similar_names)]
-    pub fn new(keys: Labels, blocks: Vec<TensorBlock>) -> Result<TensorMap, Error> {
+    pub fn new(keys: Labels, mut blocks: Vec<TensorBlock>) -> Result<TensorMap, Error> {
         if blocks.len() != keys.count() {
             return Err(Error::InvalidParameter(format!(
                 "expected the same number of blocks as the number of \
@@ -107,63 +199,18 @@ impl TensorMap {
         if !blocks.is_empty() {
             // make sure all blocks have the same kind of samples, components &
             // properties labels
-            let sample_names = blocks[0].values().samples.names();
-            let components_names = blocks[0].values().components.iter()
-                .map(|c| c.names())
-                .collect::<Vec<_>>();
-            let properties_names = blocks[0].values().properties.names();
-
-            let gradients_data = blocks[0].gradients().iter()
-                .map(|(name, gradient)| {
-                    let components_names = gradient.components.iter()
-                        .map(|c| c.names())
-                        .collect::<Vec<_>>();
-                    (&**name, (gradient.samples.names(), components_names))
-                })
-                .collect::<HashMap<_, _>>();
-
-
+            let structure = BlockStructure::new(&blocks[0]);
             for block in &blocks {
-                check_labels_names(block.values(), &sample_names, &components_names, "")?;
-
-                if block.values().properties.names() != properties_names {
-                    return Err(Error::InvalidParameter(format!(
-                        "all blocks must have the same property label names, got [{}] and [{}]",
-                        block.values().properties.names().join(", "),
-                        properties_names.join(", "),
-                    )));
-                }
-
-                if block.gradients().len() != gradients_data.len() {
-                    return Err(Error::InvalidParameter(
-                        "all blocks must contains the same set of gradients".into(),
-                    ));
-                }
-
-                for (parameter, gradient) in block.gradients() {
-                    match gradients_data.get(&**parameter) {
-                        None => {
-                            return Err(Error::InvalidParameter(format!(
-                                "missing gradient with respect to {} in one of the blocks",
-                                parameter
-                            )));
-                        },
-                        Some((sample_names, components_names)) => {
-                            check_labels_names(
-                                gradient,
-                                sample_names,
-                                components_names,
-                                &format!(" for gradients with respect to {}", parameter),
-                            )?;
-                        }
-                    }
-                }
+                structure.check(block)?;
             }
         }
 
+        intern_labels(&mut blocks);
+
         Ok(TensorMap {
             keys: Arc::new(keys),
             blocks,
+            indexes: KeysIndexes::default(),
         })
     }
 
@@ -177,7 +224,8 @@ impl TensorMap {
 
         return Ok(TensorMap {
             keys: Arc::clone(&self.keys),
-            blocks
+            blocks,
+            indexes: KeysIndexes::default(),
         });
     }
 
@@ -201,6 +249,10 @@ impl TensorMap {
     /// The selection must contains a single entry, defining the requested key
     /// or keys. If the selection contains only a subset of the dimensions of the
     /// keys, there can be multiple matching blocks.
+    ///
+    /// Selections using all the dimensions of the keys are resolved with the
+    /// positions of the keys, and selections using a subset of the dimensions
+    /// use an index created the first time this subset is used.
     pub fn blocks_matching(&self, selection: &Labels) -> Result<Vec<usize>, Error> {
         if selection.size() == 0 {
             return Ok((0..self.blocks().len()).collect());
@@ -213,6 +265,44 @@ impl TensorMap {
             )));
         }
 
+        let dimensions = self.keys_dimensions(selection)?;
+        let selection = selection.iter().next().expect("empty selection");
+
+        if dimensions.len() == self.keys.size() {
+            let mut key = vec![LabelValue::new(0); self.keys.size()];
+            return Ok(self.key_position(&dimensions, selection, &mut key).into_iter().collect());
+        }
+
+        let index = self.indexes.subset(&self.keys, &dimensions);
+        return Ok(index.get(selection).cloned().unwrap_or_default());
+    }
+
+    /// Get the index of the block corresponding to each entry in `selection`,
+    /// or `None` if there is no block for this entry.
+    ///
+    /// The selection must contain all the dimensions of the keys, potentially
+    /// in a different order.
+    pub fn blocks_matching_keys(&self, selection: &Labels) -> Result<Vec<Option<usize>>, Error> {
+        let dimensions = self.keys_dimensions(selection)?;
+        if dimensions.len() != self.keys.size() {
+            return Err(Error::InvalidParameter(format!(
+                "block selection labels must contain all the dimensions of the keys \
+                ([{}]), got [{}]",
+                self.keys.names().join(", "),
+                selection.names().join(", ")
+            )));
+        }
+
+        let mut key = vec![LabelValue::new(0); self.keys.size()];
+        let result = selection.iter()
+            .map(|entry| self.key_position(&dimensions, entry, &mut key))
+            .collect();
+
+        return Ok(result);
+    }
+
+    /// Get the position of each dimension of `selection` in the keys
+    fn keys_dimensions(&self, selection: &Labels) -> Result<Vec<usize>, Error> {
         let mut dimensions = Vec::new();
         'outer: for requested in selection.names() {
             for (i, &name) in self.keys.names().iter().enumerate() {
@@ -228,24 +318,18 @@ impl TensorMap {
             )));
         }
 
-        let mut matching = Vec::new();
-        let selection = selection.iter().next().expect("empty selection");
-
-        for (block_i, labels) in self.keys.iter().enumerate() {
-            let mut selected = true;
-            for (&requested_i, &value) in dimensions.iter().zip(selection) {
-                if labels[requested_i] != value {
-                    selected = false;
-                    break;
-                }
-            }
+        return Ok(dimensions);
+    }
 
-            if selected {
-                matching.push(block_i);
-            }
+    /// Get the position in the keys of the `entry` containing values for all
+    /// the keys `dimensions`. `key` is used as scratch space to re-order the
+    /// values in the same order as the keys.
+    fn key_position(&self, dimensions: &[usize], entry: &[LabelValue], key: &mut [LabelValue]) -> Option<usize> {
+        for (&i, &value) in dimensions.iter().zip(entry) {
+            key[i] = value;
         }
 
-        return Ok(matching);
+        return self.keys.position(key);
     }
 
     /// Move the given dimensions from the component labels to the property labels
@@ -260,6 +344,7 @@ impl TensorMap {
         for block in &mut clone.blocks {
             block.components_to_properties(dimensions)?;
         }
+        intern_labels(&mut clone.blocks);
 
         return Ok(clone);
     }
@@ -427,6 +512,17 @@ mod tests {
             [2]
         );
 
+        let mut selection = LabelsBuilder::new(vec!["key_2", "key_1"]);
+        selection.add(&[3, 4]).unwrap();
+        assert_eq!(
+            tensor.blocks_matching(&selection.finish()).unwrap(),
+            [5]
+        );
+
+        let mut selection = LabelsBuilder::new(vec!["key_1", "key_2"]);
+        selection.add(&[2, 2]).unwrap();
+        assert!(tensor.blocks_matching(&selection.finish()).unwrap().is_empty());
+
         let mut selection = LabelsBuilder::new(vec!["key_1"]);
         selection.add(&[1]).unwrap();
         assert_eq!(
@@ -434,6 +530,18 @@ mod tests {
             [2, 3]
         );
 
+        // the same index is re-used for the second selection
+        let mut selection = LabelsBuilder::new(vec!["key_1"]);
+        selection.add(&[0]).unwrap();
+        assert_eq!(
+            tensor.blocks_matching(&selection.finish()).unwrap(),
+            [0, 1]
+        );
+
+        let mut selection = LabelsBuilder::new(vec!["key_2"]);
+        selection.add(&[5]).unwrap();
+        assert!(tensor.blocks_matching(&selection.finish()).unwrap().is_empty());
+
         let selection = LabelsBuilder::new(vec!["key_1"]);
         let result = tensor.blocks_matching(&selection.finish());
         assert_eq!(
@@ -458,4 +566,75 @@ mod tests {
             "invalid parameter: 'key_3' is not part of the keys for this tensor"
         );
     }
+
+    #[test]
+    fn blocks_matching_keys() {
+        let mut blocks = Vec::new();
+        for _ in 0..4 {
+            blocks.push(TensorBlock::new(
+                TestArray::new(vec![1, 1]),
+                example_labels(vec!["samples"], vec![[0]]),
+                vec![],
+                example_labels(vec!["properties"], vec![[0]]),
+            ).unwrap());
+        }
+
+        let keys = example_labels(vec!["key_1", "key_2"], vec![
+            [0, 1], [0, 2], [1, 1], [3, 0],
+        ]);
+        let tensor = TensorMap::new((*keys).clone(), blocks).unwrap();
+
+        let selection = example_labels(vec!["key_1", "key_2"], vec![[3, 0], [0, 1], [4, 4]]);
+        assert_eq!(
+            tensor.blocks_matching_keys(&selection).unwrap(),
+            [Some(3), Some(0), None]
+        );
+
+        let selection = example_labels(vec!["key_2", "key_1"], vec![[1, 1], [0, 1]]);
+        assert_eq!(
+            tensor.blocks_matching_keys(&selection).unwrap(),
+            [Some(2), None]
+        );
+
+        let selection = example_labels(vec!["key_1"], vec![[0]]);
+        let result = tensor.blocks_matching_keys(&selection);
+        assert_eq!(
+            result.unwrap_err().to_string(),
+            "invalid parameter: block selection labels must contain all the \
+            dimensions of the keys ([key_1, key_2]), got [key_1]"
+        );
+    }
+
+    #[test]
+    fn labels_interning() {
+        let mut blocks = Vec::new();
+        for i in 0..3 {
+            let properties = if i == 0 { vec![[0], [2]] } else { vec![[0], [1]] };
+            blocks.push(TensorBlock::new(
+                TestArray::new(vec![1, 3, 2]),
+                example_labels(vec!["samples"], vec![[i]]),
+                vec![example_labels(vec!["components"], vec![[0], [1], [2]])],
+                example_labels(vec!["properties"], properties),
+            ).unwrap());
+        }
+
+        let keys = example_labels(vec!["keys"], vec![[0], [1], [2]]);
+        let tensor = TensorMap::new((*keys).clone(), blocks).unwrap();
+        let blocks = tensor.blocks();
+
+        // identical components are shared
+        assert!(Arc::ptr_eq(&blocks[0].values().components[0], &blocks[1].values().components[0]));
+        assert!(Arc::ptr_eq(&blocks[0].values().components[0], &blocks[2].values().components[0]));
+
+        // as well as identical properties
+        assert!(Arc::ptr_eq(&blocks[1].values().properties, &blocks[2].values().properties));
+        assert!(!Arc::ptr_eq(&blocks[0].values().properties, &blocks[1].values().properties));
+
+        // new properties are also shared
+        let tensor = tensor.components_to_properties(&["components"]).unwrap();
+        let blocks = tensor.blocks();
+        assert!(blocks[0].values().components.is_empty());
+        assert!(Arc::ptr_eq(&blocks[1].values().properties, &blocks[2].values().properties));
+        assert!(!Arc::ptr_eq(&blocks[0].values().properties, &blocks[1].values().properties));
+    }
 }
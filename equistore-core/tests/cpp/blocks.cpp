@@ -127,4 +127,47 @@ TEST_CASE("Blocks") {
 
         CHECK_THROWS_WITH(block.clone(), "external error: calling eqs_array_t.create failed (status -1)");
     }
+
+    SECTION("reduce over samples") {
+        auto block = TensorBlock(
+            std::unique_ptr<SimpleDataArray>(new SimpleDataArray({4, 1}, {1, 2, 3, 4})),
+            Labels({"structure", "atom"}, {{0, 0}, {0, 1}, {1, 0}, {0, 2}}),
+            {},
+            Labels({"properties"}, {{0}})
+        );
+
+        block.add_gradient(
+            "parameter",
+            std::unique_ptr<SimpleDataArray>(new SimpleDataArray({3, 1}, {1, 2, 3})),
+            Labels({"sample", "parameter"}, {{0, 0}, {1, 0}, {2, 1}}),
+            {}
+        );
+
+        auto reduced = block.reduce_over_samples({"atom"}, "sum");
+        CHECK(reduced.samples() == Labels({"structure"}, {{0}, {1}}));
+        auto values = reduced.values();
+        CHECK(values.shape() == std::vector<size_t>{2, 1});
+        CHECK(values(0, 0) == 7);
+        CHECK(values(1, 0) == 3);
+
+        auto gradient = reduced.gradient("parameter");
+        CHECK(gradient.samples() == Labels({"sample", "parameter"}, {{0, 0}, {1, 1}}));
+        auto data = gradient.data();
+        CHECK(data(0, 0) == 3);
+        CHECK(data(1, 0) == 3);
+
+        reduced = block.reduce_over_samples({"structure", "atom"}, "mean");
+        CHECK(reduced.samples() == Labels({"_"}, {{0}}));
+        CHECK(reduced.values()(0, 0) == 2.5);
+
+        CHECK_THROWS_WITH(
+            block.reduce_over_samples({"atom"}, "median"),
+            "invalid parameter: unknown reduction 'median', expected one of 'sum', 'mean', 'var' or 'std'"
+        );
+
+        CHECK_THROWS_WITH(
+            block.reduce_over_samples({"not there"}, "sum"),
+            "invalid parameter: 'not there' is not part of the samples of this block, expected one of [structure, atom]"
+        );
+    }
 }
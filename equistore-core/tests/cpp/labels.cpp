@@ -17,6 +17,10 @@ TEST_CASE("Labels") {
     CHECK(labels.position({3, 4}) == 1);
     CHECK(labels.position({1, 4}) == -1);
 
+    auto entries = std::vector<int32_t>{5, 6, 1, 4, 1, 2};
+    auto positions = labels.positions(NDArray<int32_t>(entries.data(), {3, 2}));
+    CHECK(positions == std::vector<int64_t>{2, -1, 0});
+
     CHECK(labels(0, 0) == 1);
     CHECK(labels(0, 1) == 2);
 
@@ -35,6 +39,11 @@ TEST_CASE("Labels") {
         "invalid parameter: expected label of size 2 in eqs_labels_position, got size 3"
     );
 
+    CHECK_THROWS_WITH(
+        labels.positions(NDArray<int32_t>(entries.data(), {2, 3})),
+        "expected a 2D array with 2 columns in Labels::positions"
+    );
+
     CHECK_THROWS_WITH(Labels({"foo"}, {{1}, {3, 4}}), "invalid size for row: expected 1 got 2");
 
     CHECK_THROWS_WITH(
@@ -42,3 +51,52 @@ TEST_CASE("Labels") {
         "invalid parameter: 'not an ident' is not a valid label name"
     );
 }
+
+TEST_CASE("Set operations") {
+    auto first = Labels({"foo", "bar"}, {{1, 2}, {3, 4}, {5, 6}});
+    auto second = Labels({"foo", "bar"}, {{5, 6}, {7, 8}});
+
+    SECTION("union") {
+        auto first_mapping = std::vector<int64_t>();
+        auto second_mapping = std::vector<int64_t>();
+        auto union_ = first.set_union(second, first_mapping, second_mapping);
+
+        CHECK(union_ == Labels({"foo", "bar"}, {{1, 2}, {3, 4}, {5, 6}, {7, 8}}));
+        CHECK(first_mapping == std::vector<int64_t>{0, 1, 2});
+        CHECK(second_mapping == std::vector<int64_t>{2, 3});
+
+        CHECK(first.set_union(second).count() == 4);
+    }
+
+    SECTION("intersection") {
+        auto first_mapping = std::vector<int64_t>();
+        auto second_mapping = std::vector<int64_t>();
+        auto intersection = first.set_intersection(second, first_mapping, second_mapping);
+
+        CHECK(intersection == Labels({"foo", "bar"}, {{5, 6}}));
+        CHECK(first_mapping == std::vector<int64_t>{-1, -1, 0});
+        CHECK(second_mapping == std::vector<int64_t>{0, -1});
+    }
+
+    SECTION("difference") {
+        auto first_mapping = std::vector<int64_t>();
+        auto difference = first.set_difference(second, first_mapping);
+
+        CHECK(difference == Labels({"foo", "bar"}, {{1, 2}, {3, 4}}));
+        CHECK(first_mapping == std::vector<int64_t>{0, 1, -1});
+    }
+
+    SECTION("errors") {
+        auto other = Labels({"bar", "foo"}, {{1, 2}});
+        CHECK_THROWS_WITH(
+            first.set_union(other),
+            "invalid parameter: can not take the union of these Labels, they have different names: [foo, bar] and [bar, foo]"
+        );
+
+        auto mapping = std::vector<int64_t>(2);
+        CHECK_THROWS_WITH(
+            first.set_difference(second, mapping.data(), mapping.size()),
+            "invalid parameter: `first_mapping` should have space for 3 values, got 2"
+        );
+    }
+}
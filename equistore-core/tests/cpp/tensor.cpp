@@ -1,3 +1,6 @@
+#include <fstream>
+#include <iterator>
+
 #include <catch.hpp>
 
 #include <equistore.hpp>
@@ -30,6 +33,11 @@ TEST_CASE("TensorMap") {
         CHECK(matching.size() == 2);
         CHECK(matching[0] == 0);
         CHECK(matching[1] == 1);
+
+        // multiple blocks at once
+        selection = Labels({"key_2", "key_1"}, {{3, 2}, {1, 1}, {0, 0}});
+        auto blocks = tensor.blocks_matching_keys(selection);
+        CHECK(blocks == std::vector<int64_t>{3, -1, 0});
     }
 
     SECTION("keys_to_samples") {
@@ -228,6 +236,149 @@ TEST_CASE("TensorMap serialization") {
 
         CHECK(gradient.data().shape() == std::vector<size_t>{59, 3, 5, 3});
     }
+
+    SECTION("loading file with mmap") {
+        auto tensor = TensorMap::load(DATA_NPZ);
+        auto mapped = TensorMap::load_mmap(DATA_NPZ);
+
+        CHECK(mapped.keys() == tensor.keys());
+
+        auto block = tensor.block_by_id(21);
+        auto mapped_block = mapped.block_by_id(21);
+        CHECK(mapped_block.samples() == block.samples());
+
+        auto values = block.values();
+        auto mapped_values = mapped_block.values();
+        CHECK(mapped_values.shape() == values.shape());
+        CHECK(mapped_values(3, 2, 1) == values(3, 2, 1));
+
+        auto gradient = block.gradient("positions").data();
+        auto mapped_gradient = mapped_block.gradient("positions").data();
+        CHECK(mapped_gradient.shape() == gradient.shape());
+        CHECK(mapped_gradient(42, 1, 2, 0) == gradient(42, 1, 2, 0));
+
+        // modifications of the mapped data are not written back to the file
+        mapped_values(3, 2, 1) = 42.0;
+        CHECK(mapped_block.values()(3, 2, 1) == 42.0);
+
+        auto mapped_again = TensorMap::load_mmap(DATA_NPZ);
+        CHECK(mapped_again.block_by_id(21).values()(3, 2, 1) == values(3, 2, 1));
+    }
+
+    SECTION("multiple threads") {
+        auto tensor = TensorMap::load(DATA_NPZ);
+        auto parallel = TensorMap::load(DATA_NPZ, 4);
+
+        CHECK(parallel.keys() == tensor.keys());
+
+        auto block = tensor.block_by_id(21);
+        auto parallel_block = parallel.block_by_id(21);
+        CHECK(parallel_block.samples() == block.samples());
+        CHECK(parallel_block.values()(3, 2, 1) == block.values()(3, 2, 1));
+
+        auto gradient = block.gradient("positions");
+        auto parallel_gradient = parallel_block.gradient("positions");
+        CHECK(parallel_gradient.samples() == gradient.samples());
+        CHECK(parallel_gradient.data()(42, 1, 2, 0) == gradient.data()(42, 1, 2, 0));
+
+        // the file is the same regardless of the number of threads
+        TensorMap::save("serial.npz", tensor);
+        TensorMap::save("parallel.npz", tensor, 4);
+
+        auto read_file = [](const char* path) {
+            auto file = std::ifstream(path, std::ios::binary);
+            return std::string(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+        };
+        CHECK(read_file("serial.npz") == read_file("parallel.npz"));
+    }
+
+    SECTION("compression and data type") {
+        auto tensor = TensorMap::load(DATA_NPZ);
+
+        TensorMap::save_with_options("compressed.npz", tensor, true);
+        auto compressed = TensorMap::load("compressed.npz");
+        CHECK(compressed.keys() == tensor.keys());
+
+        auto block = tensor.block_by_id(21);
+        auto compressed_block = compressed.block_by_id(21);
+        CHECK(compressed_block.values()(3, 2, 1) == block.values()(3, 2, 1));
+
+        TensorMap::save_with_options("float32.npz", tensor, false, "float32");
+        auto float32 = TensorMap::load("float32.npz");
+        auto float32_block = float32.block_by_id(21);
+        auto value = block.values()(3, 2, 1);
+        CHECK(float32_block.values()(3, 2, 1) == static_cast<double>(static_cast<float>(value)));
+
+        CHECK_THROWS_WITH(
+            TensorMap::save_with_options("error.npz", tensor, false, "float128"),
+            "invalid parameter: unknown storage type 'float128', expected one of 'float64', 'float32' or 'float16'"
+        );
+    }
+
+    SECTION("writer") {
+        auto tensor = TensorMap::load(DATA_NPZ);
+        TensorMap::save("save.npz", tensor);
+
+        auto keys = tensor.keys();
+        auto names = std::vector<std::string>(keys.names().begin(), keys.names().end());
+        auto writer = TensorMapWriter("writer.npz", names);
+        for (size_t i=0; i<keys.count(); i++) {
+            auto key = std::vector<int32_t>();
+            for (size_t j=0; j<keys.size(); j++) {
+                key.push_back(keys(i, j));
+            }
+            writer.add(key, tensor.block_by_id(i));
+        }
+        writer.finish();
+
+        auto read_file = [](const char* path) {
+            auto file = std::ifstream(path, std::ios::binary);
+            return std::string(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+        };
+        CHECK(read_file("save.npz") == read_file("writer.npz"));
+
+        CHECK_THROWS_WITH(
+            writer.add({0, 0, 0}, tensor.block_by_id(0)),
+            "invalid parameter: can not add blocks to a writer after calling eqs_tensormap_writer_finish"
+        );
+    }
+
+    SECTION("selected loading") {
+        auto keys = Labels({"spherical_harmonics_l"}, {{2}});
+        auto samples = Labels({"structure"}, {{0}, {2}});
+        auto tensor = TensorMap::load_selected(DATA_NPZ, &keys, &samples);
+
+        CHECK(tensor.keys().count() == 9);
+        for (size_t i=0; i<tensor.keys().count(); i++) {
+            CHECK(tensor.keys()(i, 0) == 2);
+
+            auto block = tensor.block_by_id(i);
+            auto block_samples = block.samples();
+            for (size_t j=0; j<block_samples.count(); j++) {
+                auto structure = block_samples(j, 0);
+                CHECK((structure == 0 || structure == 2));
+            }
+        }
+
+        CHECK_THROWS_WITH(
+            TensorMap::load_selected(DATA_NPZ, nullptr, &keys),
+            "invalid parameter: 'spherical_harmonics_l' is not part of the samples of this tensor"
+        );
+    }
+
+    SECTION("buffer") {
+        auto tensor = TensorMap::load(DATA_NPZ);
+        TensorMap::save("save.npz", tensor);
+
+        auto buffer = TensorMap::save_buffer(tensor);
+        auto file = std::ifstream("save.npz", std::ios::binary);
+        auto content = std::vector<uint8_t>(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+        CHECK(buffer == content);
+
+        auto loaded = TensorMap::load_buffer(buffer);
+        CHECK(loaded.keys() == tensor.keys());
+        CHECK(loaded.block_by_id(0).values() == tensor.block_by_id(0).values());
+    }
 }
 
 
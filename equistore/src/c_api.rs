@@ -24,9 +24,14 @@ pub struct eqs_block_t {
 pub struct eqs_tensormap_t {
     _unused: [u8; 0],
 }
+#[repr(C)]
+#[derive(Debug, Copy, Clone)]
+pub struct eqs_tensormap_writer_t {
+    _unused: [u8; 0],
+}
 #[doc = " Status type returned by all functions in the C API.\n\n The value 0 (`EQS_SUCCESS`) is used to indicate successful operations,\n positive values are used by this library to indicate errors, while negative\n values are reserved for users of this library to indicate their own errors\n in callbacks."]
 pub type eqs_status_t = i32;
-#[doc = " A set of labels used to carry metadata associated with a tensor map.\n\n This is similar to a list of `count` named tuples, but stored as a 2D array\n of shape `(count, size)`, with a set of names associated with the columns of\n this array (often called *dimensions*). Each row/entry in this array is\n unique, and they are often (but not always) sorted in lexicographic order.\n\n `eqs_labels_t` with a non-NULL `internal_ptr_` correspond to a\n reference-counted Rust data structure, which allow for fast lookup inside\n the labels with `eqs_labels_positions`."]
+#[doc = " A set of labels used to carry metadata associated with a tensor map.\n\n This is similar to a list of `count` named tuples, but stored as a 2D array\n of shape `(count, size)`, with a set of names associated with the columns of\n this array (often called *dimensions*). Each row/entry in this array is\n unique, and they are often (but not always) sorted in lexicographic order.\n\n `eqs_labels_t` with a non-NULL `internal_ptr_` correspond to a\n reference-counted Rust data structure, which allow for fast lookup inside\n the labels with `eqs_labels_positions`. These labels are shared (by\n increasing the reference count) instead of being copied when they are\n used to create blocks or tensor maps."]
 #[repr(C)]
 #[derive(Debug, Copy, Clone)]
 pub struct eqs_labels_t {
@@ -214,7 +219,7 @@ pub struct eqs_array_t {
     >,
     #[doc = " Remove this array and free the associated memory. This function can be\n set to `NULL` is there is no memory management to do."]
     pub destroy: ::std::option::Option<unsafe extern "C" fn(array: *mut ::std::os::raw::c_void)>,
-    #[doc = " Set entries in the `output` array (the current array) taking data from\n the `input` array. The `output` array is guaranteed to be created by\n calling `eqs_array_t::create` with one of the arrays in the same block\n or tensor map as the `input`.\n\n The `samples` array of size `samples_count` indicate where the data\n should be moved from `input` to `output`.\n\n This function should copy data from `input[samples[i].input, ..., :]` to\n `array[samples[i].output, ..., property_start:property_end]` for `i` up\n to `samples_count`. All indexes are 0-based."]
+    #[doc = " Set entries in the `output` array (the current array) taking data from\n the `input` array. The `output` array is guaranteed to be created by\n calling `eqs_array_t::create` with one of the arrays in the same block\n or tensor map as the `input`.\n\n The `samples` array of size `samples_count` indicate where the data\n should be moved from `input` to `output`.\n\n This function should copy data from `input[samples[i].input, ..., :]` to\n `array[samples[i].output, ..., property_start:property_end]` for `i` up\n to `samples_count`. All indexes are 0-based.\n\n If both `input` and `output` use `eqs_cpu_buffer_data` for\n `eqs_array_t.data` and the corresponding buffers give access to the\n data, equistore copies the data directly and this function is not\n called."]
     pub move_samples_from: ::std::option::Option<
         unsafe extern "C" fn(
             output: *mut ::std::os::raw::c_void,
@@ -341,6 +346,74 @@ fn bindgen_test_layout_eqs_array_t() {
         )
     );
 }
+#[doc = " Description of an array of 64-bit floating point values living in CPU\n memory owned by someone else, which allows to implement the `shape` and\n `data` functions of `eqs_array_t` without calling back into user code.\n\n To use it, `eqs_array_t.ptr` should point to an `eqs_cpu_buffer_t`, and\n `eqs_array_t.shape`/`eqs_array_t.data` should be set to\n `eqs_cpu_buffer_shape`/`eqs_cpu_buffer_data`. The other functions in\n `eqs_array_t` get the same pointer and can use `user_data` to find the\n array owning the data. Since `user_data` is the first member, a pointer to\n the `eqs_cpu_buffer_t` is also a pointer to `user_data`.\n\n The owner of the array is responsible for keeping the `eqs_cpu_buffer_t`\n and the memory it points to alive, and updating them when the array\n changes (for example in `eqs_array_t.reshape` or `eqs_array_t.swap_axes`)."]
+#[repr(C)]
+#[derive(Debug, Copy, Clone)]
+pub struct eqs_cpu_buffer_t {
+    #[doc = " User-provided data, not used by equistore"]
+    pub user_data: *mut ::std::os::raw::c_void,
+    #[doc = " Pointer to the data of the array, stored as a C-contiguous array. This\n should be `NULL` if the data is not available in this form."]
+    pub data: *mut f64,
+    #[doc = " Shape of the array"]
+    pub shape: *const usize,
+    #[doc = " Number of dimensions of the array, i.e. number of elements in `shape`"]
+    pub shape_count: usize,
+}
+#[test]
+fn bindgen_test_layout_eqs_cpu_buffer_t() {
+    const UNINIT: ::std::mem::MaybeUninit<eqs_cpu_buffer_t> = ::std::mem::MaybeUninit::uninit();
+    let ptr = UNINIT.as_ptr();
+    assert_eq!(
+        ::std::mem::size_of::<eqs_cpu_buffer_t>(),
+        32usize,
+        concat!("Size of: ", stringify!(eqs_cpu_buffer_t))
+    );
+    assert_eq!(
+        ::std::mem::align_of::<eqs_cpu_buffer_t>(),
+        8usize,
+        concat!("Alignment of ", stringify!(eqs_cpu_buffer_t))
+    );
+    assert_eq!(
+        unsafe { ::std::ptr::addr_of!((*ptr).user_data) as usize - ptr as usize },
+        0usize,
+        concat!(
+            "Offset of field: ",
+            stringify!(eqs_cpu_buffer_t),
+            "::",
+            stringify!(user_data)
+        )
+    );
+    assert_eq!(
+        unsafe { ::std::ptr::addr_of!((*ptr).data) as usize - ptr as usize },
+        8usize,
+        concat!(
+            "Offset of field: ",
+            stringify!(eqs_cpu_buffer_t),
+            "::",
+            stringify!(data)
+        )
+    );
+    assert_eq!(
+        unsafe { ::std::ptr::addr_of!((*ptr).shape) as usize - ptr as usize },
+        16usize,
+        concat!(
+            "Offset of field: ",
+            stringify!(eqs_cpu_buffer_t),
+            "::",
+            stringify!(shape)
+        )
+    );
+    assert_eq!(
+        unsafe { ::std::ptr::addr_of!((*ptr).shape_count) as usize - ptr as usize },
+        24usize,
+        concat!(
+            "Offset of field: ",
+            stringify!(eqs_cpu_buffer_t),
+            "::",
+            stringify!(shape_count)
+        )
+    );
+}
 #[doc = " Function pointer to create a new `eqs_array_t` when de-serializing tensor\n maps.\n\n This function gets the `shape` of the array (the `shape` contains\n `shape_count` elements) and should return a new valid `eqs_array_t` or a\n non-zero `eqs_status_t`.\n\n The newly created array should contains 64-bit floating points (`double`)\n data, and live on CPU, since equistore will use `eqs_array_t.data` to get\n the data pointer and write to it."]
 pub type eqs_create_array_callback_t = ::std::option::Option<
     unsafe extern "C" fn(
@@ -349,6 +422,14 @@ pub type eqs_create_array_callback_t = ::std::option::Option<
         array: *mut eqs_array_t,
     ) -> eqs_status_t,
 >;
+#[doc = " Function pointer to grow in-memory buffers for `eqs_tensormap_save_buffer`.\n\n This function takes an existing pointer in `ptr` and a new size in\n `new_size`, and should grow the allocation to (at least) `new_size` bytes,\n keeping the existing content. If `ptr` is `NULL`, it should create a new\n allocation. If it is unable to allocate memory, it should return a `NULL`\n pointer. This follows the API of the standard C function `realloc`, with an\n additional parameter `user_data` that can be used to hold custom data."]
+pub type eqs_realloc_buffer_t = ::std::option::Option<
+    unsafe extern "C" fn(
+        user_data: *mut ::std::os::raw::c_void,
+        ptr: *mut u8,
+        new_size: usize,
+    ) -> *mut u8,
+>;
 extern "C" {
     #[doc = " Disable printing of the message to stderr when some Rust code reach a panic.\n\n All panics from Rust code are caught anyway and translated to an error\n status code, and the message is stored and accessible through\n `eqs_last_error`. To print the error message and Rust backtrace anyway,\n users can set the `RUST_BACKTRACE` environment variable to 1."]
     pub fn eqs_disable_panic_printing();
@@ -365,6 +446,14 @@ extern "C" {
         result: *mut i64,
     ) -> eqs_status_t;
     #[must_use]
+    #[doc = " Get the positions of multiple entries defined by the `values` array in the\n given set of `labels`, in a single call. This operation is only available if\n the labels correspond to a set of Rust Labels (i.e. `labels.internal_ptr_`\n is not NULL).\n\n @param labels set of labels with an associated Rust data structure\n @param values 2D row-major array containing the entries to lookup. Each row\n               contains `labels.size` elements, and there are `values_count`\n               rows in total.\n @param values_count number of entries (rows) in the `values` array\n @param results array of `values_count` elements, on output will contain the\n                position of each entry in the labels or -1 if the entry was\n                not found\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_labels_positions(
+        labels: eqs_labels_t,
+        values: *const i32,
+        values_count: usize,
+        results: *mut i64,
+    ) -> eqs_status_t;
+    #[must_use]
     #[doc = " Finish the creation of `eqs_labels_t` by associating it to Rust-owned\n labels.\n\n This allows using the `eqs_labels_positions` and `eqs_labels_clone`\n functions on the `eqs_labels_t`.\n\n This function allocates memory which must be released `eqs_labels_free` when\n you don't need it anymore.\n\n @param labels new set of labels containing pointers to user-managed memory\n        on input, and pointers to Rust-managed memory on output.\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
     pub fn eqs_labels_create(labels: *mut eqs_labels_t) -> eqs_status_t;
     #[must_use]
@@ -374,6 +463,37 @@ extern "C" {
     #[doc = " Decrease the reference count of `labels`, and release the corresponding\n memory once the reference count reaches 0.\n\n @param labels set of labels with an associated Rust data structure\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
     pub fn eqs_labels_free(labels: *mut eqs_labels_t) -> eqs_status_t;
     #[must_use]
+    #[doc = " Take the union of two `eqs_labels_t`.\n\n The union contains all the entries of `first`, followed by the entries of\n `second` which are not already in `first`. If requested, this function can\n also give the positions in the union where each entry of the input\n `eqs_labels_t` ended up.\n\n This function allocates memory for `result` which must be released\n `eqs_labels_free` when you don't need it anymore.\n\n @param first first set of labels\n @param second second set of labels\n @param result empty labels, on output will contain the union of `first` and\n        `second`\n @param first_mapping if you want the mapping from the positions of entries\n        in `first` to the positions in `result`, this should be a pointer to\n        an array containing `first.count` elements, to be filled by this\n        function. Otherwise it should be a `NULL` pointer.\n @param first_mapping_count number of elements in `first_mapping`\n @param second_mapping if you want the mapping from the positions of entries\n        in `second` to the positions in `result`, this should be a pointer\n        to an array containing `second.count` elements, to be filled by this\n        function. Otherwise it should be a `NULL` pointer.\n @param second_mapping_count number of elements in `second_mapping`\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_labels_union(
+        first: eqs_labels_t,
+        second: eqs_labels_t,
+        result: *mut eqs_labels_t,
+        first_mapping: *mut i64,
+        first_mapping_count: usize,
+        second_mapping: *mut i64,
+        second_mapping_count: usize,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Take the intersection of two `eqs_labels_t`.\n\n The intersection contains all the entries of `first` which are also in\n `second`, in the same order as in `first`. If requested, this function can\n also give the positions in the intersection where each entry of the input\n `eqs_labels_t` ended up.\n\n This function allocates memory for `result` which must be released\n `eqs_labels_free` when you don't need it anymore.\n\n @param first first set of labels\n @param second second set of labels\n @param result empty labels, on output will contain the intersection of\n        `first` and `second`\n @param first_mapping if you want the mapping from the positions of entries\n        in `first` to the positions in `result`, this should be a pointer to\n        an array containing `first.count` elements, to be filled by this\n        function. Otherwise it should be a `NULL` pointer. If an entry in\n        `first` is not used in `result`, the mapping will be set to -1.\n @param first_mapping_count number of elements in `first_mapping`\n @param second_mapping if you want the mapping from the positions of entries\n        in `second` to the positions in `result`, this should be a pointer\n        to an array containing `second.count` elements, to be filled by this\n        function. Otherwise it should be a `NULL` pointer. If an entry in\n        `second` is not used in `result`, the mapping will be set to -1.\n @param second_mapping_count number of elements in `second_mapping`\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_labels_intersection(
+        first: eqs_labels_t,
+        second: eqs_labels_t,
+        result: *mut eqs_labels_t,
+        first_mapping: *mut i64,
+        first_mapping_count: usize,
+        second_mapping: *mut i64,
+        second_mapping_count: usize,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Take the difference of two `eqs_labels_t`.\n\n The difference contains all the entries of `first` which are not in\n `second`, in the same order as in `first`. If requested, this function can\n also give the positions in the difference where each entry of `first` ended\n up.\n\n This function allocates memory for `result` which must be released\n `eqs_labels_free` when you don't need it anymore.\n\n @param first first set of labels\n @param second second set of labels\n @param result empty labels, on output will contain the difference of\n        `first` and `second`\n @param first_mapping if you want the mapping from the positions of entries\n        in `first` to the positions in `result`, this should be a pointer to\n        an array containing `first.count` elements, to be filled by this\n        function. Otherwise it should be a `NULL` pointer. If an entry in\n        `first` is not used in `result`, the mapping will be set to -1.\n @param first_mapping_count number of elements in `first_mapping`\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_labels_difference(
+        first: eqs_labels_t,
+        second: eqs_labels_t,
+        result: *mut eqs_labels_t,
+        first_mapping: *mut i64,
+        first_mapping_count: usize,
+    ) -> eqs_status_t;
+    #[must_use]
     #[doc = " Register a new data origin with the given `name`. Calling this function\n multiple times with the same name will give the same `eqs_data_origin_t`.\n\n @param name name of the data origin as an UTF-8 encoded NULL-terminated string\n @param origin pointer to an `eqs_data_origin_t` where the origin will be stored\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
     pub fn eqs_register_data_origin(
         name: *const ::std::os::raw::c_char,
@@ -386,6 +506,19 @@ extern "C" {
         buffer: *mut ::std::os::raw::c_char,
         buffer_size: usize,
     ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Implementation of `eqs_array_t.shape` for arrays where `eqs_array_t.ptr`\n points to an `eqs_cpu_buffer_t`.\n\n @param array pointer to an `eqs_cpu_buffer_t`\n @param shape pointer to be filled with the shape of the array\n @param shape_count pointer to be filled with the number of dimensions\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_cpu_buffer_shape(
+        array: *const ::std::os::raw::c_void,
+        shape: *mut *const usize,
+        shape_count: *mut usize,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Implementation of `eqs_array_t.data` for arrays where `eqs_array_t.ptr`\n points to an `eqs_cpu_buffer_t`. This fails if `eqs_cpu_buffer_t.data` is\n `NULL`.\n\n @param array pointer to an `eqs_cpu_buffer_t`\n @param data pointer to be filled with the data pointer of the array\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_cpu_buffer_data(
+        array: *mut ::std::os::raw::c_void,
+        data: *mut *mut f64,
+    ) -> eqs_status_t;
     #[doc = " Create a new `eqs_block_t` with the given `data` and `samples`, `components`\n and `properties` labels.\n\n The memory allocated by this function and the blocks should be released\n using `eqs_block_free`, or moved into a tensor map using `eqs_tensormap`.\n\n @param data array handle containing the data for this block. The block takes\n             ownership of the array, and will release it with\n             `array.destroy(array.ptr)` when it no longer needs it.\n @param samples sample labels corresponding to the first dimension of the data\n @param components array of component labels corresponding to intermediary\n                   dimensions of the data\n @param components_count number of entries in the `components` array\n @param properties property labels corresponding to the last dimension of the data\n\n @returns A pointer to the newly allocated block, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
     pub fn eqs_block(
         data: eqs_array_t,
@@ -431,6 +564,13 @@ extern "C" {
         parameters: *mut *const *const ::std::os::raw::c_char,
         parameters_count: *mut usize,
     ) -> eqs_status_t;
+    #[doc = " Reduce the given `block` over the samples dimensions listed in\n `sample_names`, combining all the samples which only differ by the values\n taken by these dimensions. The gradients of the block are reduced as well.\n\n The new samples contain the remaining samples dimensions, sorted in\n lexicographic order. If all the samples dimensions are reduced over, the\n new samples contain a single `\"_\"` dimension.\n\n This function requires the `data` callback of all the arrays in the block\n to be implemented.\n\n The memory allocated by this function should be released using\n `eqs_block_free`, or moved into a tensor map using `eqs_tensormap`.\n\n @param block pointer to an existing block\n @param sample_names names of the samples dimensions to reduce over\n @param sample_names_count number of entries in `sample_names`\n @param reduction reduction to use, one of `\"sum\"`, `\"mean\"`, `\"var\"` or\n                  `\"std\"`\n\n @returns A pointer to the newly allocated block, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_block_reduce_samples(
+        block: *const eqs_block_t,
+        sample_names: *const *const ::std::os::raw::c_char,
+        sample_names_count: usize,
+        reduction: *const ::std::os::raw::c_char,
+    ) -> *mut eqs_block_t;
     #[doc = " Create a new `eqs_tensormap_t` with the given `keys` and `blocks`.\n `blocks_count` must be set to the number of entries in the blocks array.\n\n The new tensor map takes ownership of the blocks, which should not be\n released separately.\n\n The memory allocated by this function and the blocks should be released\n using `eqs_tensormap_free`.\n\n @param keys labels containing the keys associated with each block\n @param blocks pointer to the first element of an array of blocks\n @param blocks_count number of elements in the `blocks` array\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
     pub fn eqs_tensormap(
         keys: eqs_labels_t,
@@ -463,6 +603,14 @@ extern "C" {
         count: *mut usize,
         selection: eqs_labels_t,
     ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Get the index of the block corresponding to each entry of the `selection`\n in this `tensor`. The `selection` should have all the names/dimensions of\n the keys for this tensor map (potentially in a different order), and can\n contain any number of entries.\n\n This is faster than calling `eqs_tensormap_blocks_matching` for each entry,\n since the blocks are found with a single lookup in the keys for each entry.\n\n @param tensor pointer to an existing tensor map\n @param block_indexes array to be filled with the index of the block\n                      matching each entry of the `selection`, or -1 if there\n                      is no block matching this entry\n @param count number of entries in `block_indexes`, which must be the same\n              as the number of entries in `selection`\n @param selection labels describing the requested blocks\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_blocks_matching_keys(
+        tensor: *const eqs_tensormap_t,
+        block_indexes: *mut i64,
+        count: usize,
+        selection: eqs_labels_t,
+    ) -> eqs_status_t;
     #[doc = " Merge blocks with the same value for selected keys dimensions along the\n property axis.\n\n The dimensions (names) of `keys_to_move` will be moved from the keys to\n the property labels, and blocks with the same remaining keys dimensions\n will be merged together along the property axis.\n\n If `keys_to_move` does not contains any entries (`keys_to_move.count\n == 0`), then the new property labels will contain entries corresponding\n to the merged blocks only. For example, merging a block with key `a=0`\n and properties `p=1, 2` with a block with key `a=2` and properties `p=1,\n 3` will produce a block with properties `a, p = (0, 1), (0, 2), (2, 1),\n (2, 3)`.\n\n If `keys_to_move` contains entries, then the property labels must be the\n same for all the merged blocks. In that case, the merged property labels\n will contains each of the entries of `keys_to_move` and then the current\n property labels. For example, using `a=2, 3` in `keys_to_move`, and\n blocks with properties `p=1, 2` will result in `a, p = (2, 1), (2, 2),\n (3, 1), (3, 2)`.\n\n The new sample labels will contains all of the merged blocks sample\n labels. The order of the samples is controlled by `sort_samples`. If\n `sort_samples` is true, samples are re-ordered to keep them\n lexicographically sorted. Otherwise they are kept in the order in which\n they appear in the blocks.\n\n The result is a new tensor map, which should be freed with `eqs_tensormap_free`.\n\n @param tensor pointer to an existing tensor map\n @param keys_to_move description of the keys to move\n @param sort_samples whether to sort the samples lexicographically after\n                     merging blocks\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
     pub fn eqs_tensormap_keys_to_properties(
         tensor: *const eqs_tensormap_t,
@@ -481,15 +629,82 @@ extern "C" {
         keys_to_move: eqs_labels_t,
         sort_samples: bool,
     ) -> *mut eqs_tensormap_t;
-    #[doc = " Load a tensor map from the file at the given path.\n\n Arrays for the values and gradient data will be created with the given\n `create_array` callback, and filled by this function with the corresponding\n data.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file\n without compression (storage method is STORED), where each file is stored as\n a `.npy` array. Both the ZIP and NPY format are well documented:\n\n - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>\n - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>\n\n We add other restriction on top of these formats when saving/loading data.\n First, `Labels` instances are saved as structured array, see the `labels`\n module for more information. Only 32-bit integers are supported for Labels,\n and only 64-bit floats are supported for data (values and gradients).\n\n Second, the path of the files in the archive also carry meaning. The keys of\n the `TensorMap` are stored in `/keys.npy`, and then different blocks are\n stored as\n\n ```bash\n /  blocks / <block_id>  / values / samples.npy\n                         / values / components  / 0.npy\n                                                / <...>.npy\n                                                / <n_components>.npy\n                         / values / properties.npy\n                         / values / data.npy\n\n                         # optional sections for gradients, one by parameter\n                         /   gradients / <parameter> / samples.npy\n                                                     /   components  / 0.npy\n                                                                     / <...>.npy\n                                                                     / <n_components>.npy\n                                                     /   data.npy\n ```\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param create_array callback function that will be used to create data\n                     arrays inside each block\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    #[doc = " Load a tensor map from the file at the given path.\n\n Arrays for the values and gradient data will be created with the given\n `create_array` callback, and filled by this function with the corresponding\n data.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file\n without compression by default (storage method is STORED, DEFLATE is also\n supported), where each file is stored as a `.npy` array. Both the ZIP and\n NPY format are well documented:\n\n - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>\n - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>\n\n We add other restriction on top of these formats when saving/loading data.\n First, `Labels` instances are saved as structured array, see the `labels`\n module for more information. Only 32-bit integers are supported for Labels,\n and only 64-bit, 32-bit and 16-bit floats are supported for data (values and\n gradients). The data is always loaded as 64-bit floats.\n\n Second, the path of the files in the archive also carry meaning. The keys of\n the `TensorMap` are stored in `/keys.npy`, and then different blocks are\n stored as\n\n ```bash\n /  blocks / <block_id>  / values / samples.npy\n                         / values / components  / 0.npy\n                                                / <...>.npy\n                                                / <n_components>.npy\n                         / values / properties.npy\n                         / values / data.npy\n\n                         # optional sections for gradients, one by parameter\n                         /   gradients / <parameter> / samples.npy\n                                                     /   components  / 0.npy\n                                                                     / <...>.npy\n                                                                     / <n_components>.npy\n                                                     /   data.npy\n ```\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param create_array callback function that will be used to create data\n                     arrays inside each block\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
     pub fn eqs_tensormap_load(
         path: *const ::std::os::raw::c_char,
         create_array: eqs_create_array_callback_t,
     ) -> *mut eqs_tensormap_t;
+    #[doc = " Load a tensor map from the file at the given path, using multiple threads.\n\n The file format is the same as for `eqs_tensormap_load`. The data arrays\n are read and the labels are decoded in parallel, using `n_threads` threads.\n If `n_threads` is 0, the number of threads is picked automatically (usually\n as many as there are CPU cores).\n\n All the arrays are created with `create_array` from the calling thread, the\n other threads only write to the data pointer of these arrays.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param create_array callback function that will be used to create data\n                     arrays inside each block\n @param n_threads number of threads to use\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_tensormap_load_parallel(
+        path: *const ::std::os::raw::c_char,
+        create_array: eqs_create_array_callback_t,
+        n_threads: usize,
+    ) -> *mut eqs_tensormap_t;
+    #[doc = " Load a tensor map from the file at the given path, mapping the file in\n memory instead of reading the data.\n\n The file format is the same as for `eqs_tensormap_load`. The values and\n gradients arrays are not copied, and the data is only paged in memory when\n it is accessed. These arrays use the `\"equistore.io.mmap\"` data origin. The\n file is mapped copy-on-write: the data can be modified, but modifications\n are never written back to the file. The file should not be modified while\n the tensor map (or any array coming from it) is alive.\n\n Arrays can only be mapped if they are stored without compression and\n aligned in the file (which is the case for files written by\n `eqs_tensormap_save`), other arrays are read in memory.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_tensormap_load_mmap(path: *const ::std::os::raw::c_char) -> *mut eqs_tensormap_t;
+    #[doc = " Load a tensor map from the given in-memory buffer.\n\n The buffer should contain the same data as a file created by\n `eqs_tensormap_save`, for example as written by `eqs_tensormap_save_buffer`.\n See `eqs_tensormap_load` for more information on the format.\n\n Arrays for the values and gradient data will be created with the given\n `create_array` callback, and filled by this function with the corresponding\n data. The buffer is not used after this function returns.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n @param buffer buffer containing a serialized tensor map\n @param buffer_count number of bytes in the buffer\n @param create_array callback function that will be used to create data\n                     arrays inside each block\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_tensormap_load_buffer(
+        buffer: *const u8,
+        buffer_count: usize,
+        create_array: eqs_create_array_callback_t,
+    ) -> *mut eqs_tensormap_t;
+    #[doc = " Load the parts of a tensor map matching a selection from the file at the\n given path.\n\n The file format is the same as for `eqs_tensormap_load`. Only the blocks\n with a key matching one of the entries in `keys` are loaded, and inside\n these blocks only the samples matching one of the entries in `samples` and\n the properties matching one of the entries in `properties` are kept. Each of\n these labels can contain a subset of the corresponding dimensions, and can\n be `NULL` to load all the entries.\n\n Blocks are read in the same order as in the file. The gradients are\n filtered in the same way as the values, and their `\"sample\"` dimension is\n updated to refer to the new samples. For data stored without compression,\n only the selected rows are read from the file.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_free`.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param create_array callback function that will be used to create data\n                     arrays inside each block\n @param keys selection on the keys, or `NULL` to load all blocks\n @param samples selection on the samples, or `NULL` to load all samples\n @param properties selection on the properties, or `NULL` to load all\n                   properties\n\n @returns A pointer to the newly allocated tensor map, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_tensormap_load_selected(
+        path: *const ::std::os::raw::c_char,
+        create_array: eqs_create_array_callback_t,
+        keys: *const eqs_labels_t,
+        samples: *const eqs_labels_t,
+        properties: *const eqs_labels_t,
+    ) -> *mut eqs_tensormap_t;
     #[must_use]
     #[doc = " Save a tensor map to the file at the given path.\n\n If the file already exists, it is overwritten.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param tensor tensor map to save to the file\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
     pub fn eqs_tensormap_save(
         path: *const ::std::os::raw::c_char,
         tensor: *const eqs_tensormap_t,
     ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Save a tensor map to the file at the given path, using multiple threads.\n\n The labels and headers of the arrays are encoded in parallel using\n `n_threads` threads, and then written to the file. If `n_threads` is 0, the\n number of threads is picked automatically (usually as many as there are CPU\n cores). The file is the same as the one created by `eqs_tensormap_save`,\n with all the entries in the same order.\n\n If the file already exists, it is overwritten.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param tensor tensor map to save to the file\n @param n_threads number of threads to use\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_save_parallel(
+        path: *const ::std::os::raw::c_char,
+        tensor: *const eqs_tensormap_t,
+        n_threads: usize,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Save a tensor map to the file at the given path, with additional options\n controlling how the data is stored.\n\n If `compress` is true, all the files in the archive are compressed with\n DEFLATE. The resulting files can still be read by `numpy.load`, but the\n data can not be memory-mapped by `eqs_tensormap_load_mmap`.\n\n `data_type` controls the type used to store the values and gradients data,\n and should be one of `\"float64\"`, `\"float32\"` or `\"float16\"`. Using a\n smaller type reduces the size of the file, but loses precision. The data is\n converted back to 64-bit floats when loading the file.\n\n The labels and headers of the arrays are encoded using `n_threads` threads,\n see `eqs_tensormap_save_parallel` for more information.\n\n If the file already exists, it is overwritten.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param tensor tensor map to save to the file\n @param compress should we compress the files in the archive?\n @param data_type type used to store the data, as a NULL-terminated UTF-8\n                  string\n @param n_threads number of threads to use\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_save_with_options(
+        path: *const ::std::os::raw::c_char,
+        tensor: *const eqs_tensormap_t,
+        compress: bool,
+        data_type: *const ::std::os::raw::c_char,
+        n_threads: usize,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Save a tensor map to an in-memory buffer.\n\n The content of the buffer is the same as the file created by\n `eqs_tensormap_save`. On input, `*buffer` should contain the address of a\n starting buffer (which can be `NULL`) and `*buffer_count` should contain\n the size of the allocation. The buffer is grown with the `realloc`\n callback to fit the serialized tensor map, and on output `*buffer` contains\n the address of the buffer and `*buffer_count` the number of bytes written\n to it.\n\n @param buffer pointer to the buffer, which will be updated by this function\n @param buffer_count pointer to the buffer size, which will be updated by\n                     this function\n @param realloc_user_data custom data given to the `realloc` function\n @param realloc function used to allocate memory for the buffer\n @param tensor tensor map to save to the buffer\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_save_buffer(
+        buffer: *mut *mut u8,
+        buffer_count: *mut usize,
+        realloc_user_data: *mut ::std::os::raw::c_void,
+        realloc: eqs_realloc_buffer_t,
+        tensor: *const eqs_tensormap_t,
+    ) -> eqs_status_t;
+    #[doc = " Create a new writer for tensor maps, writing to the file at the given path.\n\n Instead of building a full tensor map in memory before saving it, this\n writer allows to add blocks (and the corresponding keys) to the file one at\n a time with `eqs_tensormap_writer_add_block`. The keys are written to the\n file by `eqs_tensormap_writer_finish`. The resulting file is the same as\n the one created by `eqs_tensormap_save` for a tensor map containing the\n same keys and blocks.\n\n If the file already exists, it is overwritten.\n\n The memory allocated by this function should be released using\n `eqs_tensormap_writer_free`.\n\n @param path path to the file as a NULL-terminated UTF-8 string\n @param keys_names names of the keys dimensions\n @param keys_names_count number of entries in the `keys_names` array\n\n @returns A pointer to the newly allocated writer, or a `NULL` pointer in\n          case of error. In case of error, you can use `eqs_last_error()`\n          to get the error message."]
+    pub fn eqs_tensormap_writer(
+        path: *const ::std::os::raw::c_char,
+        keys_names: *const *const ::std::os::raw::c_char,
+        keys_names_count: usize,
+    ) -> *mut eqs_tensormap_writer_t;
+    #[must_use]
+    #[doc = " Write the `block` associated with the given `key` to the file.\n\n The block is not modified and still owned by the caller, it can be released\n with `eqs_block_free` as soon as this function returns. All the blocks must\n have the same labels names and set of gradients, and all the keys must be\n different.\n\n @param writer writer created with `eqs_tensormap_writer`\n @param key values of the key associated with this block\n @param key_count number of entries in the `key` array, this must match the\n                  number of keys names given to `eqs_tensormap_writer`\n @param block block to write to the file\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_writer_add_block(
+        writer: *mut eqs_tensormap_writer_t,
+        key: *const i32,
+        key_count: usize,
+        block: *const eqs_block_t,
+    ) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Write the keys and finish writing the file.\n\n This function must be called once all the blocks have been added, otherwise\n the file will not be a valid tensor map. No more blocks can be added after\n calling this function. The writer should still be released with\n `eqs_tensormap_writer_free`.\n\n @param writer writer created with `eqs_tensormap_writer`\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_writer_finish(writer: *mut eqs_tensormap_writer_t) -> eqs_status_t;
+    #[must_use]
+    #[doc = " Free the memory associated with a `writer` previously created with\n `eqs_tensormap_writer`.\n\n If `eqs_tensormap_writer_finish` was not called on this writer, the file\n will not contain a valid tensor map. If `writer` is `NULL`, this function\n does nothing.\n\n @param writer pointer to an existing writer, or `NULL`\n\n @returns The status code of this operation. If the status is not\n          `EQS_SUCCESS`, you can use `eqs_last_error()` to get the full\n          error message."]
+    pub fn eqs_tensormap_writer_free(writer: *mut eqs_tensormap_writer_t) -> eqs_status_t;
 }
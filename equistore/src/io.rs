@@ -13,8 +13,9 @@ use crate::{TensorMap, Error, Array};
 /// data.
 ///
 /// `TensorMap` are serialized using numpy's `.npz` format, i.e. a ZIP file
-/// without compression (storage method is STORED), where each file is stored as
-/// a `.npy` array. Both the ZIP and NPY format are well documented:
+/// without compression by default (storage method is STORED, DEFLATE is also
+/// supported), where each file is stored as a `.npy` array. Both the ZIP and
+/// NPY format are well documented:
 ///
 /// - ZIP: <https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT>
 /// - NPY: <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>
@@ -22,7 +23,8 @@ use crate::{TensorMap, Error, Array};
 /// We add other restriction on top of these formats when saving/loading data.
 /// First, `Labels` instances are saved as structured array, see the `labels`
 /// module for more information. Only 32-bit integers are supported for Labels,
-/// and only 64-bit floats are supported for data (values and gradients).
+/// and only 64-bit, 32-bit and 16-bit floats are supported for data (values and
+/// gradients). The data is always loaded as 64-bit floats.
 ///
 /// Second, the path of the files in the archive also carry meaning. The keys of
 /// the `TensorMap` are stored in `/keys.npy`, and then different blocks are
@@ -115,6 +115,8 @@ def c_type_name(name):
         return "ctypes.c_int64"
     elif name == "uint64_t":
         return "ctypes.c_uint64"
+    elif name == "uint8_t":
+        return "ctypes.c_uint8"
     else:
         return "ctypes.c_" + name
 
@@ -131,7 +133,12 @@ def _typedecl_name(type):
 
 
 def funcdecl_to_ctypes(type):
-    restype = type_to_ctypes(type.type)
+    if isinstance(type.type, c_ast.PtrDecl):
+        # ctypes callbacks can not return pointers, so we return the address of
+        # the data as an integer instead
+        restype = "c_uintptr_t"
+    else:
+        restype = type_to_ctypes(type.type)
     args = [type_to_ctypes(t.type) for t in type.args.params]
 
     return f'CFUNCTYPE({restype}, {", ".join(args)})'
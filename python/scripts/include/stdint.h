@@ -3,3 +3,4 @@ typedef int int64_t;
 typedef int int32_t;
 typedef int uint32_t;
 typedef int uintptr_t;
+typedef int uint8_t;
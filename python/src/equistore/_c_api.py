@@ -30,6 +30,7 @@ EQS_INTERNAL_ERROR = 255
 
 eqs_status_t = ctypes.c_int32
 eqs_data_origin_t = ctypes.c_uint64
+eqs_realloc_buffer_t = CFUNCTYPE(c_uintptr_t, ctypes.c_void_p, POINTER(ctypes.c_uint8), c_uintptr_t)
 
 
 class eqs_block_t(ctypes.Structure):
@@ -40,6 +41,10 @@ class eqs_tensormap_t(ctypes.Structure):
     pass
 
 
+class eqs_tensormap_writer_t(ctypes.Structure):
+    pass
+
+
 class eqs_labels_t(ctypes.Structure):
     pass
 
@@ -78,6 +83,17 @@ eqs_array_t._fields_ = [
 ]
 
 
+class eqs_cpu_buffer_t(ctypes.Structure):
+    pass
+
+eqs_cpu_buffer_t._fields_ = [
+    ("user_data", ctypes.c_void_p),
+    ("data", POINTER(ctypes.c_double)),
+    ("shape", POINTER(c_uintptr_t)),
+    ("shape_count", c_uintptr_t),
+]
+
+
 eqs_create_array_callback_t = CFUNCTYPE(eqs_status_t, POINTER(c_uintptr_t), c_uintptr_t, POINTER(eqs_array_t))
 
 
@@ -104,6 +120,14 @@ def setup_functions(lib):
     ]
     lib.eqs_labels_position.restype = _check_status
 
+    lib.eqs_labels_positions.argtypes = [
+        eqs_labels_t,
+        POINTER(ctypes.c_int32),
+        c_uintptr_t,
+        POINTER(ctypes.c_int64),
+    ]
+    lib.eqs_labels_positions.restype = _check_status
+
     lib.eqs_labels_create.argtypes = [
         POINTER(eqs_labels_t),
     ]
@@ -120,6 +144,37 @@ def setup_functions(lib):
     ]
     lib.eqs_labels_free.restype = _check_status
 
+    lib.eqs_labels_union.argtypes = [
+        eqs_labels_t,
+        eqs_labels_t,
+        POINTER(eqs_labels_t),
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+    ]
+    lib.eqs_labels_union.restype = _check_status
+
+    lib.eqs_labels_intersection.argtypes = [
+        eqs_labels_t,
+        eqs_labels_t,
+        POINTER(eqs_labels_t),
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+    ]
+    lib.eqs_labels_intersection.restype = _check_status
+
+    lib.eqs_labels_difference.argtypes = [
+        eqs_labels_t,
+        eqs_labels_t,
+        POINTER(eqs_labels_t),
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+    ]
+    lib.eqs_labels_difference.restype = _check_status
+
     lib.eqs_register_data_origin.argtypes = [
         ctypes.c_char_p,
         POINTER(eqs_data_origin_t),
@@ -133,6 +188,19 @@ def setup_functions(lib):
     ]
     lib.eqs_get_data_origin.restype = _check_status
 
+    lib.eqs_cpu_buffer_shape.argtypes = [
+        ctypes.c_void_p,
+        POINTER(POINTER(c_uintptr_t)),
+        POINTER(c_uintptr_t),
+    ]
+    lib.eqs_cpu_buffer_shape.restype = _check_status
+
+    lib.eqs_cpu_buffer_data.argtypes = [
+        ctypes.c_void_p,
+        POINTER(POINTER(ctypes.c_double)),
+    ]
+    lib.eqs_cpu_buffer_data.restype = _check_status
+
     lib.eqs_block.argtypes = [
         eqs_array_t,
         eqs_labels_t,
@@ -184,6 +252,14 @@ def setup_functions(lib):
     ]
     lib.eqs_block_gradients_list.restype = _check_status
 
+    lib.eqs_block_reduce_samples.argtypes = [
+        POINTER(eqs_block_t),
+        POINTER(ctypes.c_char_p),
+        c_uintptr_t,
+        ctypes.c_char_p,
+    ]
+    lib.eqs_block_reduce_samples.restype = POINTER(eqs_block_t)
+
     lib.eqs_tensormap.argtypes = [
         eqs_labels_t,
         POINTER(POINTER(eqs_block_t)),
@@ -222,6 +298,14 @@ def setup_functions(lib):
     ]
     lib.eqs_tensormap_blocks_matching.restype = _check_status
 
+    lib.eqs_tensormap_blocks_matching_keys.argtypes = [
+        POINTER(eqs_tensormap_t),
+        POINTER(ctypes.c_int64),
+        c_uintptr_t,
+        eqs_labels_t,
+    ]
+    lib.eqs_tensormap_blocks_matching_keys.restype = _check_status
+
     lib.eqs_tensormap_keys_to_properties.argtypes = [
         POINTER(eqs_tensormap_t),
         eqs_labels_t,
@@ -249,8 +333,86 @@ def setup_functions(lib):
     ]
     lib.eqs_tensormap_load.restype = POINTER(eqs_tensormap_t)
 
+    lib.eqs_tensormap_load_parallel.argtypes = [
+        ctypes.c_char_p,
+        eqs_create_array_callback_t,
+        c_uintptr_t,
+    ]
+    lib.eqs_tensormap_load_parallel.restype = POINTER(eqs_tensormap_t)
+
+    lib.eqs_tensormap_load_mmap.argtypes = [
+        ctypes.c_char_p,
+    ]
+    lib.eqs_tensormap_load_mmap.restype = POINTER(eqs_tensormap_t)
+
+    lib.eqs_tensormap_load_buffer.argtypes = [
+        POINTER(ctypes.c_uint8),
+        c_uintptr_t,
+        eqs_create_array_callback_t,
+    ]
+    lib.eqs_tensormap_load_buffer.restype = POINTER(eqs_tensormap_t)
+
+    lib.eqs_tensormap_load_selected.argtypes = [
+        ctypes.c_char_p,
+        eqs_create_array_callback_t,
+        POINTER(eqs_labels_t),
+        POINTER(eqs_labels_t),
+        POINTER(eqs_labels_t),
+    ]
+    lib.eqs_tensormap_load_selected.restype = POINTER(eqs_tensormap_t)
+
     lib.eqs_tensormap_save.argtypes = [
         ctypes.c_char_p,
         POINTER(eqs_tensormap_t),
     ]
     lib.eqs_tensormap_save.restype = _check_status
+
+    lib.eqs_tensormap_save_parallel.argtypes = [
+        ctypes.c_char_p,
+        POINTER(eqs_tensormap_t),
+        c_uintptr_t,
+    ]
+    lib.eqs_tensormap_save_parallel.restype = _check_status
+
+    lib.eqs_tensormap_save_with_options.argtypes = [
+        ctypes.c_char_p,
+        POINTER(eqs_tensormap_t),
+        ctypes.c_bool,
+        ctypes.c_char_p,
+        c_uintptr_t,
+    ]
+    lib.eqs_tensormap_save_with_options.restype = _check_status
+
+    lib.eqs_tensormap_save_buffer.argtypes = [
+        POINTER(POINTER(ctypes.c_uint8)),
+        POINTER(c_uintptr_t),
+        ctypes.c_void_p,
+        eqs_realloc_buffer_t,
+        POINTER(eqs_tensormap_t),
+    ]
+    lib.eqs_tensormap_save_buffer.restype = _check_status
+
+    lib.eqs_tensormap_writer.argtypes = [
+        ctypes.c_char_p,
+        POINTER(ctypes.c_char_p),
+        c_uintptr_t,
+    ]
+    lib.eqs_tensormap_writer.restype = POINTER(eqs_tensormap_writer_t)
+
+    lib.eqs_tensormap_writer_add_block.argtypes = [
+        POINTER(eqs_tensormap_writer_t),
+        POINTER(ctypes.c_int32),
+        c_uintptr_t,
+        POINTER(eqs_block_t),
+    ]
+    lib.eqs_tensormap_writer_add_block.restype = _check_status
+
+    lib.eqs_tensormap_writer_finish.argtypes = [
+        POINTER(eqs_tensormap_writer_t),
+    ]
+    lib.eqs_tensormap_writer_finish.restype = _check_status
+
+    lib.eqs_tensormap_writer_free.argtypes = [
+        POINTER(eqs_tensormap_writer_t),
+    ]
+    lib.eqs_tensormap_writer_free.restype = _check_status
@@ -51,6 +51,9 @@ class LibraryFinder(object):
 
             # Register the origin used by the Rust API as an external CPU array
             register_external_data_wrapper("rust.Box<dyn Array>", ExternalCpuArray)
+            # Register the origin used by memory-mapped arrays in
+            # `equistore.io.load_mmap`
+            register_external_data_wrapper("equistore.io.mmap", ExternalCpuArray)
 
         return self._cached_dll
 
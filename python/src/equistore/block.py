@@ -1,12 +1,13 @@
 import copy
 import ctypes
+import weakref
 from typing import Generator, List, Tuple
 
 from ._c_api import c_uintptr_t, eqs_array_t, eqs_labels_t
 from ._c_lib import _get_library
 from .data import Array, ArrayWrapper, eqs_array_to_python_array
 from .labels import Labels
-from .status import _check_pointer
+from .status import _check_pointer, _check_status
 
 
 class TensorBlock:
@@ -47,6 +48,7 @@ class TensorBlock:
         """
         self._lib = _get_library()
         self._parent = None
+        self._reset_cache()
 
         components_array = ctypes.ARRAY(eqs_labels_t, len(components))()
         for i, component in enumerate(components):
@@ -76,8 +78,37 @@ class TensorBlock:
         # keep a reference to the parent object (usually a TensorMap) to
         # prevent it from beeing garbage-collected & removing this block
         obj._parent = parent
+        obj._reset_cache()
         return obj
 
+    def _reset_cache(self):
+        # The values and labels of a block can not change once it is created,
+        # so the corresponding Python objects are created on first access and
+        # then re-used. Only the list of gradients can change, when calling
+        # `add_gradient`.
+        #
+        # The values and gradients keep the owner of the data alive, which is
+        # the block itself if it does not have a parent. The block then only
+        # stores weak references to them (see `_cache_entry`) to prevent
+        # reference cycles.
+        self._values = None
+        self._samples = None
+        self._components = None
+        self._properties = None
+        self._gradients_list = None
+        self._gradients = {}
+
+    @property
+    def _owner(self):
+        # Python object owning the memory used by this block
+        return self if self._parent is None else self._parent
+
+    def _cache_entry(self, value):
+        if self._parent is None:
+            return weakref.ref(value)
+        else:
+            return value
+
     @property
     def _ptr(self):
         if self._actual_ptr is None:
@@ -90,6 +121,7 @@ class TensorBlock:
     def _move_ptr(self):
         assert self._parent is None
         self._actual_ptr = None
+        self._reset_cache()
 
     def __del__(self):
         if (
@@ -153,9 +185,13 @@ class TensorBlock:
         The array type depends on how the block was created. Currently, numpy
         ``ndarray`` and torch ``Tensor`` are supported.
         """
+        values = _cached_value(self._values)
+        if values is None:
+            raw_array = _get_raw_array(self._lib, self._ptr, "values")
+            values = eqs_array_to_python_array(raw_array, parent=self._owner)
+            self._values = self._cache_entry(values)
 
-        raw_array = _get_raw_array(self._lib, self._ptr, "values")
-        return eqs_array_to_python_array(raw_array, parent=self)
+        return values
 
     @property
     def samples(self) -> Labels:
@@ -165,7 +201,10 @@ class TensorBlock:
         The entries in these labels describe the first dimension of the
         ``values`` array.
         """
-        return self._labels(0)
+        if self._samples is None:
+            self._samples = self._labels(0)
+
+        return self._samples
 
     @property
     def components(self) -> List[Labels]:
@@ -175,13 +214,15 @@ class TensorBlock:
         The entries in these labels describe intermediate dimensions of the
         ``values`` array.
         """
-        n_components = len(self.values.shape) - 2
+        if self._components is None:
+            n_components = _get_raw_dimensions(self._lib, self._ptr, "values") - 2
 
-        result = []
-        for axis in range(n_components):
-            result.append(self._labels(axis + 1))
+            self._components = []
+            for axis in range(n_components):
+                self._components.append(self._labels(axis + 1))
 
-        return result
+        # return a copy of the list to prevent modifications of the cache
+        return list(self._components)
 
     @property
     def properties(self) -> Labels:
@@ -192,8 +233,11 @@ class TensorBlock:
         ``values`` array. The properties are guaranteed to be the same for
         values and gradients in the same block.
         """
-        property_axis = len(self.values.shape) - 1
-        return self._labels(property_axis)
+        if self._properties is None:
+            property_axis = _get_raw_dimensions(self._lib, self._ptr, "values") - 1
+            self._properties = self._labels(property_axis)
+
+        return self._properties
 
     def _labels(self, axis) -> Labels:
         result = eqs_labels_t()
@@ -208,11 +252,16 @@ class TensorBlock:
         :param parameter: check for gradients with respect to this ``parameter``
             (e.g. ``positions``, ``cell``, ...)
         """
-        if not self.has_gradient(parameter):
-            raise ValueError(
-                f"this block does not contain gradient with respect to {parameter}"
-            )
-        return Gradient(self, parameter)
+        gradient = _cached_value(self._gradients.get(parameter))
+        if gradient is None:
+            if not self.has_gradient(parameter):
+                raise ValueError(
+                    f"this block does not contain gradient with respect to {parameter}"
+                )
+            gradient = Gradient(self, parameter)
+            self._gradients[parameter] = self._cache_entry(gradient)
+
+        return gradient
 
     def add_gradient(
         self,
@@ -251,18 +300,20 @@ class TensorBlock:
             components_array,
             len(components_array),
         )
+        self._gradients_list = None
 
     def gradients_list(self) -> List[str]:
         """Get a list of all gradients defined in this block."""
-        parameters = ctypes.POINTER(ctypes.c_char_p)()
-        count = c_uintptr_t()
-        self._lib.eqs_block_gradients_list(self._ptr, parameters, count)
+        if self._gradients_list is None:
+            parameters = ctypes.POINTER(ctypes.c_char_p)()
+            count = c_uintptr_t()
+            self._lib.eqs_block_gradients_list(self._ptr, parameters, count)
 
-        result = []
-        for i in range(count.value):
-            result.append(parameters[i].decode("utf8"))
+            self._gradients_list = []
+            for i in range(count.value):
+                self._gradients_list.append(parameters[i].decode("utf8"))
 
-        return result
+        return list(self._gradients_list)
 
     def has_gradient(self, parameter: str) -> bool:
         """
@@ -289,9 +340,26 @@ class Gradient:
     def __init__(self, block: TensorBlock, name: str):
         self._lib = _get_library()
 
-        self._block = block
+        if block._parent is None:
+            # keep the block (which owns the data) alive
+            self._block = block
+            self._ptr_in_parent = None
+        else:
+            # the block keeps this gradient alive, so only keep the owner of
+            # the data alive instead of the block
+            self._block = None
+            self._ptr_in_parent = block._ptr
+
+        self._owner = block._owner
         self._name = name
 
+        # the data and labels of a gradient can not change once it is added to
+        # a block, so they are only created once
+        self._data = None
+        self._samples = None
+        self._components = None
+        self._properties = None
+
     def __repr__(self) -> str:
         s = "Gradient TensorBlock\n"
         s += "parameter: '{}'\n".format(self._name)
@@ -318,9 +386,11 @@ class Gradient:
         The array type depends on how the block was created. Currently, numpy
         ``ndarray`` and torch ``Tensor`` are supported.
         """
+        if self._data is None:
+            raw_array = _get_raw_array(self._lib, self._block_ptr, self._name)
+            self._data = eqs_array_to_python_array(raw_array, parent=self._owner)
 
-        raw_array = _get_raw_array(self._lib, self._block._ptr, self._name)
-        return eqs_array_to_python_array(raw_array, parent=self)
+        return self._data
 
     @property
     def samples(self) -> Labels:
@@ -330,7 +400,10 @@ class Gradient:
         The entries in these labels describe the first dimension of the ``data``
         array.
         """
-        return self._labels(0)
+        if self._samples is None:
+            self._samples = self._labels(0)
+
+        return self._samples
 
     @property
     def components(self) -> List[Labels]:
@@ -340,13 +413,16 @@ class Gradient:
         The entries in these labels describe intermediate dimensions of the
         ``data`` array.
         """
-        n_components = len(self.data.shape) - 2
+        if self._components is None:
+            n_dimensions = _get_raw_dimensions(self._lib, self._block_ptr, self._name)
+            n_components = n_dimensions - 2
 
-        result = []
-        for axis in range(n_components):
-            result.append(self._labels(axis + 1))
+            self._components = []
+            for axis in range(n_components):
+                self._components.append(self._labels(axis + 1))
 
-        return result
+        # return a copy of the list to prevent modifications of the cache
+        return list(self._components)
 
     @property
     def properties(self) -> Labels:
@@ -357,18 +433,49 @@ class Gradient:
         array. The properties are guaranteed to be the same for values and
         gradients in the same block.
         """
-        property_axis = len(self.data.shape) - 1
-        return self._labels(property_axis)
+        if self._properties is None:
+            n_dimensions = _get_raw_dimensions(self._lib, self._block_ptr, self._name)
+            property_axis = n_dimensions - 1
+            self._properties = self._labels(property_axis)
+
+        return self._properties
+
+    @property
+    def _block_ptr(self):
+        if self._block is not None:
+            return self._block._ptr
+        else:
+            return self._ptr_in_parent
 
     def _labels(self, axis) -> Labels:
         result = eqs_labels_t()
         self._lib.eqs_block_labels(
-            self._block._ptr, self._name.encode("utf8"), axis, result
+            self._block_ptr, self._name.encode("utf8"), axis, result
         )
         return Labels._from_eqs_labels_t(result)
 
 
+def _cached_value(entry):
+    # get the value from an entry created by `TensorBlock._cache_entry`, or
+    # None if the value is not cached
+    if isinstance(entry, weakref.ref):
+        return entry()
+    else:
+        return entry
+
+
 def _get_raw_array(lib, block_ptr, name) -> eqs_array_t:
     data = eqs_array_t()
     lib.eqs_block_data(block_ptr, name.encode("utf8"), data)
     return data
+
+
+def _get_raw_dimensions(lib, block_ptr, name) -> int:
+    # get the number of dimensions from the array stored in the block, since
+    # the Python array returned by `values`/`data` could have been reshaped
+    data = _get_raw_array(lib, block_ptr, name)
+    shape_ptr = ctypes.POINTER(c_uintptr_t)()
+    shape_count = c_uintptr_t()
+    status = data.shape(data.ptr, shape_ptr, shape_count)
+    _check_status(status)
+    return shape_count.value
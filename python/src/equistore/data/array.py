@@ -2,8 +2,8 @@ import ctypes
 
 import numpy as np
 
-from .._c_api import c_uintptr_t, eqs_array_t, eqs_data_origin_t
-from ..utils import catch_exceptions
+from .._c_api import c_uintptr_t, eqs_array_t, eqs_cpu_buffer_t, eqs_data_origin_t
+from ..utils import _ptr_to_const_ndarray, catch_exceptions
 
 
 try:
@@ -54,12 +54,32 @@ def _origin_pytorch():
     return _TORCH_STORAGE_ORIGIN
 
 
+_CPU_BUFFER_FUNCTIONS = None
+
+
+def _cpu_buffer_functions():
+    """
+    Get the addresses of ``eqs_cpu_buffer_shape`` and ``eqs_cpu_buffer_data``,
+    to be used as ``eqs_array_t`` functions.
+    """
+    global _CPU_BUFFER_FUNCTIONS
+    if _CPU_BUFFER_FUNCTIONS is None:
+        from .._c_lib import _get_library
+
+        lib = _get_library()
+        _CPU_BUFFER_FUNCTIONS = (
+            ctypes.cast(lib.eqs_cpu_buffer_shape, ctypes.c_void_p).value,
+            ctypes.cast(lib.eqs_cpu_buffer_data, ctypes.c_void_p).value,
+        )
+
+    return _CPU_BUFFER_FUNCTIONS
+
+
 class ArrayWrapper:
     """Small wrapper making Python arrays compatible with ``eqs_array_t``."""
 
     def __init__(self, array):
         self.array = array
-        self._shape = ctypes.ARRAY(c_uintptr_t, len(array.shape))(*array.shape)
 
         if _is_numpy_array(array):
             array_origin = _origin_numpy()
@@ -68,11 +88,20 @@ class ArrayWrapper:
         else:
             raise ValueError(f"unknown array type: {type(array)}")
 
+        # The shape and data pointer of the array are stored in an
+        # `eqs_cpu_buffer_t`, allowing equistore to access them without calling
+        # back into Python.
+        self._buffer = eqs_cpu_buffer_t()
+        # `user_data` is the address of the PyObject `self` (this is what `id`
+        # gives with CPython), and the first member of `eqs_cpu_buffer_t`. This
+        # means that a pointer to the buffer is also a pointer to the PyObject
+        # `self`, which is what `_object_from_ptr` expects.
+        self._buffer.user_data = id(self)
+        self._update_buffer()
+
         eqs_array = eqs_array_t()
-        # `eqs_array_t::ptr` is a pointer to the PyObject `self`
-        eqs_array.ptr = ctypes.cast(
-            ctypes.pointer(ctypes.py_object(self)), ctypes.c_void_p
-        )
+        # `eqs_array_t::ptr` is a pointer to `self._buffer`
+        eqs_array.ptr = ctypes.addressof(self._buffer)
 
         @catch_exceptions
         def eqs_array_origin(this, origin):
@@ -81,9 +110,15 @@ class ArrayWrapper:
         # use storage.XXX.__class__ to get the right type for all functions
         eqs_array.origin = eqs_array.origin.__class__(eqs_array_origin)
 
-        eqs_array.data = eqs_array.data.__class__(_eqs_array_data)
+        cpu_buffer_shape, cpu_buffer_data = _cpu_buffer_functions()
+        eqs_array.shape = eqs_array.shape.__class__(cpu_buffer_shape)
+        if _is_numpy_array(array):
+            eqs_array.data = eqs_array.data.__class__(cpu_buffer_data)
+        else:
+            # torch tensors can move to another device or start requiring
+            # gradients, so we need to check them every time
+            eqs_array.data = eqs_array.data.__class__(_eqs_array_data)
 
-        eqs_array.shape = eqs_array.shape.__class__(_eqs_array_shape)
         eqs_array.reshape = eqs_array.reshape.__class__(_eqs_array_reshape)
         eqs_array.swap_axes = eqs_array.swap_axes.__class__(_eqs_array_swap_axes)
 
@@ -97,6 +132,23 @@ class ArrayWrapper:
 
         self._eqs_array = eqs_array
 
+    def _update_buffer(self):
+        """Update ``self._buffer`` after a change to ``self.array``"""
+        shape = self.array.shape
+        self._shape = ctypes.ARRAY(c_uintptr_t, len(shape))(*shape)
+        self._buffer.shape = self._shape
+        self._buffer.shape_count = len(shape)
+
+        if (
+            _is_numpy_array(self.array)
+            and self.array.dtype == np.float64
+            and self.array.flags.c_contiguous
+        ):
+            data = self.array.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+            self._buffer.data = data
+        else:
+            self._buffer.data = None
+
     def into_eqs_array(self):
         """
         Get an eqs_array_t instance for the wrapper array.
@@ -146,14 +198,6 @@ def _eqs_array_data(this, data):
     data[0] = array.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
 
 
-@catch_exceptions
-def _eqs_array_shape(this, shape_ptr, shape_count):
-    wrapper = _object_from_ptr(this)
-
-    shape_ptr[0] = wrapper._shape
-    shape_count[0] = len(wrapper._shape)
-
-
 @catch_exceptions
 def _eqs_array_reshape(this, shape_ptr, shape_count):
     wrapper = _object_from_ptr(this)
@@ -163,16 +207,14 @@ def _eqs_array_reshape(this, shape_ptr, shape_count):
         shape.append(shape_ptr[i])
 
     wrapper.array = wrapper.array.reshape(shape)
-    wrapper._shape = ctypes.ARRAY(c_uintptr_t, len(shape))(*shape)
+    wrapper._update_buffer()
 
 
 @catch_exceptions
 def _eqs_array_swap_axes(this, axis_1, axis_2):
     wrapper = _object_from_ptr(this)
     wrapper.array = wrapper.array.swapaxes(axis_1, axis_2)
-
-    shape = wrapper.array.shape
-    wrapper._shape = ctypes.ARRAY(c_uintptr_t, len(shape))(*shape)
+    wrapper._update_buffer()
 
 
 @catch_exceptions
@@ -225,11 +267,20 @@ def _eqs_array_move_samples_from(
     output = _object_from_ptr(this).array
     input = _object_from_ptr(input).array
 
-    input_samples = []
-    output_samples = []
-    for i in range(samples_count):
-        input_samples.append(samples_ptr[i].input)
-        output_samples.append(samples_ptr[i].output)
+    # view the array of `eqs_sample_mapping_t` as a (samples_count, 2) array,
+    # without copying it
+    samples = _ptr_to_const_ndarray(
+        ptr=ctypes.cast(samples_ptr, ctypes.POINTER(c_uintptr_t)),
+        shape=(samples_count, 2),
+        dtype=np.uintp,
+    )
+    input_samples = samples[:, 0]
+    output_samples = samples[:, 1]
+
+    if _is_torch_array(output):
+        # torch can not index tensors with unsigned integers
+        input_samples = torch.from_numpy(input_samples.astype(np.int64))
+        output_samples = torch.from_numpy(output_samples.astype(np.int64))
 
     properties = slice(property_start, property_end)
     output[output_samples, ..., properties] = input[input_samples, ..., :]
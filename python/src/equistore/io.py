@@ -1,15 +1,26 @@
+import collections
+import concurrent.futures
 import ctypes
+import io
+import os
 import warnings
-from typing import Callable
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 
-from ._c_api import c_uintptr_t, eqs_array_t, eqs_create_array_callback_t
+from ._c_api import (
+    c_uintptr_t,
+    eqs_array_t,
+    eqs_create_array_callback_t,
+    eqs_realloc_buffer_t,
+)
 from ._c_lib import _get_library
 from .block import TensorBlock
 from .data.array import ArrayWrapper, _is_numpy_array, _is_torch_array
-from .labels import Labels
-from .tensor import TensorMap
+from .labels import Labels, _labels_values
+from .operations.slice import _slice_block
+from .status import _check_pointer
+from .tensor import TensorMap, _block_selection, _list_or_str_to_array_c_char
 from .utils import catch_exceptions
 
 
@@ -46,25 +57,90 @@ def create_torch_array(shape_ptr, shape_count, array):
     array[0] = wrapper.into_eqs_array()
 
 
-def load(path: str, use_numpy=False) -> TensorMap:
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def load(
+    file: Union[str, BinaryIO, Buffer],
+    use_numpy=False,
+    threads: int = 1,
+    keys: Optional[Labels] = None,
+    samples: Optional[Labels] = None,
+    properties: Optional[Labels] = None,
+) -> TensorMap:
     """
-    Load a previously saved :py:class:`equistore.TensorMap` from the given path.
+    Load a previously saved :py:class:`equistore.TensorMap` from the given file.
 
     :py:class:`equistore.TensorMap` are serialized using numpy's ``.npz``
-    format, i.e. a ZIP file without compression (storage method is ``STORED``),
-    where each file is stored as a ``.npy`` array. See the C API documentation
-    for more information on the format.
+    format, i.e. a ZIP file where each file is stored as a ``.npy`` array. The
+    files are stored without compression (storage method is ``STORED``) by
+    default, and can also be compressed with ``DEFLATE``. The data can be
+    stored as 64-bit, 32-bit or 16-bit floats, and is always loaded as
+    ``float64``. See the C API documentation for more information on the
+    format.
 
-    :param path: path of the file to load
+    Only a part of the data can be loaded by giving a selection on the
+    ``keys``, ``samples`` and ``properties``, each containing a subset of the
+    corresponding dimensions. Only the blocks with a key matching one of the
+    entries in ``keys`` are loaded, and only the samples and properties
+    matching one of the entries in ``samples`` and ``properties`` are kept in
+    these blocks. The result is the same as loading the full file and then
+    slicing it with :py:func:`equistore.slice`, but the native implementation
+    only reads the selected data from the file:
+
+    .. code-block:: python
+
+        tensor = equistore.load(
+            "data.npz",
+            keys=Labels(["center_species"], np.array([[6]])),
+            samples=Labels(["structure"], np.array([[0], [1], [2]])),
+        )
+
+    :param file: path of the file to load, file-like object opened in binary
+        mode, or in-memory buffer (``bytes``, ``bytearray`` or ``memoryview``)
+        containing the data
     :param use_numpy: should we use numpy or the native implementation? Numpy
         should be able to process more dtypes than the native implementation,
         which is limited to float64, but the native implementation is usually
         faster than going through numpy.
+    :param threads: number of threads used to read the data and decode the
+        labels with the native implementation. ``0`` uses as many threads as
+        there are CPU cores. Multiple threads can only be used when loading
+        from a path.
+    :param keys: selection of the blocks to load, ``None`` loads all blocks
+    :param samples: selection of the samples to load, ``None`` loads all
+        samples
+    :param properties: selection of the properties to load, ``None`` loads all
+        properties
     """
+    _check_threads(threads, use_numpy)
     if use_numpy:
-        return _read_npz(path)
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            file = io.BytesIO(file)
+        return _read_npz(file, keys, samples, properties)
     else:
-        return load_custom_array(path, create_numpy_array)
+        return load_custom_array(
+            file,
+            create_numpy_array,
+            threads=threads,
+            keys=keys,
+            samples=samples,
+            properties=properties,
+        )
+
+
+def load_buffer(buffer: Buffer, use_numpy=False) -> TensorMap:
+    """
+    Load a previously saved :py:class:`equistore.TensorMap` from an in-memory
+    ``buffer``, for example created by :py:func:`equistore.io.save_buffer`.
+
+    This is equivalent to :py:func:`equistore.load` with a buffer.
+
+    :param buffer: ``bytes``, ``bytearray`` or ``memoryview`` containing the
+        serialized data
+    :param use_numpy: should we use numpy or the native implementation?
+    """
+    return load(buffer, use_numpy=use_numpy)
 
 
 CreateArrayCallback = Callable[
@@ -73,9 +149,16 @@ CreateArrayCallback = Callable[
 
 
 # TODO: type hints on create_array
-def load_custom_array(path: str, create_array: CreateArrayCallback) -> TensorMap:
+def load_custom_array(
+    file: Union[str, BinaryIO, Buffer],
+    create_array: CreateArrayCallback,
+    threads: int = 1,
+    keys: Optional[Labels] = None,
+    samples: Optional[Labels] = None,
+    properties: Optional[Labels] = None,
+) -> TensorMap:
     """
-    Load a previously saved :py:class:`equistore.TensorMap` from the given path
+    Load a previously saved :py:class:`equistore.TensorMap` from the given file
     using a custom array creation callback.
 
     This is an advanced functionality, which should not be needed by most users.
@@ -89,34 +172,657 @@ def load_custom_array(path: str, create_array: CreateArrayCallback) -> TensorMap
     :py:func:`equistore.io.create_torch_array` can be used to load data into
     numpy and torch arrays respectively.
 
-    :param path: path of the file to load
+    When using multiple ``threads``, ``create_array`` is still only called
+    from the current thread.
+
+    :param file: path of the file to load, file-like object opened in binary
+        mode, or in-memory buffer (``bytes``, ``bytearray`` or ``memoryview``)
+        containing the data
     :param create_array: callback used to create arrays as needed
+    :param threads: number of threads used to read the data and decode the
+        labels. ``0`` uses as many threads as there are CPU cores. Multiple
+        threads can only be used when loading from a path.
+    :param keys: selection of the blocks to load, see :py:func:`equistore.load`
+    :param samples: selection of the samples to load
+    :param properties: selection of the properties to load
     """
 
+    _check_threads(threads)
     lib = _get_library()
 
-    ptr = lib.eqs_tensormap_load(
-        path.encode("utf8"), eqs_create_array_callback_t(create_array)
-    )
+    if keys is not None or samples is not None or properties is not None:
+        if not isinstance(file, str):
+            raise ValueError("selections can only be used when loading from a path")
+
+        if threads != 1:
+            raise ValueError("multiple threads can not be used with selections")
+
+        def selection(labels):
+            return None if labels is None else labels._as_eqs_labels_t()
+
+        ptr = lib.eqs_tensormap_load_selected(
+            file.encode("utf8"),
+            eqs_create_array_callback_t(create_array),
+            selection(keys),
+            selection(samples),
+            selection(properties),
+        )
+    elif isinstance(file, str):
+        if threads == 1:
+            ptr = lib.eqs_tensormap_load(
+                file.encode("utf8"), eqs_create_array_callback_t(create_array)
+            )
+        else:
+            ptr = lib.eqs_tensormap_load_parallel(
+                file.encode("utf8"), eqs_create_array_callback_t(create_array), threads
+            )
+    else:
+        if threads != 1:
+            raise ValueError(
+                "multiple threads can only be used when loading from a path"
+            )
+
+        if not isinstance(file, (bytes, bytearray, memoryview)):
+            file = file.read()
+
+        buffer = np.frombuffer(file, dtype=np.uint8)
+        ptr = lib.eqs_tensormap_load_buffer(
+            buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8)),
+            buffer.shape[0],
+            eqs_create_array_callback_t(create_array),
+        )
 
     return TensorMap._from_ptr(ptr)
 
 
-def save(path: str, tensor: TensorMap, use_numpy=False):
-    """Save the given :py:class:`equistore.TensorMap` to a file at ``path``.
+def load_mmap(path: str) -> TensorMap:
+    """
+    Load a previously saved :py:class:`equistore.TensorMap` from the given path,
+    mapping the file in memory instead of reading the data.
+
+    The values and gradients of the blocks are numpy arrays pointing directly
+    inside the file, and the data is only loaded in memory when it is accessed.
+    The file is mapped copy-on-write: modifying the arrays only changes the
+    data in memory, and is never written back to the file. The file itself
+    should not be modified while the :py:class:`equistore.TensorMap` (or any
+    array coming from it) is alive.
+
+    Data can only be mapped if it is stored without compression and aligned
+    inside the file, which is the case for files written by
+    :py:func:`equistore.save` (with ``use_numpy=False``). Other arrays are read
+    in memory instead.
+
+    :param path: path of the file to load
+    """
+    lib = _get_library()
+
+    ptr = lib.eqs_tensormap_load_mmap(path.encode("utf8"))
+    return TensorMap._from_ptr(ptr)
+
+
+class TensorMapReader:
+    """
+    Lazy reader for :py:class:`equistore.TensorMap` saved with
+    :py:func:`equistore.save`.
+
+    Only the keys (and the list of files in the archive) are read when creating
+    the reader, and each block is read from the file the first time it is
+    accessed. This is useful when only a few blocks of a large file are needed:
+
+    .. code-block:: python
+
+        with equistore.io.TensorMapReader("data.npz", cache_size=8) as reader:
+            # only these blocks are read from the file
+            for block in reader.blocks(center_species=6):
+                ...
+
+    The file stays open until :py:meth:`TensorMapReader.close` is called, or
+    until leaving the ``with`` block. Blocks can no longer be read after this.
+
+    Blocks are returned as standalone :py:class:`equistore.TensorBlock`. When
+    caching is enabled, accessing the same block multiple times returns the same
+    object until it is evicted from the cache.
+
+    :param path: path of the file to read
+    :param cache_size: number of blocks to keep in memory after reading them.
+        The least recently used blocks are evicted first when the cache is full.
+        Set this to ``0`` to disable caching, and to ``None`` to keep all blocks.
+    """
+
+    def __init__(self, path: str, cache_size: Optional[int] = 0):
+        if cache_size is not None and cache_size < 0:
+            raise ValueError(f"cache_size must be positive, got {cache_size}")
+
+        self._dictionary = np.load(path)
+        self._keys = _labels_from_npz(self._dictionary["keys"])
+        self._gradient_parameters = _npz_gradient_parameters(self._dictionary)
+
+        self._cache_size = cache_size
+        self._cache = collections.OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for i, key in enumerate(self._keys):
+            yield key, self._get_block_by_id(i)
+
+    @property
+    def keys(self) -> Labels:
+        """The set of keys labeling the blocks in the file."""
+        return self._keys
+
+    def block(self, *args, **kwargs) -> TensorBlock:
+        """
+        Read the block in the file matching the selection made with positional
+        and keyword arguments. This function accepts the same arguments as
+        :py:func:`equistore.TensorMap.block`.
+        """
+        if len(args) == 1 and isinstance(args[0], int):
+            return self._get_block_by_id(args[0])
+
+        matching = self.blocks_matching(*args, **kwargs)
+        if len(matching) != 1:
+            raise ValueError(
+                f"expected a single block matching the selection, got {len(matching)}"
+            )
+
+        return self._get_block_by_id(matching[0])
+
+    def blocks(self, *args, **kwargs) -> List[TensorBlock]:
+        """
+        Read all the blocks in the file matching the selection made with
+        positional and keyword arguments. This function accepts the same
+        arguments as :py:func:`equistore.TensorMap.blocks`.
+        """
+        if len(args) == 1 and isinstance(args[0], int):
+            return [self._get_block_by_id(args[0])]
+
+        return [self._get_block_by_id(i) for i in self.blocks_matching(*args, **kwargs)]
+
+    def blocks_matching(self, *args, **kwargs) -> List[int]:
+        """
+        Get a (possibly empty) list of block indexes matching the selection made
+        with positional and keyword arguments, without reading any block. This
+        function accepts the same arguments as
+        :py:func:`equistore.TensorMap.blocks_matching`.
+        """
+        selection = _block_selection(*args, **kwargs)
+        if len(selection.names) == 0:
+            return list(range(len(self._keys)))
+
+        if len(selection) != 1:
+            raise ValueError(
+                "block selection labels must contain a single row, "
+                f"got {len(selection)}"
+            )
+
+        matching = np.ones(len(self._keys), dtype=bool)
+        for name, value in zip(selection.names, selection[0]):
+            if name not in self._keys.names:
+                raise ValueError(f"'{name}' is not part of the keys for this tensor")
+
+            matching &= self._keys[name] == value
+
+        return [int(i) for i in np.nonzero(matching)[0]]
+
+    def close(self):
+        """
+        Close the underlying file. Blocks that were already read can still be
+        used, but no new block can be read after calling this function.
+        """
+        if self._dictionary is not None:
+            self._dictionary.close()
+            self._dictionary = None
+        self._cache.clear()
+
+    def _get_block_by_id(self, block_i: int) -> TensorBlock:
+        if block_i < 0 or block_i >= len(self._keys):
+            raise IndexError(
+                f"block index {block_i} is out of bounds for a tensor "
+                f"with {len(self._keys)} blocks"
+            )
+
+        block = self._cache.get(block_i)
+        # blocks moved inside a TensorMap can no longer be used
+        if block is not None and block._actual_ptr is not None:
+            self._cache.move_to_end(block_i)
+            return block
+
+        if self._dictionary is None:
+            raise ValueError("can not read blocks from a closed TensorMapReader")
+
+        block = _read_npz_block(self._dictionary, block_i, self._gradient_parameters)
+
+        if self._cache_size != 0:
+            self._cache[block_i] = block
+            self._cache.move_to_end(block_i)
+            if self._cache_size is not None:
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        return block
+
+
+class TensorMapWriter:
+    """
+    Incremental writer for :py:class:`equistore.TensorMap`, adding blocks to
+    the file one at a time.
+
+    This allows to save a :py:class:`equistore.TensorMap` without having all
+    the blocks in memory at the same time. Each block is written to the file as
+    soon as it is added, and the keys are written when calling
+    :py:meth:`TensorMapWriter.finish`, or when leaving the ``with`` block:
+
+    .. code-block:: python
+
+        with equistore.io.TensorMapWriter("data.npz", ["species"]) as writer:
+            for species in all_species:
+                block = compute_block(species)
+                writer.add((species,), block)
+
+    The resulting file is the same as the one written by
+    :py:func:`equistore.save` for a :py:class:`equistore.TensorMap` containing
+    the same keys and blocks.
+
+    :param path: path of the file to write
+    :param names: names of the keys dimensions
+    """
+
+    def __init__(self, path: str, names: Union[str, List[str]]):
+        self._lib = _get_library()
+
+        names = _list_or_str_to_array_c_char(names)
+        self._ptr = self._lib.eqs_tensormap_writer(
+            path.encode("utf8"), names, len(names)
+        )
+        _check_pointer(self._ptr)
+        self._finished = False
+
+    def __del__(self):
+        if hasattr(self, "_lib") and self._lib is not None and hasattr(self, "_ptr"):
+            self._lib.eqs_tensormap_writer_free(self._ptr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # only finish the file if no error happened while adding blocks, and if
+        # the user did not already call `finish`
+        if exc_type is None and not self._finished:
+            self.finish()
+
+    def add(self, key, block: TensorBlock):
+        """
+        Write the ``block`` associated with the given ``key`` to the file.
+
+        The block is not modified and can be used or discarded after this
+        function returns. All the blocks must have the same labels names and
+        set of gradients, and all the keys must be different.
+
+        :param key: values of the key associated with this block
+        :param block: block to write to the file
+        """
+        key = np.array(tuple(key), dtype=np.int32)
+        self._lib.eqs_tensormap_writer_add_block(
+            self._ptr,
+            key.ctypes.data_as(ctypes.POINTER(ctypes.c_int32)),
+            key.shape[0],
+            block._ptr,
+        )
+
+    def finish(self):
+        """
+        Write the keys and finish writing the file. No more blocks can be added
+        after calling this function.
+        """
+        self._lib.eqs_tensormap_writer_finish(self._ptr)
+        self._finished = True
+
+
+# name of the index file in sharded datasets
+_SHARDED_INDEX = "index.npz"
+
+# description of a single block in the index of sharded datasets
+_SHARDED_BLOCKS_DTYPE = [
+    ("shard", np.int32),
+    ("key", np.int32),
+    ("block", np.int32),
+    ("samples", np.int64),
+    ("first_structure", np.int32),
+    ("last_structure", np.int32),
+]
+
+
+def save_sharded(path: str, shards: Iterable[TensorMap]):
+    """
+    Save a dataset made of multiple :py:class:`equistore.TensorMap` (the
+    *shards*) in the directory at ``path``, to be used later with
+    :py:class:`equistore.io.ShardedTensorMap`.
+
+    Each shard is saved in its own file with :py:func:`equistore.save`, and an
+    index file (``index.npz``) records the keys present in each shard, together
+    with the range of ``"structure"`` in the samples of each block. All the
+    shards must have the same keys names, all the blocks must have a
+    ``"structure"`` dimension in their samples, and different shards should
+    contain different structures.
+
+    The shards are saved one at a time, so ``shards`` can be a generator
+    creating them as needed:
+
+    .. code-block:: python
+
+        equistore.io.save_sharded(
+            "dataset", (compute(batch) for batch in batches(structures))
+        )
+
+    :param path: path of the directory where to save the dataset, it is created
+        if it does not exist
+    :param shards: tensor maps to save in the dataset
+    """
+    os.makedirs(path, exist_ok=True)
+
+    keys_names = None
+    all_keys = {}
+    files = []
+    entries = []
+    for shard_i, tensor in enumerate(shards):
+        if keys_names is None:
+            keys_names = tensor.keys.names
+        elif tensor.keys.names != keys_names:
+            raise ValueError(
+                "all shards must have the same keys names, got "
+                f"[{', '.join(tensor.keys.names)}] and [{', '.join(keys_names)}]"
+            )
+
+        for block_i, (key, block) in enumerate(tensor):
+            if "structure" not in block.samples.names:
+                raise ValueError(
+                    "all blocks in a sharded dataset must have a 'structure' "
+                    "dimension in their samples"
+                )
+
+            key_i = all_keys.setdefault(tuple(key), len(all_keys))
+            structures = block.samples["structure"]
+            if len(structures) == 0:
+                first, last = 0, -1
+            else:
+                first, last = np.min(structures), np.max(structures)
+
+            entries.append((shard_i, key_i, block_i, len(structures), first, last))
+
+        file = f"shard-{shard_i}.npz"
+        save(os.path.join(path, file), tensor)
+        files.append(file)
+
+    if keys_names is None:
+        raise ValueError("a sharded dataset must contain at least one shard")
+
+    keys = np.array(list(all_keys.keys()), dtype=np.int32)
+    np.savez(
+        os.path.join(path, _SHARDED_INDEX),
+        keys=Labels(keys_names, keys.reshape(len(all_keys), len(keys_names))),
+        files=np.array(files),
+        blocks=np.array(entries, dtype=_SHARDED_BLOCKS_DTYPE),
+    )
+
+
+class ShardedTensorMap:
+    """
+    Dataset made of multiple :py:class:`equistore.TensorMap` saved with
+    :py:func:`equistore.io.save_sharded`, used as a single logical
+    :py:class:`equistore.TensorMap`.
+
+    Only the index of the dataset is read when creating this object. The shards
+    are read when calling :py:meth:`ShardedTensorMap.load`, using multiple
+    threads, and the blocks associated with the same key in different shards
+    are concatenated along the samples. Selections on the keys and on a range
+    of structures only read the shards (and the blocks inside these shards)
+    containing matching data:
+
+    .. code-block:: python
+
+        dataset = equistore.io.ShardedTensorMap("dataset", threads=4)
+
+        # only reads the shards containing structures 100 to 199
+        tensor = dataset.load(structures=(100, 200))
+
+    :param path: path of the directory containing the dataset
+    :param threads: number of threads used to read the shards. ``0`` uses as
+        many threads as there are CPU cores.
+    """
+
+    def __init__(self, path: str, threads: int = 1):
+        _check_threads(threads)
+
+        index = np.load(os.path.join(path, _SHARDED_INDEX))
+        self._path = path
+        self._threads = threads
+        self._keys = _labels_from_npz(index["keys"])
+        self._files = [str(file) for file in index["files"]]
+        self._blocks = index["blocks"]
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def keys(self) -> Labels:
+        """The set of keys of the blocks in all the shards of this dataset."""
+        return self._keys
+
+    @property
+    def shards(self) -> List[str]:
+        """Paths of the files containing the shards of this dataset."""
+        return [os.path.join(self._path, file) for file in self._files]
+
+    def shards_matching(
+        self,
+        keys: Optional[Labels] = None,
+        structures: Optional[Tuple[int, int]] = None,
+    ) -> List[int]:
+        """
+        Get the list of shards containing data matching the selection, without
+        reading any of them. See :py:meth:`ShardedTensorMap.load` for the
+        meaning of the parameters.
+        """
+        entries = self._matching_entries(keys, structures)
+        return [int(shard) for shard in np.unique(entries["shard"])]
+
+    def load(
+        self,
+        keys: Optional[Labels] = None,
+        structures: Optional[Tuple[int, int]] = None,
+    ) -> TensorMap:
+        """
+        Load the data in this dataset matching the selection as a single
+        :py:class:`equistore.TensorMap`.
+
+        Keys without any data matching the selection are not part of the
+        result.
+
+        :param keys: selection on the keys, which can contain a subset of the
+            keys dimensions. ``None`` selects all keys.
+        :param structures: range of structures to load, as ``(start, stop)``
+            with ``stop`` excluded. ``None`` selects all structures.
+        """
+        entries = self._matching_entries(keys, structures)
+        shards = np.unique(entries["shard"])
+
+        def load_shard(shard_i):
+            shard_keys = self._keys[entries["key"][entries["shard"] == shard_i]]
+            path = os.path.join(self._path, self._files[shard_i])
+            return load(path, keys=shard_keys)
+
+        threads = self._threads if self._threads != 0 else os.cpu_count()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            tensors = dict(zip(shards, executor.map(load_shard, shards)))
+
+        selected_keys = []
+        blocks = []
+        for key_i in np.unique(entries["key"]):
+            key = self._keys[key_i]
+            key_shards = entries["shard"][entries["key"] == key_i]
+            block = _concatenate_samples(
+                [tensors[shard].block(key) for shard in key_shards]
+            )
+
+            if structures is not None:
+                # the index only contains the range of structures in each
+                # block, which can overlap with the selection without any of
+                # the structures being selected
+                block = _select_structures(block, structures)
+                if block is None:
+                    continue
+
+            selected_keys.append(key_i)
+            blocks.append(block)
+
+        return TensorMap(self._keys[np.array(selected_keys, dtype=np.int64)], blocks)
+
+    def _matching_entries(self, keys, structures):
+        """Get the entries in the index matching the given selection"""
+        entries = self._blocks
+        if keys is not None:
+            selected = np.nonzero(_selection_mask(self._keys, keys, "keys"))[0]
+            entries = entries[np.isin(entries["key"], selected)]
+
+        if structures is not None:
+            start, stop = structures
+            overlap = entries["first_structure"] < stop
+            overlap &= entries["last_structure"] >= start
+            entries = entries[overlap]
+
+        return entries
+
+
+def _concatenate_samples(blocks):
+    """
+    Concatenate blocks with the same key coming from different shards along the
+    samples
+    """
+    first = blocks[0]
+    for block in blocks[1:]:
+        same_components = len(block.components) == len(first.components) and all(
+            np.array_equal(a, b) for a, b in zip(block.components, first.components)
+        )
+        if not same_components or not np.array_equal(
+            block.properties, first.properties
+        ):
+            raise ValueError(
+                "blocks with the same key in different shards must have the "
+                "same components and properties"
+            )
+
+    new_block = TensorBlock(
+        values=np.concatenate([block.values for block in blocks]),
+        samples=Labels(
+            first.samples.names,
+            np.concatenate([_labels_values(block.samples) for block in blocks]),
+        ),
+        components=first.components,
+        properties=first.properties,
+    )
+
+    # the "sample" dimension of gradients needs to be shifted by the number of
+    # samples in the previous blocks
+    offsets = np.cumsum([0] + [len(block.samples) for block in blocks[:-1]])
+    for parameter in first.gradients_list():
+        gradients = [block.gradient(parameter) for block in blocks]
+
+        samples = []
+        for offset, gradient in zip(offsets, gradients):
+            values = _labels_values(gradient.samples).copy()
+            values[:, 0] += offset
+            samples.append(values)
+
+        new_block.add_gradient(
+            parameter=parameter,
+            data=np.concatenate([gradient.data for gradient in gradients]),
+            samples=Labels(gradients[0].samples.names, np.concatenate(samples)),
+            components=gradients[0].components,
+        )
+
+    return new_block
+
+
+def _select_structures(block, structures):
+    """
+    Only keep the samples of ``block`` with a structure in the ``(start, stop)``
+    range, returning ``None`` if there are no such samples
+    """
+    start, stop = structures
+    structure = block.samples["structure"]
+    mask = (structure >= start) & (structure < stop)
+    if not np.any(mask):
+        return None
+    elif np.all(mask):
+        return block
+
+    # only the structures actually present in the block are used for slicing,
+    # instead of the full range
+    selected = np.unique(structure[mask]).astype(np.int32).reshape(-1, 1)
+    return _slice_block(block, samples=Labels(["structure"], selected))
+
+
+def save(
+    file: Union[str, BinaryIO],
+    tensor: TensorMap,
+    use_numpy=False,
+    threads: int = 1,
+    compress: bool = False,
+    data_type: str = "float64",
+):
+    """Save the given :py:class:`equistore.TensorMap` to ``file``.
 
     :py:class:`equistore.TensorMap` are serialized using numpy's ``.npz``
-    format, i.e. a ZIP file without compression (storage method is ``STORED``),
-    where each file is stored as a ``.npy`` array. See the C API documentation
-    for more information on the format.
+    format, i.e. a ZIP file where each file is stored as a ``.npy`` array. The
+    files are stored without compression (storage method is ``STORED``) unless
+    ``compress=True``, in which case they are compressed with ``DEFLATE``. See
+    the C API documentation for more information on the format.
 
-    :param path: path of the file where to save the data
+    :param file: path of the file where to save the data, or file-like object
+        opened in binary mode
     :param tensor: tensor to save
     :param use_numpy: should we use numpy or the native implementation? Numpy
         should be able to process more dtypes than the native implementation,
         which is limited to float64, but the native implementation is usually
         faster than going through numpy.
+    :param threads: number of threads used to encode the labels with the native
+        implementation. ``0`` uses as many threads as there are CPU cores. The
+        file is the same regardless of the number of threads.
+    :param compress: should we compress the files in the archive with
+        ``DEFLATE``? Compressed files can still be loaded with
+        :py:func:`numpy.load`, but the data will be copied in memory by
+        :py:func:`equistore.io.load_mmap`.
+    :param data_type: type used to store the values and gradients data, one of
+        ``"float64"``, ``"float32"`` or ``"float16"``. Smaller types reduce the
+        size of the file at the cost of precision. The data is converted back
+        to ``float64`` by :py:func:`equistore.load`, with or without
+        ``use_numpy``.
+
+    ``threads``, ``compress`` and ``data_type`` can only be used with the
+    native implementation when saving to a path.
     """
+    _check_threads(threads, use_numpy)
+    if not isinstance(file, str):
+        if use_numpy:
+            _save_npz(file, tensor, compress, data_type)
+        else:
+            if threads != 1 or compress or data_type != "float64":
+                raise ValueError(
+                    "threads, compress and data_type can only be used when saving "
+                    "to a path with `use_numpy=False`"
+                )
+            file.write(save_buffer(tensor))
+        return
+
+    path = file
     if not path.endswith(".npz"):
         path += ".npz"
         warnings.warn(
@@ -125,11 +831,82 @@ def save(path: str, tensor: TensorMap, use_numpy=False):
         )
 
     if use_numpy:
-        all_entries = _tensor_map_to_dict(tensor)
-        np.savez(path, **all_entries)
+        _save_npz(path, tensor, compress, data_type)
     else:
         lib = _get_library()
-        lib.eqs_tensormap_save(path.encode("utf8"), tensor._ptr)
+        if not compress and data_type == "float64":
+            if threads == 1:
+                lib.eqs_tensormap_save(path.encode("utf8"), tensor._ptr)
+            else:
+                lib.eqs_tensormap_save_parallel(
+                    path.encode("utf8"), tensor._ptr, threads
+                )
+        else:
+            lib.eqs_tensormap_save_with_options(
+                path.encode("utf8"),
+                tensor._ptr,
+                compress,
+                data_type.encode("utf8"),
+                threads,
+            )
+
+
+def save_buffer(tensor: TensorMap, use_numpy=False) -> memoryview:
+    """
+    Save the given :py:class:`equistore.TensorMap` to an in-memory buffer,
+    containing the same data as the file written by :py:func:`equistore.save`.
+
+    The buffer can be loaded again with :py:func:`equistore.io.load_buffer`.
+
+    :param tensor: tensor to save
+    :param use_numpy: should we use numpy or the native implementation?
+    """
+    if use_numpy:
+        buffer = io.BytesIO()
+        _save_npz(buffer, tensor, compress=False, data_type="float64")
+        return buffer.getbuffer()
+
+    # keep the allocated array alive until the end of this function
+    allocated = []
+
+    def realloc(user_data, ptr, new_size):
+        array = np.zeros(new_size, dtype=np.uint8)
+        if len(allocated) != 0:
+            previous = allocated.pop()
+            size = min(previous.shape[0], new_size)
+            array[:size] = previous[:size]
+
+        allocated.append(array)
+        return array.ctypes.data
+
+    lib = _get_library()
+    buffer = ctypes.POINTER(ctypes.c_uint8)()
+    buffer_count = c_uintptr_t()
+    lib.eqs_tensormap_save_buffer(
+        buffer,
+        buffer_count,
+        None,
+        eqs_realloc_buffer_t(realloc),
+        tensor._ptr,
+    )
+
+    return memoryview(allocated[0][: buffer_count.value])
+
+
+def _save_npz(file, tensor, compress, data_type):
+    all_entries = _tensor_map_to_dict(tensor, data_type)
+    if compress:
+        np.savez_compressed(file, **all_entries)
+    else:
+        np.savez(file, **all_entries)
+
+
+def _check_threads(threads, use_numpy=False):
+    if threads < 0:
+        raise ValueError(f"threads must be positive, got {threads}")
+
+    if use_numpy and threads != 1:
+        raise ValueError("multiple threads can not be used with `use_numpy=True`")
 
 
 def _array_to_numpy(array):
@@ -141,12 +918,20 @@ def _array_to_numpy(array):
         raise ValueError("unknown array type passed to `equistore.save`")
 
 
-def _tensor_map_to_dict(tensor_map):
+def _tensor_map_to_dict(tensor_map, data_type="float64"):
+    if data_type not in ["float64", "float32", "float16"]:
+        raise ValueError(
+            f"unknown storage type '{data_type}', expected one of "
+            "'float64', 'float32' or 'float16'"
+        )
+
     result = {"keys": tensor_map.keys}
 
     for block_i, (_, block) in enumerate(tensor_map):
         prefix = f"blocks/{block_i}/values"
-        result[f"{prefix}/data"] = _array_to_numpy(block.values)
+        result[f"{prefix}/data"] = _array_to_numpy(block.values).astype(
+            data_type, copy=False
+        )
         result[f"{prefix}/samples"] = block.samples
         for i, component in enumerate(block.components):
             result[f"{prefix}/components/{i}"] = component
@@ -155,7 +940,9 @@ def _tensor_map_to_dict(tensor_map):
         for parameter in block.gradients_list():
             gradient = block.gradient(parameter)
             prefix = f"blocks/{block_i}/gradients/{parameter}"
-            result[f"{prefix}/data"] = _array_to_numpy(gradient.data)
+            result[f"{prefix}/data"] = _array_to_numpy(gradient.data).astype(
+                data_type, copy=False
+            )
             result[f"{prefix}/samples"] = gradient.samples
             for i, component in enumerate(gradient.components):
                 result[f"{prefix}/components/{i}"] = component
@@ -168,45 +955,85 @@ def _labels_from_npz(data):
     return Labels(names=names, values=data.view(dtype=np.int32).reshape(-1, len(names)))
 
 
-def _read_npz(path):
-    dictionary = np.load(path)
+def _read_npz(file, keys=None, samples=None, properties=None):
+    dictionary = np.load(file)
+
+    all_keys = _labels_from_npz(dictionary["keys"])
+    gradient_parameters = _npz_gradient_parameters(dictionary)
+
+    if keys is None:
+        selected = np.arange(len(all_keys))
+    else:
+        selected = np.nonzero(_selection_mask(all_keys, keys, "keys"))[0]
 
-    keys = _labels_from_npz(dictionary["keys"])
     blocks = []
+    for block_i in selected:
+        block = _read_npz_block(dictionary, block_i, gradient_parameters)
+        if samples is not None or properties is not None:
+            if samples is not None:
+                _selection_mask(block.samples, samples, "samples")
+            if properties is not None:
+                _selection_mask(block.properties, properties, "properties")
+
+            block = _slice_block(block, samples, properties)
+        blocks.append(block)
+
+    return TensorMap(all_keys[selected], blocks)
+
 
+def _selection_mask(labels, selection, kind):
+    """Get a mask of the entries in ``labels`` matching the ``selection``"""
+    for name in selection.names:
+        if name not in labels.names:
+            raise ValueError(f"'{name}' is not part of the {kind} of this tensor")
+
+    return selection.positions(labels[list(selection.names)]) >= 0
+
+
+def _npz_gradient_parameters(dictionary):
+    """Get the list of gradient parameters in a npz file, from the first block"""
     gradient_parameters = []
-    for block_i in range(len(keys)):
-        prefix = f"blocks/{block_i}/values"
-        data = dictionary[f"{prefix}/data"]
+    prefix = "blocks/0/gradients/"
+    for name in dictionary.keys():
+        if name.startswith(prefix) and name.endswith("/data"):
+            gradient_parameters.append(name[len(prefix) : -len("/data")])
 
-        samples = _labels_from_npz(dictionary[f"{prefix}/samples"])
-        components = []
-        for i in range(len(data.shape) - 2):
-            components.append(_labels_from_npz(dictionary[f"{prefix}/components/{i}"]))
+    return gradient_parameters
 
-        properties = _labels_from_npz(dictionary[f"{prefix}/properties"])
 
-        block = TensorBlock(data, samples, components, properties)
+def _read_npz_block(dictionary, block_i, gradient_parameters):
+    """Read a single block from a npz file"""
+    prefix = f"blocks/{block_i}/values"
+    data = _read_npz_data(dictionary, f"{prefix}/data")
 
-        if block_i == 0:
-            prefix = f"blocks/{block_i}/gradients/"
-            for name in dictionary.keys():
-                if name.startswith(prefix) and name.endswith("/data"):
-                    gradient_parameters.append(name[len(prefix) : -len("/data")])
+    samples = _labels_from_npz(dictionary[f"{prefix}/samples"])
+    components = []
+    for i in range(len(data.shape) - 2):
+        components.append(_labels_from_npz(dictionary[f"{prefix}/components/{i}"]))
 
-        for parameter in gradient_parameters:
-            prefix = f"blocks/{block_i}/gradients/{parameter}"
-            data = dictionary[f"{prefix}/data"]
+    properties = _labels_from_npz(dictionary[f"{prefix}/properties"])
 
-            samples = _labels_from_npz(dictionary[f"{prefix}/samples"])
-            components = []
-            for i in range(len(data.shape) - 2):
-                components.append(
-                    _labels_from_npz(dictionary[f"{prefix}/components/{i}"])
-                )
+    block = TensorBlock(data, samples, components, properties)
 
-            block.add_gradient(parameter, data, samples, components)
+    for parameter in gradient_parameters:
+        prefix = f"blocks/{block_i}/gradients/{parameter}"
+        data = _read_npz_data(dictionary, f"{prefix}/data")
 
-        blocks.append(block)
+        samples = _labels_from_npz(dictionary[f"{prefix}/samples"])
+        components = []
+        for i in range(len(data.shape) - 2):
+            components.append(_labels_from_npz(dictionary[f"{prefix}/components/{i}"]))
+
+        block.add_gradient(parameter, data, samples, components)
 
-    return TensorMap(keys, blocks)
+    return block
+
+
+def _read_npz_data(dictionary, name):
+    """Read values or gradients data from a npz file, converting data saved with
+    a smaller floating point type back to float64 like the native implementation
+    """
+    data = dictionary[name]
+    if data.dtype in (np.float32, np.float16):
+        data = data.astype(np.float64)
+    return data
@@ -1,11 +1,13 @@
 import ctypes
 from collections import namedtuple
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
 
 from ._c_api import eqs_labels_t
 from ._c_lib import _get_library
+from .status import EquistoreError
 from .utils import _ptr_to_const_ndarray
 
 
@@ -39,8 +41,11 @@ class Labels(np.ndarray):
         # we can still use all the usual numpy operations
         unique_structures = np.unique(labels["structures"])
 
-    One can also check for the presence of a given entry in Labels, but only if
-    the Labels come from a :py:class:`TensorBlock` or a :py:class:`TensorMap`.
+    One can also check for the presence of a given entry in Labels. The lookup
+    uses the index of the corresponding Rust labels for labels coming from a
+    :py:class:`TensorBlock` or a :py:class:`TensorMap`, and a new index is built
+    (and cached) the first time a lookup happens on labels obtained by slicing
+    or selecting a subset of the dimensions of other labels.
 
     .. code-block:: python
 
@@ -55,6 +60,10 @@ class Labels(np.ndarray):
         # this also works with __contains__
         if (1, 3) in samples:
             ...
+
+        # and with a subset of the dimensions
+        if (1,) in samples[["structure"]]:
+            ...
     """
 
     def __new__(cls, names: Union[List[str], str], values: np.ndarray, **kwargs):
@@ -127,8 +136,10 @@ class Labels(np.ndarray):
     def __array_finalize__(self, obj):
         # do not keep the Rust pointer around around, since one could be taking only a
         # subset of the dimensions (`samples[["structure", "center"]]`) and this
-        # would break `position` and `__contains__`
+        # would break `position` and `__contains__`. A new lookup index is created
+        # on demand by `_lookup_index` instead.
         self._eqs_labels_t = None
+        self._numpy_index = None
 
         self._lib = getattr(obj, "_lib", None)
 
@@ -189,11 +200,18 @@ class Labels(np.ndarray):
             yield named_tuple_class(*entry)
 
     def _as_eqs_labels_t(self):
-        """transform these labels into eqs_labels_t"""
+        """
+        Transform these labels into eqs_labels_t. The returned eqs_labels_t
+        always has an associated Rust data structure, which is shared (instead
+        of being copied) when these labels are used to create blocks or tensor
+        maps.
+        """
         if self._eqs_labels_t is None:
-            return _eqs_labels_view(self)
-        else:
-            return self._eqs_labels_t
+            # labels derived from other labels through slicing, create the Rust
+            # labels once and re-use them afterward
+            self._create_rust_labels()
+
+        return self._eqs_labels_t
 
     @staticmethod
     def _from_eqs_labels_t(eqs_labels):
@@ -210,39 +228,253 @@ class Labels(np.ndarray):
                 ptr=eqs_labels.values, shape=shape, dtype=np.int32
             )
             values.flags.writeable = False
-            return Labels(names, values, _eqs_labels_t=eqs_labels)
         else:
-            return Labels(
-                names=names,
-                values=np.empty(shape=(0, len(names)), dtype=np.int32),
-            )
+            values = np.empty(shape=(0, len(names)), dtype=np.int32)
+
+        return Labels(names, values, _eqs_labels_t=eqs_labels)
 
     def position(self, label) -> Optional[int]:
         """
-        Get the position of the given ``label`` entry in this set of labels.
+        Get the position of the given ``label`` entry in this set of labels, or
+        ``None`` if the entry is not part of these labels.
+        """
+        values = np.ascontiguousarray(tuple(label), dtype=np.int32)
+        if len(values) != len(self.names):
+            raise ValueError(
+                f"expected label of size {len(self.names)} in Labels.position, "
+                f"got size {len(values)}"
+            )
+
+        result = self.positions(values.reshape(1, len(values)))[0]
+        if result >= 0:
+            return int(result)
+        else:
+            return None
+
+    def positions(self, values) -> np.ndarray:
+        """
+        Get the positions of multiple entries in this set of labels at once.
 
-        This is only available if the labels comes from a
-        :py:class:`TensorBlock` or a :py:class:`TensorMap`. If you need it for
-        standalone labels, please let us know!
+        ``values`` should be a 2D array of integers (or another set of
+        :py:class:`Labels`) with one row per entry to look up, and as many
+        columns as there are dimensions in these labels. The result is an array
+        of ``np.int64`` containing the position of each entry, or -1 for entries
+        which are not part of these labels.
+
+        If the same entry is present multiple times in these labels (which can
+        happen when selecting a subset of the dimensions of other labels), the
+        first position is returned.
         """
+        values = np.asarray(values)
+        if values.dtype.names is not None:
+            values = _labels_values(values)
+
+        values = np.ascontiguousarray(values, dtype=np.int32)
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        if len(values.shape) != 2 or values.shape[1] != len(self.names):
+            raise ValueError(
+                f"expected a 2D array with {len(self.names)} columns in "
+                f"Labels.positions, got an array with shape {values.shape}"
+            )
+
+        index = self._lookup_index()
+        if isinstance(index, _NumpyLabelsIndex):
+            return index.positions(values)
+
         lib = _get_library()
+        results = np.empty(values.shape[0], dtype=np.int64)
+        lib.eqs_labels_positions(
+            index,
+            values.ctypes.data_as(ctypes.POINTER(ctypes.c_int32)),
+            values.shape[0],
+            results.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+        )
 
-        result = ctypes.c_int64()
-        values = ctypes.ARRAY(ctypes.c_int32, len(label))()
-        for i, v in enumerate(label):
-            values[i] = ctypes.c_int32(v)
+        return results
 
-        lib.eqs_labels_position(
-            self._eqs_labels_t,
-            values,
-            len(label),
-            result,
+    def union(self, other: "Labels") -> "Labels":
+        """
+        Take the union of these :py:class:`Labels` with ``other``.
+
+        The union contains all the entries of these labels, followed by the entries
+        of ``other`` which are not already part of these labels. Both labels must
+        have the same names.
+
+        If you want to know where entries in ``self`` and ``other`` ended up in the
+        union, you can use :py:meth:`Labels.union_and_mapping`.
+        """
+        union, _, _ = self._set_operation("eqs_labels_union", other, False)
+        return union
+
+    def union_and_mapping(
+        self, other: "Labels"
+    ) -> Tuple["Labels", np.ndarray, np.ndarray]:
+        """
+        Take the union of these :py:class:`Labels` with ``other``, and get the
+        position of each entry of ``self`` and ``other`` in the union.
+
+        :return: the union, followed by two arrays of ``np.int64`` containing the
+            position in the union of each entry of ``self`` and ``other``
+            respectively.
+        """
+        return self._set_operation("eqs_labels_union", other, True)
+
+    def intersection(self, other: "Labels") -> "Labels":
+        """
+        Take the intersection of these :py:class:`Labels` with ``other``.
+
+        The intersection contains all the entries of these labels which are also
+        part of ``other``, in the same order as in these labels. Both labels must
+        have the same names.
+
+        If you want to know where entries in ``self`` and ``other`` ended up in the
+        intersection, you can use :py:meth:`Labels.intersection_and_mapping`.
+        """
+        intersection, _, _ = self._set_operation(
+            "eqs_labels_intersection", other, False
         )
+        return intersection
+
+    def intersection_and_mapping(
+        self, other: "Labels"
+    ) -> Tuple["Labels", np.ndarray, np.ndarray]:
+        """
+        Take the intersection of these :py:class:`Labels` with ``other``, and get
+        the position of each entry of ``self`` and ``other`` in the intersection.
+
+        :return: the intersection, followed by two arrays of ``np.int64``
+            containing the position in the intersection of each entry of ``self``
+            and ``other`` respectively, or -1 for entries which are not part of the
+            intersection.
+        """
+        return self._set_operation("eqs_labels_intersection", other, True)
+
+    def difference(self, other: "Labels") -> "Labels":
+        """
+        Take the difference of these :py:class:`Labels` with ``other``.
+
+        The difference contains all the entries of these labels which are not part
+        of ``other``, in the same order as in these labels. Both labels must have
+        the same names.
+
+        If you want to know where entries in ``self`` ended up in the difference,
+        you can use :py:meth:`Labels.difference_and_mapping`.
+        """
+        difference, _ = self._set_operation("eqs_labels_difference", other, False)
+        return difference
+
+    def difference_and_mapping(self, other: "Labels") -> Tuple["Labels", np.ndarray]:
+        """
+        Take the difference of these :py:class:`Labels` with ``other``, and get the
+        position of each entry of ``self`` in the difference.
+
+        :return: the difference, followed by an array of ``np.int64`` containing the
+            position in the difference of each entry of ``self``, or -1 for entries
+            which are not part of the difference.
+        """
+        return self._set_operation("eqs_labels_difference", other, True)
 
-        if result.value >= 0:
-            return result.value
+    def _set_operation(self, function: str, other: "Labels", mappings: bool):
+        """
+        Call one of the set operation ``function`` from the C API with ``self`` and
+        ``other``, returning the resulting labels and, if ``mappings`` is
+        ``True``, the mapping arrays (``None`` otherwise).
+        """
+        if not isinstance(other, Labels):
+            raise TypeError(f"expected Labels, got {type(other)} instead")
+
+        first = self._set_operation_labels()
+        second = other._set_operation_labels()
+
+        arrays = [np.zeros(len(self), dtype=np.int64)]
+        if function != "eqs_labels_difference":
+            arrays.append(np.zeros(len(other), dtype=np.int64))
+
+        args = []
+        for array in arrays:
+            if mappings:
+                args.append(array.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)))
+                args.append(len(array))
+            else:
+                args.append(None)
+                args.append(0)
+
+        lib = _get_library()
+        result = eqs_labels_t()
+        getattr(lib, function)(first, second, result, *args)
+
+        labels = Labels._from_eqs_labels_t(result)
+
+        if mappings:
+            return (labels, *arrays)
         else:
-            return None
+            return (labels, *(None for _ in arrays))
+
+    def _set_operation_labels(self):
+        """
+        Get the ``eqs_labels_t`` to use for these labels in set operations. This
+        requires the entries in these labels to be unique.
+        """
+        index = self._lookup_index()
+        if isinstance(index, _NumpyLabelsIndex):
+            raise ValueError(
+                "set operations can only be used with Labels containing unique entries"
+            )
+        return index
+
+    def _lookup_index(self):
+        """
+        Get the index used to look up entries in these labels. This is either
+        an ``eqs_labels_t`` with an associated Rust data structure, or a
+        :py:class:`_NumpyLabelsIndex` when the entries are not unique.
+
+        Labels derived from other labels through slicing or by selecting some of
+        the dimensions do not have an associated Rust data structure, so this
+        function builds one the first time it is called, and caches it.
+        """
+        if self._eqs_labels_t is not None:
+            return self._eqs_labels_t
+
+        if self._numpy_index is not None:
+            return self._numpy_index
+
+        try:
+            self._create_rust_labels()
+        except EquistoreError:
+            # the entries are not unique, use a slower lookup implemented with
+            # numpy instead
+            self._numpy_index = _NumpyLabelsIndex(_labels_values(self))
+            return self._numpy_index
+
+        return self._eqs_labels_t
+
+    def _create_rust_labels(self):
+        """
+        Create the Rust data structure associated with these labels, and store
+        it in ``self._eqs_labels_t``. This raises an :py:class:`EquistoreError`
+        if the entries in these labels are not unique.
+        """
+        lib = _get_library()
+        values = _labels_values(self)
+
+        names = ctypes.ARRAY(ctypes.c_char_p, len(self.names))()
+        for i, n in enumerate(self.names):
+            names[i] = n.encode("utf8")
+
+        labels = eqs_labels_t()
+        labels.internal_ptr_ = None
+        labels.names = names
+        labels.values = values.ctypes.data_as(ctypes.POINTER(ctypes.c_int32))
+        labels.size = len(self.names)
+        labels.count = values.shape[0]
+
+        lib.eqs_labels_create(labels)
+
+        # keep the Rust labels around, they will be released in `__del__`
+        self._eqs_labels_t = labels
+        self._lib = lib
 
     def asarray(self):
         """Get a view of these ``Labels`` as a raw 2D array of integers"""
@@ -252,6 +484,52 @@ class Labels(np.ndarray):
         return self.position(label) is not None
 
 
+class _NumpyLabelsIndex:
+    """
+    Lookup index for labels with non-unique entries, based on a stable sort of
+    the rows of the labels, seen as opaque bytes.
+    """
+
+    def __init__(self, values: np.ndarray):
+        rows = _as_void_rows(values)
+
+        self._order = np.argsort(rows, kind="stable")
+        self._sorted = rows[self._order]
+
+    def positions(self, values: np.ndarray) -> np.ndarray:
+        if len(self._sorted) == 0:
+            return np.full(len(values), -1, dtype=np.int64)
+
+        rows = _as_void_rows(values)
+        index = np.searchsorted(self._sorted, rows)
+        index[index == len(self._sorted)] = 0
+
+        found = self._sorted[index] == rows
+        return np.where(found, self._order[index], -1).astype(np.int64)
+
+
+def _as_void_rows(values: np.ndarray) -> np.ndarray:
+    """
+    View each row of a C-contiguous 2D array of ``np.int32`` as a single opaque
+    entry, to be able to sort and compare them.
+    """
+    dtype = np.dtype((np.void, values.dtype.itemsize * values.shape[1]))
+    return values.view(dtype).reshape(values.shape[0])
+
+
+def _labels_values(array) -> np.ndarray:
+    """
+    Get the values of a structured array of labels as a C-contiguous 2D array
+    of ``np.int32``, even when only a subset of the dimensions was selected.
+    """
+    if array.dtype.names is None:
+        # labels without any dimension
+        return np.ascontiguousarray(array, dtype=np.int32).reshape(len(array), -1)
+
+    values = structured_to_unstructured(np.asarray(array), dtype=np.int32)
+    return np.ascontiguousarray(values.reshape(len(array), len(array.dtype.names)))
+
+
 def _eqs_labels_view(array):
     """Create a new eqs_label_t where the values are a view inside the array"""
     labels = eqs_labels_t()
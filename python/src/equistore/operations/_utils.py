@@ -0,0 +1,10 @@
+def _broadcast_to_gradient(values, gradient_data):
+    """
+    Reshape ``values`` (gathered for each gradient sample) to be broadcastable
+    against ``gradient_data``, which can contain additional gradient-specific
+    components before the values components.
+    """
+    n_gradient_components = len(gradient_data.shape) - len(values.shape)
+    return values.reshape(
+        (values.shape[0],) + (1,) * n_gradient_components + tuple(values.shape[1:])
+    )
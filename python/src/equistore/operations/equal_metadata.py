@@ -197,7 +197,7 @@ def _check_maps(a: TensorMap, b: TensorMap, fname: str):
             f"Got {len(a.blocks())} and {len(b.blocks())}."
         )
 
-    if not np.all([key in a.keys for key in b.keys]):
+    if not np.all(a.blocks_matching_keys(b.keys) >= 0):
         raise ValueError(f"Inputs to {fname} should have the same key indices.")
 
 
@@ -226,6 +226,8 @@ def _check_blocks(a: TensorBlock, b: TensorBlock, props: List[str], fname: str):
             if not np.all(a.samples == b.samples):
                 raise ValueError(err_msg + err_msg_1)
         elif prop == "properties":
+            if _same_rust_labels(a.properties, b.properties):
+                continue
             if not len(a.properties) == len(b.properties):
                 raise ValueError(err_msg + err_msg_len)
             if not a.properties.names == b.properties.names:
@@ -237,6 +239,9 @@ def _check_blocks(a: TensorBlock, b: TensorBlock, props: List[str], fname: str):
                 raise ValueError(err_msg + err_msg_len)
 
             for c1, c2 in zip(a.components, b.components):
+                if _same_rust_labels(c1, c2):
+                    continue
+
                 if not (c1.names == c2.names):
                     raise ValueError(err_msg + err_msg_names)
 
@@ -317,6 +322,9 @@ def _check_same_gradients(a: TensorBlock, b: TensorBlock, props: List[str], fnam
                         raise ValueError(err_msg + err_msg_len)
 
                     for c1, c2 in zip(grad_a.components, grad_b.components):
+                        if _same_rust_labels(c1, c2):
+                            continue
+
                         if not (c1.names == c2.names):
                             raise ValueError(err_msg + err_msg_names)
 
@@ -343,12 +351,24 @@ def _check_parameters_in_gradient_block(
             )
 
 
+def _same_rust_labels(a: Labels, b: Labels) -> bool:
+    """
+    Check if ``a`` and ``b`` are backed by the same Rust-side labels. Blocks in
+    a :py:class:`TensorMap` share identical components and properties, so this
+    allows to skip the value-by-value comparison in the common case.
+    """
+    return (
+        a._eqs_labels_t is not None
+        and b._eqs_labels_t is not None
+        and a._eqs_labels_t.internal_ptr_ is not None
+        and a._eqs_labels_t.internal_ptr_ == b._eqs_labels_t.internal_ptr_
+    )
+
+
 def _labels_equal(a: Labels, b: Labels, exact_order: bool):
     """
     For 2 :py:class:`Labels` objects ``a`` and ``b``, returns true if they are
-    exactly equivalent in names, values, and elemental positions. Assumes that
-    the Labels are already searchable, i.e. they belong to a parent TensorBlock
-    or TensorMap.
+    exactly equivalent in names, values, and elemental positions.
     """
     # They can only be equivalent if the same length
     if len(a) != len(b):
@@ -358,4 +378,4 @@ def _labels_equal(a: Labels, b: Labels, exact_order: bool):
         return False
     if exact_order:
         return np.all(np.array(a == b))
-    return np.all([a_i in b for a_i in a])
+    return np.all(b.positions(a) >= 0)
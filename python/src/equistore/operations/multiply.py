@@ -3,8 +3,9 @@ from typing import Union
 import numpy as np
 
 from ..block import TensorBlock
+from ..labels import Labels
 from ..tensor import TensorMap
-from . import _dispatch
+from ._utils import _broadcast_to_gradient
 from .equal_metadata import _check_blocks, _check_maps, _check_same_gradients
 
 
@@ -46,10 +47,12 @@ def multiply(A: TensorMap, B: Union[float, TensorMap]) -> TensorMap:
                 props=["samples", "components", "properties"],
                 fname="multiply",
             )
+            # the gradients samples can be in a different order, they are
+            # matched (and validated) in _multiply_block_block
             _check_same_gradients(
                 blockA,
                 blockB,
-                props=["samples", "components", "properties"],
+                props=["components", "properties"],
                 fname="multiply",
             )
             blocks.append(_multiply_block_block(block1=blockA, block2=blockB))
@@ -96,23 +99,48 @@ def _multiply_block_block(block1: TensorBlock, block2: TensorBlock) -> TensorBlo
         properties=block1.properties,
     )
 
-    for parameter1, gradient1 in block1.gradients():
-        gradient2 = block2.gradient(parameter1)
-        values_grad = []
-        for isample in range(len(block1.samples)):
-            isample_grad1 = np.where(gradient1.samples["sample"] == isample)[0]
-            isample_grad2 = np.where(gradient2.samples["sample"] == isample)[0]
-            values_grad.append(
-                block1.values[isample] * gradient2.data[isample_grad2]
-                + gradient1.data[isample_grad1] * block2.values[isample]
-            )
-        values_grad = _dispatch.concatenate(values_grad, axis=0)
+    for parameter, gradient1 in block1.gradients():
+        gradient2 = block2.gradient(parameter)
+
+        gradient_samples = gradient1.samples
+        # index of the sample in the values for each gradient row
+        samples = np.asarray(gradient_samples["sample"], dtype=np.int64)
+
+        gradient1_data = gradient1.data
+        gradient2_data = gradient2.data
+        if not _same_rows(gradient_samples, gradient2.samples):
+            # the rows of the two gradients are not in the same order, find the
+            # row of gradient2 corresponding to each row of gradient1
+            rows = None
+            if gradient2.samples.names == gradient_samples.names and len(
+                gradient2.samples
+            ) == len(gradient_samples):
+                rows = gradient2.samples.positions(gradient_samples)
+
+            if rows is None or np.any(rows < 0):
+                raise ValueError(
+                    f"the gradients with respect to '{parameter}' must have the "
+                    "same samples in both blocks"
+                )
+            gradient2_data = gradient2_data[rows]
+
+        values1 = _broadcast_to_gradient(block1.values[samples], gradient2_data)
+        values2 = _broadcast_to_gradient(block2.values[samples], gradient1_data)
+        values_grad = values1 * gradient2_data + gradient1_data * values2
 
         result_block.add_gradient(
-            parameter1,
+            parameter,
             values_grad,
-            gradient1.samples,
+            gradient_samples,
             gradient1.components,
         )
 
     return result_block
+
+
+def _same_rows(samples_1: Labels, samples_2: Labels) -> bool:
+    """Check if the two sets of gradient samples contain the same rows in the same
+    order"""
+    if len(samples_1) != len(samples_2) or samples_1.names != samples_2.names:
+        return False
+    return bool(np.all(samples_1 == samples_2))
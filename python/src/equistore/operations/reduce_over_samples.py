@@ -46,7 +46,9 @@ import numpy as np
 
 from equistore import Labels, TensorBlock, TensorMap
 
+from ..tensor import _list_or_str_to_array_c_char
 from . import _dispatch
+from ._utils import _broadcast_to_gradient
 
 
 def _reduce_over_samples_block(
@@ -85,6 +87,10 @@ def _reduce_over_samples_block(
         assert sample in block_samples.names
 
     assert reduction in ["sum", "mean", "var", "std"]
+
+    if _can_reduce_natively(block, remaining_samples):
+        return _reduce_over_samples_block_native(block, remaining_samples, reduction)
+
     # get the indices of the selected sample
     sample_selected = [
         block_samples.names.index(sample) for sample in remaining_samples
@@ -205,6 +211,9 @@ def _reduce_over_samples_block(
             .copy()
         )
 
+        # index of the sample in the input block for each gradient sample
+        gradient_samples_index = samples[:, 0].copy()
+
         # change the first columns of the samples array with the mapping
         # between samples and gradient.samples
         samples[:, 0] = index[samples[:, 0]]
@@ -227,10 +236,9 @@ def _reduce_over_samples_block(
                 (-1,) + (1,) * len(other_shape)
             )
             if reduction == "std" or reduction == "var":
-                values_times_data = _dispatch.zeros_like(gradient_data)
-
-                for i, s in enumerate(gradient.samples):
-                    values_times_data[i] = gradient_data[i] * block_values[s[0]]
+                values_times_data = gradient_data * _broadcast_to_gradient(
+                    block_values[gradient_samples_index], gradient_data
+                )
 
                 values_grad_result = _dispatch.zeros_like(
                     gradient_data,
@@ -245,26 +253,29 @@ def _reduce_over_samples_block(
                 values_grad_result = values_grad_result / bincount.reshape(
                     (-1,) + (1,) * len(other_shape)
                 )
+                # index of the new sample for each new gradient sample
+                new_samples_index = new_gradient_samples[:, 0]
+                data_result = data_result * _broadcast_to_gradient(
+                    values_mean[new_samples_index], data_result
+                )
                 if reduction == "var":
-                    for i, s in enumerate(new_gradient_samples):
-                        data_result[i] = data_result[i] * values_mean[s[0]]
                     data_result = 2 * (values_grad_result - data_result)
                 else:  # std
-                    for i, s in enumerate(new_gradient_samples):
-                        # only numpy raise a warning for division by zero
-                        # so the statement catch that
-                        # for torch there is nothing to catch
-                        # both numpy and torch give inf for the division by zero
-                        with np.errstate(divide="ignore", invalid="ignore"):
-                            data_result[i] = (
-                                values_grad_result[i]
-                                - (data_result[i] * values_mean[s[0]])
-                            ) / values_result[s[0]]
-
-                        data_result[i] = _dispatch.nan_to_num(
-                            data_result[i], nan=0.0, posinf=0.0, neginf=0.0
+                    # only numpy raise a warning for division by zero
+                    # so the statement catch that
+                    # for torch there is nothing to catch
+                    # both numpy and torch give inf for the division by zero
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        data_result = (
+                            values_grad_result - data_result
+                        ) / _broadcast_to_gradient(
+                            values_result[new_samples_index], data_result
                         )
 
+                    data_result = _dispatch.nan_to_num(
+                        data_result, nan=0.0, posinf=0.0, neginf=0.0
+                    )
+
         # no check for the len of the gradient sample is needed becouse there always
         # will be at least one sample in the gradient
 
@@ -278,6 +289,43 @@ def _reduce_over_samples_block(
     return result_block
 
 
+def _can_reduce_natively(block: TensorBlock, remaining_samples: List[str]) -> bool:
+    """
+    Check if the reduction of ``block`` can be done by the equistore-core
+    library, which requires float64 numpy arrays with contiguous data, and
+    ``remaining_samples`` in the same order as in the block samples.
+    """
+    names = block.samples.names
+    if remaining_samples != [name for name in names if name in remaining_samples]:
+        return False
+
+    arrays = [block.values] + [gradient.data for _, gradient in block.gradients()]
+    return all(
+        isinstance(array, np.ndarray)
+        and array.dtype == np.float64
+        and array.flags.c_contiguous
+        for array in arrays
+    )
+
+
+def _reduce_over_samples_block_native(
+    block: TensorBlock, remaining_samples: List[str], reduction: str
+) -> TensorBlock:
+    """
+    Reduce ``block`` with ``eqs_block_reduce_samples``, grouping the samples
+    and accumulating the values and gradients in a single pass.
+    """
+    sample_names = [
+        name for name in block.samples.names if name not in remaining_samples
+    ]
+    c_sample_names = _list_or_str_to_array_c_char(sample_names)
+
+    ptr = block._lib.eqs_block_reduce_samples(
+        block._ptr, c_sample_names, len(sample_names), reduction.encode("utf8")
+    )
+    return TensorBlock._from_ptr(ptr, parent=None)
+
+
 def _reduce_over_samples(
     tensor: TensorMap, sample_names: Union[List[str], str], reduction: str
 ) -> TensorMap:
@@ -201,21 +201,15 @@ def _slice_block(
 
     # Generate arrays of bools indicating which samples indices to keep upon slicing.
     if samples is not None:
-        all_samples = block.samples[list(samples.names)].tolist()
-        set_samples_to_slice = set(samples.tolist())
-        samples_filter = np.array(
-            [sample in set_samples_to_slice for sample in all_samples]
-        )
+        all_samples = block.samples[list(samples.names)]
+        samples_filter = samples.positions(all_samples) >= 0
         new_values = new_values[samples_filter]
         new_samples = new_samples[samples_filter]
 
     # Generate array of bools indicating which properties indices to keep upon slicing.
     if properties is not None:
-        all_properties = block.properties[list(properties.names)].tolist()
-        set_properties_to_slice = set(properties.tolist())
-        properties_filter = np.array(
-            [prop in set_properties_to_slice for prop in all_properties]
-        )
+        all_properties = block.properties[list(properties.names)]
+        properties_filter = properties.positions(all_properties) >= 0
         new_values = new_values[..., properties_filter]
         new_properties = new_properties[properties_filter]
 
@@ -232,12 +226,8 @@ def _slice_block(
     if samples is not None:
         # sample_map contains at position old_sample the index of the
         # corresponding new sample
-        sample_map = np.full(shape=len(samples_filter), fill_value=-1)
-        last = 0
-        for i, picked in enumerate(samples_filter):
-            if picked:
-                sample_map[i] = last
-                last += 1
+        sample_map = np.cumsum(samples_filter) - 1
+        sample_map[~samples_filter] = -1
 
     # Slice each Gradient TensorBlock and add to the new_block.
     for parameter, gradient in block.gradients():
@@ -1,9 +1,10 @@
-from typing import List, Union
+from typing import List, Tuple, Union
+
+import numpy as np
 
 from ..block import TensorBlock
-from ..labels import Labels
+from ..labels import Labels, _labels_values
 from ..tensor import TensorMap
-from .slice import _slice_block
 
 
 def split(
@@ -149,23 +150,165 @@ def _split_block(
 ) -> List[TensorBlock]:
     """
     Splits a TensorBlock into mutliple blocks, as in the public function
-    :py:func:`split_block` but with no input checks. Note that the block is
-    currently split into N new blocks by performing N number of slice
-    operations. There may be a more efficient way of doing it, but this is not
-    yet implemented.
+    :py:func:`split_block` but with no input checks. All the samples (or
+    properties) of the block are assigned to their group(s) in a single pass,
+    and the new blocks are then created with a single gather for the values
+    and for each gradient.
+    """
+    if len(grouped_idxs) == 0:
+        return []
+
+    names = list(grouped_idxs[0].names)
+    if axis == "samples":
+        entries = block.samples[names]
+    else:  # properties
+        entries = block.properties[names]
+
+    all_values = np.concatenate([_labels_values(idxs) for idxs in grouped_idxs])
+    all_groups = np.repeat(
+        np.arange(len(grouped_idxs)), [len(idxs) for idxs in grouped_idxs]
+    )
+
+    # assign each entry to the corresponding unique group value, and from
+    # there to all the groups containing this value
+    unique_values, unique_inverse = np.unique(all_values, axis=0, return_inverse=True)
+    unique_values = Labels(names, unique_values)
+    selected = [
+        rows
+        for rows, _ in _partition(
+            owners=unique_values.positions(entries),
+            pair_owners=unique_inverse.reshape(-1),
+            pair_groups=all_groups,
+            n_owners=len(unique_values),
+            n_groups=len(grouped_idxs),
+        )
+    ]
+
+    if axis == "samples":
+        return _take_samples(block, selected)
+    else:  # properties
+        return _take_properties(block, selected)
+
+
+def _take_samples(block: TensorBlock, selected: List[np.ndarray]):
+    """
+    Create one new block for each array of samples indices in ``selected``,
+    including the corresponding gradients.
     """
     new_blocks = []
-    for indices in grouped_idxs:
-        # Perfom the slice, either along the samples or properties axis
-        if axis == "samples":
-            new_block = _slice_block(block, samples=indices)
-        else:  # properties
-            new_block = _slice_block(block, properties=indices)
+    for samples in selected:
+        new_blocks.append(
+            TensorBlock(
+                values=block.values[samples],
+                samples=block.samples[samples],
+                components=block.components,
+                properties=block.properties,
+            )
+        )
+
+    # index of each selected sample in the corresponding new block
+    pair_samples = np.concatenate(selected)
+    pair_groups = np.repeat(np.arange(len(selected)), [len(s) for s in selected])
+    pair_new_samples = np.concatenate([np.arange(len(s)) for s in selected])
+
+    for parameter, gradient in block.gradients():
+        gradient_samples = _labels_values(gradient.samples)
+
+        partition = _partition(
+            owners=gradient_samples[:, 0],
+            pair_owners=pair_samples,
+            pair_groups=pair_groups,
+            n_owners=len(block.samples),
+            n_groups=len(selected),
+        )
+
+        for new_block, (rows, pairs) in zip(new_blocks, partition):
+            # update the "sample" column of the gradient samples to refer to the
+            # new samples
+            new_gradient_samples = gradient_samples[rows]
+            new_gradient_samples[:, 0] = pair_new_samples[pairs]
+
+            new_block.add_gradient(
+                parameter=parameter,
+                samples=Labels(gradient.samples.names, new_gradient_samples),
+                components=gradient.components,
+                data=gradient.data[rows],
+            )
+
+    return new_blocks
+
+
+def _take_properties(block: TensorBlock, selected: List[np.ndarray]):
+    """
+    Create one new block for each array of properties indices in ``selected``,
+    including the corresponding gradients.
+    """
+    new_blocks = []
+    for properties in selected:
+        new_block = TensorBlock(
+            values=block.values[..., properties],
+            samples=block.samples,
+            components=block.components,
+            properties=block.properties[properties],
+        )
+
+        for parameter, gradient in block.gradients():
+            new_block.add_gradient(
+                parameter=parameter,
+                samples=gradient.samples,
+                components=gradient.components,
+                data=gradient.data[..., properties],
+            )
+
         new_blocks.append(new_block)
 
     return new_blocks
 
 
+def _partition(
+    owners: np.ndarray,
+    pair_owners: np.ndarray,
+    pair_groups: np.ndarray,
+    n_owners: int,
+    n_groups: int,
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Distribute the entries of ``owners`` into groups, according to the
+    ``(pair_owners[i], pair_groups[i])`` pairs defining which owner belongs to
+    which group(s). Entries of ``owners`` set to -1 do not belong to any group.
+
+    This returns one tuple for each group, containing the indices in ``owners``
+    belonging to this group (in increasing order), and the index of the
+    corresponding pair.
+    """
+    if len(pair_owners) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return [(empty, empty) for _ in range(n_groups)]
+
+    pairs_order = np.argsort(pair_owners, kind="stable")
+    pairs_count = np.bincount(pair_owners, minlength=n_owners)
+    pairs_start = np.cumsum(pairs_count) - pairs_count
+
+    owners = np.asarray(owners, dtype=np.int64)
+    counts = np.where(owners >= 0, pairs_count[owners], 0)
+    rows = np.repeat(np.arange(len(owners)), counts)
+
+    # position of each pair in the list of pairs of the corresponding owner
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pairs = pairs_order[np.repeat(pairs_start[owners], counts) + offsets]
+
+    groups = pair_groups[pairs]
+    groups_order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[groups_order], np.arange(n_groups + 1))
+
+    partition = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        group = groups_order[start:stop]
+        partition.append((rows[group], pairs[group]))
+
+    return partition
+
+
 def _check_args(
     tensor: Union[TensorMap, TensorBlock], axis: str, grouped_idxs: List[Labels]
 ):
@@ -1,6 +1,6 @@
 import copy
 import ctypes
-from typing import List, Union
+from typing import Dict, List, Union
 
 import numpy as np
 
@@ -57,6 +57,7 @@ class TensorMap:
             keys._as_eqs_labels_t(), blocks_array, len(blocks)
         )
         _check_pointer(self._ptr)
+        self._keys = None
 
     @staticmethod
     def _from_ptr(ptr):
@@ -66,6 +67,7 @@ class TensorMap:
         obj._lib = _get_library()
         obj._ptr = ptr
         obj._blocks = []
+        obj._keys = None
         return obj
 
     def __del__(self):
@@ -164,9 +166,14 @@ class TensorMap:
     @property
     def keys(self) -> Labels:
         """The set of keys labeling the blocks in this tensor map."""
-        result = eqs_labels_t()
-        self._lib.eqs_tensormap_keys(self._ptr, result)
-        return Labels._from_eqs_labels_t(result)
+        if self._keys is None:
+            # the keys can not change after the tensor map is created, so they
+            # are only converted to Python once
+            result = eqs_labels_t()
+            self._lib.eqs_tensormap_keys(self._ptr, result)
+            self._keys = Labels._from_eqs_labels_t(result)
+
+        return self._keys
 
     def block(self, *args, **kwargs) -> TensorBlock:
         """
@@ -214,13 +221,13 @@ class TensorMap:
             return f"'{', '.join(kv)}'"
 
         if len(matching) == 0:
-            selection = next(selection.as_namedtuples())
+            selection = next(_selection_labels(selection).as_namedtuples())
             raise ValueError(
                 "Couldn't find any block matching the selection "
                 f"{_format_selection(selection)}"
             )
         elif len(matching) > 1:
-            selection = next(selection.as_namedtuples())
+            selection = next(_selection_labels(selection).as_namedtuples())
             raise ValueError(
                 f"more than one block matched {_format_selection(selection)}, "
                 "use `TensorMap.blocks` if you want to get all of them"
@@ -269,7 +276,7 @@ class TensorMap:
         )
 
         if len(matching) == 0:
-            selection = next(selection.as_namedtuples())
+            selection = next(_selection_labels(selection).as_namedtuples())
             raise ValueError(
                 f"Couldn't find any block matching the selection {selection.as_dict()}"
             )
@@ -283,57 +290,59 @@ class TensorMap:
         different kinds of argument, similarly to :py:func:`TensorMap.block`.
         """
         return_selection = kwargs.pop("__return_selection", False)
+        selection = _block_selection_values(*args, **kwargs)
 
-        selection = None
-        if args:
-            if len(args) > 1:
-                raise ValueError(
-                    f"only one non-keyword argument is supported, {len(args)} are given"
-                )
+        keys = self.keys
+        if (
+            isinstance(selection, dict)
+            and len(selection) != 0
+            and sorted(selection) == sorted(keys.names)
+        ):
+            # the selection contains a single full key, directly look for it
+            # in the keys instead of creating new Labels
+            values = _selection_array([selection[name] for name in keys.names])
+            position = keys.position(values)
+            result = [] if position is None else [position]
+        else:
+            block_indexes = ctypes.ARRAY(c_uintptr_t, len(keys))()
+            count = c_uintptr_t(block_indexes._length_)
+
+            self._lib.eqs_tensormap_blocks_matching(
+                self._ptr,
+                block_indexes,
+                count,
+                _selection_labels(selection)._as_eqs_labels_t(),
+            )
 
-            arg = args[0]
-            if isinstance(arg, Labels):
-                selection = arg
-            elif isinstance(arg, np.void):
-                # single entry from an Labels array
-                return self.blocks_matching(
-                    **{name: arg[i] for i, name in enumerate(arg.dtype.names)},
-                    __return_selection=return_selection,
-                )
-            elif _is_namedtuple(arg):
-                return self.blocks_matching(
-                    **arg.as_dict(),
-                    __return_selection=return_selection,
-                )
-            else:
-                raise ValueError(
-                    f"got unexpected object in `TensorMap.blocks_matching`: {type(arg)}"
-                )
+            result = []
+            for i in range(count.value):
+                result.append(int(block_indexes[i]))
 
-        if selection is None:
-            selection = Labels(
-                kwargs.keys(),
-                np.array(list(kwargs.values()), dtype=np.int32).reshape(1, -1),
-            )
+        if return_selection:
+            return result, selection
+        else:
+            return result
 
-        block_indexes = ctypes.ARRAY(c_uintptr_t, len(self.keys))()
-        count = c_uintptr_t(block_indexes._length_)
+    def blocks_matching_keys(self, selection: Labels) -> np.ndarray:
+        """
+        Get the index of the block matching each entry in ``selection`` at
+        once, or -1 for entries which do not correspond to any block.
+
+        ``selection`` must contain all the dimensions of the keys of this
+        tensor map, potentially in a different order. This is faster than
+        calling :py:func:`TensorMap.blocks_matching` for each entry.
 
-        self._lib.eqs_tensormap_blocks_matching(
+        :param selection: :py:class:`Labels` containing the keys to look for
+        """
+        result = np.empty(len(selection), dtype=np.int64)
+        self._lib.eqs_tensormap_blocks_matching_keys(
             self._ptr,
-            block_indexes,
-            count,
+            result.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            len(result),
             selection._as_eqs_labels_t(),
         )
 
-        result = []
-        for i in range(count.value):
-            result.append(int(block_indexes[i]))
-
-        if return_selection:
-            return result, selection
-        else:
-            return result
+        return result
 
     def _get_block_by_id(self, id) -> TensorBlock:
         block = ctypes.POINTER(eqs_block_t)()
@@ -471,6 +480,69 @@ def _normalize_keys_to_move(keys_to_move: Union[str, List[str], Labels]):
     return keys_to_move
 
 
+def _block_selection(*args, **kwargs) -> Labels:
+    """
+    Get the :py:class:`Labels` corresponding to a block selection made with
+    positional and keyword arguments, as accepted by
+    :py:func:`TensorMap.blocks_matching`.
+    """
+    return _selection_labels(_block_selection_values(*args, **kwargs))
+
+
+def _block_selection_values(*args, **kwargs) -> Union[Labels, Dict[str, int]]:
+    """
+    Get the values of a block selection made with positional and keyword
+    arguments, either as a dictionary for selections with a single entry, or
+    as :py:class:`Labels` if the selection was already given as labels.
+    """
+    if args:
+        if len(args) > 1:
+            raise ValueError(
+                f"only one non-keyword argument is supported, {len(args)} are given"
+            )
+
+        arg = args[0]
+        if isinstance(arg, Labels):
+            return arg
+        elif isinstance(arg, np.void):
+            # single entry from an Labels array
+            return {name: arg[i] for i, name in enumerate(arg.dtype.names)}
+        elif _is_namedtuple(arg):
+            return arg.as_dict()
+        else:
+            raise ValueError(
+                f"got unexpected object in `TensorMap.blocks_matching`: {type(arg)}"
+            )
+
+    return kwargs
+
+
+def _selection_labels(selection: Union[Labels, Dict[str, int]]) -> Labels:
+    """Get a block selection created by ``_block_selection_values`` as Labels"""
+    if isinstance(selection, Labels):
+        return selection
+
+    return Labels(
+        selection.keys(),
+        _selection_array(selection.values()).reshape(1, -1),
+    )
+
+
+def _selection_array(values) -> np.ndarray:
+    """
+    Get the values of a block selection as an array of ``np.int32``, refusing
+    values that can not be safely converted (e.g. floating point values).
+    """
+    values = np.array(list(values))
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    try:
+        return values.astype(np.int32, casting="same_kind")
+    except TypeError as e:
+        raise TypeError("Labels values must be convertible to integers") from e
+
+
 def _list_or_str_to_array_c_char(strings: Union[str, List[str]]):
     if isinstance(strings, str):
         strings = [strings]
@@ -208,6 +208,89 @@ properties (2): ['properties']"""
         assert tuple(copy.samples[1]) == (2,)
         assert tuple(copy.samples[2]) == (4,)
 
+    def test_shared_labels(self, block):
+        # labels coming from a block are shared with new blocks
+        samples = block.samples
+        new_block = TensorBlock(
+            values=block.values,
+            samples=samples,
+            components=block.components,
+            properties=block.properties,
+        )
+        new_samples = new_block.samples
+        assert (
+            new_samples._as_eqs_labels_t().internal_ptr_
+            == samples._as_eqs_labels_t().internal_ptr_
+        )
+
+        # labels derived by slicing only create their Rust labels once
+        sliced = samples[::-1]
+        ptr = sliced._as_eqs_labels_t().internal_ptr_
+        assert ptr is not None
+        assert sliced._as_eqs_labels_t().internal_ptr_ == ptr
+
+        new_block = TensorBlock(
+            values=block.values[::-1],
+            samples=sliced,
+            components=block.components,
+            properties=block.properties,
+        )
+        assert new_block.samples._as_eqs_labels_t().internal_ptr_ == ptr
+
+        # empty labels also keep their Rust labels
+        empty = TensorBlock(
+            values=np.zeros((0, 2)),
+            samples=Labels.empty(["samples"]),
+            components=[],
+            properties=block.properties,
+        )
+        assert empty.samples._as_eqs_labels_t().internal_ptr_ is not None
+
+    def test_cached_wrappers(self, block):
+        assert block.values is block.values
+        assert block.samples is block.samples
+        assert block.properties is block.properties
+
+        assert block.gradients_list() == []
+        block.add_gradient(
+            "parameter",
+            data=np.full((1, 2), 11.0),
+            samples=Labels(["sample", "parameter"], np.array([[0, 1]], dtype=np.int32)),
+            components=[],
+        )
+        assert block.gradients_list() == ["parameter"]
+
+        gradient = block.gradient("parameter")
+        assert gradient is block.gradient("parameter")
+        assert gradient.data is gradient.data
+        assert gradient.samples is gradient.samples
+        assert gradient.properties is gradient.properties
+        assert (
+            gradient.properties._as_eqs_labels_t().internal_ptr_
+            == block.properties._as_eqs_labels_t().internal_ptr_
+        )
+
+    def test_reshaped_arrays(self, block_components):
+        block_components.add_gradient(
+            "parameter",
+            data=np.full((2, 3, 2, 2), 11.0),
+            samples=Labels(["sample"], np.array([[0], [2]], dtype=np.int32)),
+            components=[
+                Labels(["component_1"], np.array([[-1], [0], [1]], dtype=np.int32)),
+                Labels(["component_2"], np.array([[-4], [1]], dtype=np.int32)),
+            ],
+        )
+
+        # modifying the shape of the cached arrays should not change the labels
+        block_components.values.shape = (-1,)
+        gradient = block_components.gradient("parameter")
+        gradient.data.shape = (-1,)
+
+        assert len(block_components.components) == 2
+        assert block_components.properties.names == ("properties",)
+        assert len(gradient.components) == 2
+        assert gradient.properties.names == ("properties",)
+
     def test_eq(self, block):
         assert equistore.equal_block(block, block) == (block == block)
 
@@ -169,6 +169,23 @@ class TestNumpyData(ArrayWrapperMixin):
     def create_array(self, shape):
         return np.zeros(shape)
 
+    def test_data(self):
+        array = self.create_array((2, 3, 4))
+        wrapper = data.ArrayWrapper(array)
+        eqs_array = wrapper.into_eqs_array()
+
+        data_ptr = ctypes.POINTER(ctypes.c_double)()
+        status = eqs_array.data(eqs_array.ptr, data_ptr)
+        assert status == EQS_SUCCESS
+        assert ctypes.addressof(data_ptr.contents) == array.ctypes.data
+
+        # the data is no longer C-contiguous after swapping axes
+        eqs_array.swap_axes(eqs_array.ptr, 1, 2)
+        status = eqs_array.data(eqs_array.ptr, data_ptr)
+        assert status != EQS_SUCCESS
+
+        free_eqs_array(eqs_array)
+
 
 if HAS_TORCH:
 
@@ -251,3 +268,34 @@ class TestRustData:
         assert tensor_ref() is None
 
         assert np.isclose(transformed, 1.1596965632269784)
+
+    def test_no_reference_cycles(self):
+        path = os.path.join(ROOT, "..", "..", "equistore-core", "tests", "data.npz")
+        tensor = equistore.io.load_mmap(path)
+        tensor_ref = weakref.ref(tensor)
+
+        gc.collect()
+        gc.disable()
+        try:
+            block = tensor.block(0)
+            assert isinstance(block.values, equistore.data.extract.ExternalCpuArray)
+            for parameter in block.gradients_list():
+                assert block.gradient(parameter).data is not None
+                assert block.gradient(parameter).properties is not None
+
+            copy = block.copy()
+            copy_ref = weakref.ref(copy)
+            assert isinstance(copy.values, equistore.data.extract.ExternalCpuArray)
+            for parameter in copy.gradients_list():
+                assert copy.gradient(parameter).data is not None
+
+            # the cached values and gradients do not create reference cycles,
+            # so everything is released without the cyclic garbage collector
+            del block
+            del tensor
+            assert tensor_ref() is None
+
+            del copy
+            assert copy_ref() is None
+        finally:
+            gc.enable()
@@ -105,6 +105,52 @@ class TestLabels:
         assert labels.position((2, 3)) == 3
         assert labels.position((2, -1)) is None
 
+    def test_positions(self):
+        tensor = tensor_map()
+        labels = tensor.keys
+
+        entries = np.array([[2, 3], [2, -1], [0, 0]], dtype=np.int32)
+        assert_equal(labels.positions(entries), [3, -1, 0])
+
+        # labels can be used to lookup multiple entries
+        assert_equal(labels.positions(labels), np.arange(len(labels)))
+        assert_equal(labels.positions(labels[::-1]), [3, 2, 1, 0])
+
+        assert len(labels.positions(np.zeros((0, 2), dtype=np.int32))) == 0
+
+        msg = "expected a 2D array with 2 columns in Labels.positions"
+        with pytest.raises(ValueError, match=msg):
+            labels.positions(np.array([[0, 0, 0]], dtype=np.int32))
+
+    def test_position_derived_labels(self):
+        tensor = tensor_map()
+        labels = tensor.keys
+
+        reversed_labels = labels[::-1]
+        assert reversed_labels.position((0, 0)) == 3
+        assert reversed_labels.position((2, 3)) == 0
+        assert reversed_labels.position((2, -1)) is None
+
+        sliced = labels[1:]
+        assert sliced.position((0, 0)) is None
+        assert sliced.position((1, 0)) == 0
+        assert (2, 2) in sliced
+
+        # selecting a subset of the dimensions can create duplicated entries,
+        # the first position is returned in this case
+        key_1 = labels[["key_1"]]
+        assert key_1.position((0,)) == 0
+        assert key_1.position((2,)) == 2
+        assert key_1.position((3,)) is None
+        assert_equal(key_1.positions(np.array([[2], [1], [5]])), [2, 1, -1])
+
+        key_2 = labels[["key_2"]]
+        assert_equal(key_2.positions(labels[["key_2"]]), [0, 0, 2, 3])
+
+        msg = "expected label of size 1 in Labels.position, got size 2"
+        with pytest.raises(ValueError, match=msg):
+            key_1.position((0, 0))
+
     def test_contains(self):
         tensor = tensor_map()
         labels = tensor.keys
@@ -113,6 +159,70 @@ class TestLabels:
         assert (2, 3) in labels
         assert (2, -1) not in labels
 
+    def test_union(self):
+        first = Labels(["aa", "bb"], np.array([[0, 1], [1, 2], [0, 0]]))
+        second = Labels(["aa", "bb"], np.array([[1, 2], [3, 4]]))
+
+        union = first.union(second)
+        assert union.names == ("aa", "bb")
+        assert_equal(union.asarray(), [[0, 1], [1, 2], [0, 0], [3, 4]])
+        assert union.position((3, 4)) == 3
+
+        union, first_mapping, second_mapping = first.union_and_mapping(second)
+        assert_equal(union.asarray(), [[0, 1], [1, 2], [0, 0], [3, 4]])
+        assert_equal(first_mapping, [0, 1, 2])
+        assert_equal(second_mapping, [1, 3])
+
+        # derived labels can also be used
+        union = first[::-1].union(second[:1])
+        assert_equal(union.asarray(), [[0, 0], [1, 2], [0, 1]])
+
+        empty = Labels.empty(["aa", "bb"])
+        union, first_mapping, second_mapping = empty.union_and_mapping(empty)
+        assert len(union) == 0
+        assert len(first_mapping) == 0
+        assert len(second_mapping) == 0
+
+    def test_intersection(self):
+        first = Labels(["aa", "bb"], np.array([[0, 1], [1, 2], [0, 0]]))
+        second = Labels(["aa", "bb"], np.array([[0, 0], [3, 4], [0, 1]]))
+
+        intersection = first.intersection(second)
+        assert_equal(intersection.asarray(), [[0, 1], [0, 0]])
+
+        intersection, first_mapping, second_mapping = first.intersection_and_mapping(
+            second
+        )
+        assert_equal(intersection.asarray(), [[0, 1], [0, 0]])
+        assert_equal(first_mapping, [0, -1, 1])
+        assert_equal(second_mapping, [1, -1, 0])
+
+    def test_difference(self):
+        first = Labels(["aa", "bb"], np.array([[0, 1], [1, 2], [0, 0]]))
+        second = Labels(["aa", "bb"], np.array([[0, 0], [3, 4]]))
+
+        difference = first.difference(second)
+        assert_equal(difference.asarray(), [[0, 1], [1, 2]])
+
+        difference, first_mapping = first.difference_and_mapping(second)
+        assert_equal(difference.asarray(), [[0, 1], [1, 2]])
+        assert_equal(first_mapping, [0, 1, -1])
+
+    def test_set_operations_errors(self):
+        first = Labels(["aa", "bb"], np.array([[0, 1], [0, 2]]))
+        second = Labels(["bb", "aa"], np.array([[0, 0]]))
+
+        message = (
+            "invalid parameter: can not take the union of these Labels, they "
+            "have different names: \\[aa, bb\\] and \\[bb, aa\\]"
+        )
+        with pytest.raises(EquistoreError, match=message):
+            first.union(second)
+
+        message = "set operations can only be used with Labels containing unique"
+        with pytest.raises(ValueError, match=message):
+            first[["aa"]].union(first[["aa"]])
+
     def test_named_tuples(self):
         tensor = tensor_map()
         labels = tensor.keys
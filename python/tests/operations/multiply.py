@@ -309,6 +309,75 @@ class TestMultiply(unittest.TestCase):
             "B should be a TensorMap or a scalar value. ",
         )
 
+    def test_multiply_gradients_different_order(self):
+        def make_block(values, gradient_data, gradient_samples):
+            block = TensorBlock(
+                values=values,
+                samples=Labels(["samples"], np.array([[0], [2]], dtype=np.int32)),
+                components=[],
+                properties=Labels(["properties"], np.array([[0], [1]], dtype=np.int32)),
+            )
+            block.add_gradient(
+                "parameter",
+                data=gradient_data,
+                samples=Labels(["sample", "positions"], gradient_samples),
+                components=[],
+            )
+            return block
+
+        gradient_samples = np.array([[0, 0], [0, 1], [1, 1]], dtype=np.int32)
+        block_1 = make_block(
+            np.array([[1.0, 2.0], [3.0, 5.0]]),
+            np.array([[6.0, 1.0], [7.0, 2.0], [8.0, 3.0]]),
+            gradient_samples,
+        )
+        block_2 = make_block(
+            np.array([[11.0, 12.0], [13.0, 14.0]]),
+            np.array([[10.0, 11.0], [12.0, 13.0], [14.0, 15.0]]),
+            gradient_samples,
+        )
+
+        permutation = np.array([2, 0, 1])
+        block_2_permuted = make_block(
+            block_2.values,
+            block_2.gradient("parameter").data[permutation],
+            gradient_samples[permutation],
+        )
+
+        keys = Labels(["key"], np.array([[0]], dtype=np.int32))
+        A = TensorMap(keys, [block_1])
+        B = TensorMap(keys, [block_2])
+        B_permuted = TensorMap(keys, [block_2_permuted])
+
+        expected = equistore.multiply(A, B)
+        result = equistore.multiply(A, B_permuted)
+        self.assertTrue(equistore.allclose(expected, result))
+
+        gradient = result.block(0).gradient("parameter")
+        self.assertTrue(
+            np.all(gradient.samples == block_1.gradient("parameter").samples)
+        )
+        np.testing.assert_allclose(
+            gradient.data,
+            [[76.0, 34.0], [89.0, 50.0], [146.0, 117.0]],
+        )
+
+        # gradients with different samples can not be multiplied
+        block_2_different = make_block(
+            block_2.values,
+            block_2.gradient("parameter").data,
+            np.array([[0, 0], [0, 1], [1, 2]], dtype=np.int32),
+        )
+        B_different = TensorMap(keys, [block_2_different])
+
+        with self.assertRaises(ValueError) as cm:
+            equistore.multiply(A, B_different)
+        self.assertEqual(
+            str(cm.exception),
+            "the gradients with respect to 'parameter' must have the same "
+            "samples in both blocks",
+        )
+
 
 # TODO: multiply tests with torch & torch scripting/tracing
 
@@ -7,6 +7,8 @@ import numpy as np
 import equistore
 from equistore import Labels, TensorBlock, TensorMap
 from equistore.operations.equal_metadata import _labels_equal
+from equistore.operations.slice import _slice_block
+from equistore.operations.split import _partition
 
 
 DATA_ROOT = os.path.join(os.path.dirname(__file__), "..", "data")
@@ -403,6 +405,99 @@ class TestSplitProperties(unittest.TestCase):
         )
 
 
+class TestSplitPartition(unittest.TestCase):
+    """Check the one-pass split against slicing each group separately"""
+
+    def setUp(self):
+        self.tensor = equistore.load(
+            os.path.join(DATA_ROOT, TEST_FILE_1),
+            use_numpy=True,
+        )
+
+    def test_partition(self):
+        # owners 0 and 2 are in group 0, group 1 is empty and owners 2 and 3
+        # are in group 2. Owner 1 is not part of any group.
+        partition = _partition(
+            owners=np.array([2, 0, -1, 3, 2, 1]),
+            pair_owners=np.array([0, 2, 2, 3]),
+            pair_groups=np.array([0, 0, 2, 2]),
+            n_owners=4,
+            n_groups=3,
+        )
+        self.assertEqual(len(partition), 3)
+
+        rows, pairs = partition[0]
+        self.assertTrue(np.all(rows == [0, 1, 4]))
+        self.assertTrue(np.all(pairs == [1, 0, 1]))
+
+        rows, pairs = partition[1]
+        self.assertEqual(len(rows), 0)
+        self.assertEqual(len(pairs), 0)
+
+        rows, pairs = partition[2]
+        self.assertTrue(np.all(rows == [0, 3, 4]))
+        self.assertTrue(np.all(pairs == [2, 3, 2]))
+
+        # no pairs at all
+        partition = _partition(
+            owners=np.array([0, 1]),
+            pair_owners=np.zeros(0, dtype=np.int64),
+            pair_groups=np.zeros(0, dtype=np.int64),
+            n_owners=2,
+            n_groups=2,
+        )
+        self.assertEqual(len(partition), 2)
+        for rows, pairs in partition:
+            self.assertEqual(len(rows), 0)
+            self.assertEqual(len(pairs), 0)
+
+    def test_split_samples(self):
+        # block with key (2, 6, 6) has structure samples 0 -> 9 (inc.)
+        block = self.tensor.block(
+            spherical_harmonics_l=2, species_center=6, species_neighbor=6
+        )
+        self.assertTrue(len(block.gradients_list()) > 0)
+
+        grouped_idxs = [
+            # overlapping groups
+            Labels(names=["structure"], values=np.array([[7], [0], [6]])),
+            Labels(names=["structure"], values=np.array([[6], [2], [0], [4]])),
+            # empty group
+            Labels(names=["structure"], values=np.array([[-1], [-3]])),
+            # all the samples
+            Labels(names=["structure"], values=np.arange(10).reshape(-1, 1)),
+        ]
+        split_blocks = equistore.split_block(block, "samples", grouped_idxs)
+        self.assertEqual(len(split_blocks), len(grouped_idxs))
+        self.assertEqual(len(split_blocks[2].samples), 0)
+
+        # the gradients "sample" are renumbered the same way as when slicing
+        for split_block, samples in zip(split_blocks, grouped_idxs):
+            expected = _slice_block(block, samples=samples)
+            self.assertTrue(equistore.equal_block(split_block, expected))
+
+    def test_split_properties(self):
+        block = self.tensor.block(
+            spherical_harmonics_l=2, species_center=6, species_neighbor=6
+        )
+        n_max = np.max(block.properties["n"])
+
+        grouped_idxs = [
+            # overlapping groups
+            Labels(names=["n"], values=np.array([[n_max], [0]])),
+            Labels(names=["n"], values=np.array([[0], [1]])),
+            # empty group
+            Labels(names=["n"], values=np.array([[n_max + 1]])),
+        ]
+        split_blocks = equistore.split_block(block, "properties", grouped_idxs)
+        self.assertEqual(len(split_blocks), len(grouped_idxs))
+        self.assertEqual(len(split_blocks[2].properties), 0)
+
+        for split_block, properties in zip(split_blocks, grouped_idxs):
+            expected = _slice_block(block, properties=properties)
+            self.assertTrue(equistore.equal_block(split_block, expected))
+
+
 class TestSplitErrors(unittest.TestCase):
     def setUp(self):
         self.tensor = equistore.load(
@@ -1,3 +1,4 @@
+import io
 import os
 
 import numpy as np
@@ -6,7 +7,7 @@ from numpy.testing import assert_equal
 from utils import tensor_map
 
 import equistore
-from equistore import TensorMap
+from equistore import Labels, TensorBlock, TensorMap
 
 
 ROOT = os.path.dirname(__file__)
@@ -38,6 +39,345 @@ class TestIo:
         assert gradient.samples.names == ("sample", "structure", "atom")
         assert gradient.data.shape == (59, 3, 5, 3)
 
+    def test_load_mmap(self, tmpdir):
+        tensor = tensor_map()
+        tmpfile = "serialize-test.npz"
+
+        with tmpdir.as_cwd():
+            equistore.save(tmpfile, tensor)
+            loaded = equistore.io.load_mmap(tmpfile)
+
+            assert equistore.equal(loaded, tensor)
+
+            # modifications only change the data in memory
+            for _, block in loaded:
+                block.values[:] = 0.0
+                assert np.all(block.values == 0.0)
+
+            assert equistore.equal(equistore.load(tmpfile), tensor)
+
+            # files not written by equistore are read in memory
+            equistore.save(tmpfile, tensor, use_numpy=True)
+            loaded = equistore.io.load_mmap(tmpfile)
+
+            assert equistore.equal(loaded, tensor)
+
+    def test_threads(self, tmpdir):
+        tensor = tensor_map()
+
+        with tmpdir.as_cwd():
+            equistore.save("serial.npz", tensor)
+            equistore.save("parallel.npz", tensor, threads=4)
+
+            with open("serial.npz", "rb") as serial:
+                with open("parallel.npz", "rb") as parallel:
+                    assert serial.read() == parallel.read()
+
+            loaded = equistore.load("parallel.npz", threads=4)
+            assert equistore.equal(loaded, tensor)
+
+            message = "multiple threads can not be used with `use_numpy=True`"
+            with pytest.raises(ValueError, match=message):
+                equistore.save("parallel.npz", tensor, use_numpy=True, threads=4)
+
+            with pytest.raises(ValueError, match="threads must be positive"):
+                equistore.load("parallel.npz", threads=-1)
+
+    @pytest.mark.parametrize("use_numpy", (True, False))
+    def test_save_options(self, use_numpy, tmpdir):
+        tensor = tensor_map()
+
+        with tmpdir.as_cwd():
+            equistore.save("compressed.npz", tensor, use_numpy=use_numpy, compress=True)
+            data = np.load("compressed.npz")
+            assert_equal(data["blocks/0/values/data"], tensor.block(0).values)
+
+            loaded = equistore.load("compressed.npz")
+            assert equistore.equal(loaded, tensor)
+
+            for data_type in [np.float32, np.float16]:
+                equistore.save(
+                    "small.npz",
+                    tensor,
+                    use_numpy=use_numpy,
+                    data_type=data_type.__name__,
+                )
+                data = np.load("small.npz")
+                assert data["blocks/0/values/data"].dtype == data_type
+
+                # the data is converted back to float64 by both implementations
+                for load_use_numpy in [False, True]:
+                    loaded = equistore.load("small.npz", use_numpy=load_use_numpy)
+                    for (_, block), (_, loaded_block) in zip(tensor, loaded):
+                        assert loaded_block.values.dtype == np.float64
+                        expected = block.values.astype(data_type).astype(np.float64)
+                        assert_equal(loaded_block.values, expected)
+
+                        for parameter, gradient in block.gradients():
+                            loaded_gradient = loaded_block.gradient(parameter)
+                            assert loaded_gradient.data.dtype == np.float64
+                            expected = gradient.data.astype(data_type)
+                            expected = expected.astype(np.float64)
+                            assert_equal(loaded_gradient.data, expected)
+
+            message = (
+                "unknown storage type 'float128', expected one of "
+                "'float64', 'float32' or 'float16'"
+            )
+            with pytest.raises(Exception, match=message):
+                equistore.save(
+                    "error.npz", tensor, use_numpy=use_numpy, data_type="float128"
+                )
+
+    def test_reader(self, tmpdir):
+        tensor = tensor_map()
+        tmpfile = "serialize-test.npz"
+
+        with tmpdir.as_cwd():
+            equistore.save(tmpfile, tensor)
+            reader = equistore.io.TensorMapReader(tmpfile, cache_size=1)
+
+        assert len(reader) == len(tensor)
+        assert np.all(reader.keys == tensor.keys)
+
+        assert reader.blocks_matching(key_1=2) == tensor.blocks_matching(key_1=2)
+        assert reader.blocks_matching(tensor.keys[1]) == [1]
+        assert reader.blocks_matching() == [0, 1, 2, 3]
+
+        block = reader.block(key_1=1, key_2=0)
+        assert equistore.equal_block(block, tensor.block(key_1=1, key_2=0))
+        # the block is cached
+        assert reader.block(1) is block
+
+        blocks = reader.blocks(key_1=2)
+        assert len(blocks) == 2
+        for block, expected in zip(blocks, tensor.blocks(key_1=2)):
+            assert equistore.equal_block(block, expected)
+
+        # the cache only contains the last block
+        assert reader.block(3) is blocks[1]
+        assert reader.block(2) is not blocks[0]
+
+        for (key, block), (expected_key, expected) in zip(reader, tensor):
+            assert key == expected_key
+            assert equistore.equal_block(block, expected)
+
+        message = "'not_there' is not part of the keys for this tensor"
+        with pytest.raises(ValueError, match=message):
+            reader.blocks_matching(not_there=3)
+
+        reader.close()
+        # the keys are still available
+        assert reader.blocks_matching(key_1=2) == tensor.blocks_matching(key_1=2)
+
+        message = "can not read blocks from a closed TensorMapReader"
+        with pytest.raises(ValueError, match=message):
+            reader.block(0)
+
+        with tmpdir.as_cwd():
+            with equistore.io.TensorMapReader(tmpfile) as reader:
+                block = reader.block(1)
+
+        assert equistore.equal_block(block, tensor.block(1))
+        with pytest.raises(ValueError, match=message):
+            reader.block(2)
+
+    def test_writer(self, tmpdir):
+        tensor = tensor_map()
+
+        with tmpdir.as_cwd():
+            equistore.save("save.npz", tensor)
+
+            names = tensor.keys.names
+            with equistore.io.TensorMapWriter("writer.npz", names) as writer:
+                for key, block in tensor:
+                    writer.add(key, block)
+
+            with open("save.npz", "rb") as save:
+                with open("writer.npz", "rb") as written:
+                    assert save.read() == written.read()
+
+            loaded = equistore.load("writer.npz")
+            assert equistore.equal(loaded, tensor)
+
+            # explicitly calling finish inside the with block
+            with equistore.io.TensorMapWriter("finish.npz", names) as writer:
+                for key, block in tensor:
+                    writer.add(key, block)
+                writer.finish()
+
+            loaded = equistore.load("finish.npz")
+            assert equistore.equal(loaded, tensor)
+
+            writer = equistore.io.TensorMapWriter("error.npz", names)
+            writer.add((0, 0), tensor.block(0))
+
+            message = "can not have the same label value multiple time"
+            with pytest.raises(equistore.EquistoreError, match=message):
+                writer.add((0, 0), tensor.block(1))
+
+            message = "expected a key with 2 values, got 1"
+            with pytest.raises(equistore.EquistoreError, match=message):
+                writer.add((3,), tensor.block(1))
+
+            writer.finish()
+            message = "can not add blocks to a writer after calling"
+            with pytest.raises(equistore.EquistoreError, match=message):
+                writer.add((3, 3), tensor.block(1))
+
+    @pytest.mark.parametrize("use_numpy", (True, False))
+    def test_load_selection(self, use_numpy, tmpdir):
+        tensor = tensor_map()
+        keys = Labels(["key_1"], np.array([[2]]))
+        samples = Labels(["samples"], np.array([[0], [3]]))
+        properties = Labels(["properties"], np.array([[0], [4]]))
+
+        with tmpdir.as_cwd():
+            equistore.save("selection.npz", tensor)
+
+            loaded = equistore.load("selection.npz", use_numpy=use_numpy, keys=keys)
+            expected = equistore.drop_blocks(
+                tensor, Labels(["key_1", "key_2"], np.array([[0, 0], [1, 0]]))
+            )
+            assert equistore.equal(loaded, expected)
+
+            loaded = equistore.load(
+                "selection.npz",
+                use_numpy=use_numpy,
+                samples=samples,
+                properties=properties,
+            )
+            expected = equistore.slice(tensor, samples=samples, properties=properties)
+            assert equistore.equal(loaded, expected)
+
+            # gradients samples are updated to refer to the new samples
+            block = loaded.block(key_1=2, key_2=2)
+            assert_equal(block.samples["samples"], [0, 3])
+            gradient = block.gradient("parameter")
+            assert_equal(gradient.samples["sample"], [1])
+
+            message = "'foo' is not part of the samples of this tensor"
+            with pytest.raises(Exception, match=message):
+                equistore.load(
+                    "selection.npz",
+                    use_numpy=use_numpy,
+                    samples=Labels(["foo"], np.array([[0]])),
+                )
+
+    @pytest.mark.parametrize("use_numpy", (True, False))
+    def test_buffer(self, use_numpy, tmpdir):
+        tensor = tensor_map()
+
+        buffer = equistore.io.save_buffer(tensor, use_numpy=use_numpy)
+        assert isinstance(buffer, memoryview)
+
+        if not use_numpy:
+            with tmpdir.as_cwd():
+                equistore.save("file.npz", tensor)
+                with open("file.npz", "rb") as fd:
+                    assert fd.read() == buffer.tobytes()
+
+        loaded = equistore.io.load_buffer(buffer, use_numpy=use_numpy)
+        assert equistore.equal(loaded, tensor)
+
+        loaded = equistore.load(bytes(buffer), use_numpy=use_numpy)
+        assert equistore.equal(loaded, tensor)
+
+        # file-like objects
+        file = io.BytesIO()
+        equistore.save(file, tensor, use_numpy=use_numpy)
+        assert file.getvalue() == buffer.tobytes()
+
+        file.seek(0)
+        loaded = equistore.load(file, use_numpy=use_numpy)
+        assert equistore.equal(loaded, tensor)
+
+        if not use_numpy:
+            message = "multiple threads can only be used when loading from a path"
+            with pytest.raises(ValueError, match=message):
+                equistore.load(buffer, threads=4)
+
+            message = "threads, compress and data_type can only be used when saving"
+            with pytest.raises(ValueError, match=message):
+                equistore.save(io.BytesIO(), tensor, compress=True)
+
+    def test_sharded(self, tmpdir):
+        def shard(structures, keys):
+            blocks = []
+            for key in keys:
+                samples = np.array([[s, c] for s in structures for c in range(2)])
+                values = np.arange(3 * len(samples), dtype=np.float64) + 100 * key
+                block = TensorBlock(
+                    values=values.reshape(len(samples), 3),
+                    samples=Labels(["structure", "center"], samples),
+                    components=[],
+                    properties=Labels(["properties"], np.array([[0], [1], [2]])),
+                )
+                block.add_gradient(
+                    "positions",
+                    data=-values.reshape(len(samples), 3),
+                    samples=Labels(
+                        ["sample", "atom"],
+                        np.array([[i, 0] for i in range(len(samples))]),
+                    ),
+                    components=[],
+                )
+                blocks.append(block)
+
+            keys = Labels(["key"], np.array([[key] for key in keys]))
+            return TensorMap(keys, blocks)
+
+        with tmpdir.as_cwd():
+            equistore.io.save_sharded(
+                "dataset", [shard([0, 1], [0, 1]), shard([2, 3], [1, 2])]
+            )
+
+            dataset = equistore.io.ShardedTensorMap("dataset", threads=2)
+            assert len(dataset) == 3
+            assert_equal(dataset.keys["key"], [0, 1, 2])
+            assert len(dataset.shards) == 2
+
+            tensor = dataset.load()
+            block = tensor.block(key=1)
+            assert_equal(block.samples["structure"], [0, 0, 1, 1, 2, 2, 3, 3])
+            assert block.values.shape == (8, 3)
+            gradient = block.gradient("positions")
+            assert_equal(gradient.samples["sample"], np.arange(8))
+            assert_equal(gradient.data, -block.values)
+
+            assert dataset.shards_matching(structures=(2, 4)) == [1]
+            tensor = dataset.load(structures=(2, 4))
+            assert_equal(tensor.keys["key"], [1, 2])
+            block = tensor.block(key=1)
+            assert_equal(block.samples["structure"], [2, 2, 3, 3])
+            gradient = block.gradient("positions")
+            assert_equal(gradient.samples["sample"], np.arange(4))
+            assert_equal(gradient.data, -block.values)
+
+            # large ranges of structures are cheap to select
+            tensor = dataset.load(structures=(1, 2**31 - 1))
+            assert_equal(tensor.keys["key"], [0, 1, 2])
+            assert_equal(tensor.block(key=0).samples["structure"], [1, 1])
+
+            keys = Labels(["key"], np.array([[0]]))
+            assert dataset.shards_matching(keys=keys) == [0]
+            tensor = dataset.load(keys=keys)
+            assert_equal(tensor.keys["key"], [0])
+            assert tensor.block(0).values.shape == (4, 3)
+
+            # the selected range of structures is between the structures of
+            # the blocks for keys 2 and 3
+            equistore.io.save_sharded(
+                "gaps", [shard([0, 10], [2, 3]), shard([4], [1, 2])]
+            )
+            dataset = equistore.io.ShardedTensorMap("gaps")
+
+            assert dataset.shards_matching(structures=(3, 6)) == [0, 1]
+            tensor = dataset.load(structures=(3, 6))
+            assert_equal(tensor.keys["key"], [2, 1])
+            for _, block in tensor:
+                assert_equal(block.samples["structure"], [4, 4])
+
     @pytest.mark.parametrize("use_numpy", (True, False))
     def test_save(self, use_numpy, tmpdir):
         """Check that as saved file loads fine with numpy."""
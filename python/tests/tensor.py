@@ -4,6 +4,16 @@ from numpy.testing import assert_equal
 from utils import large_tensor_map, tensor_map
 
 import equistore
+import equistore.status
+from equistore import TensorBlock, TensorMap
+
+
+try:
+    import torch
+
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
 
 
 class TestTensorMap:
@@ -79,6 +89,10 @@ keys: ['key_1' 'key_2']
         block = tensor.block(key_1=1, key_2=0)
         assert_equal(block.values, np.full((3, 1, 3), 2.0))
 
+        # block by kwargs, in a different order than the keys
+        block = tensor.block(key_2=3, key_1=2)
+        assert_equal(block.values, np.full((4, 3, 1), 4.0))
+
         # block by Label entry
         block = tensor.block(tensor.keys[0])
         assert_equal(block.values, np.full((3, 1, 1), 1.0))
@@ -113,6 +127,10 @@ keys: ['key_1' 'key_2']
         with pytest.raises(ValueError, match=msg):
             tensor.block(key_1=3)
 
+        msg = "Couldn't find any block matching the selection 'key_1 = 3, key_2 = 0'"
+        with pytest.raises(ValueError, match=msg):
+            tensor.block(key_1=3, key_2=0)
+
         # more than one block matching criteria
         msg = (
             "more than one block matched 'key_2 = 0', use `TensorMap.blocks` "
@@ -121,6 +139,14 @@ keys: ['key_1' 'key_2']
         with pytest.raises(ValueError, match=msg):
             tensor.block(key_2=0)
 
+        # non-integer values in the selection
+        msg = "Labels values must be convertible to integers"
+        with pytest.raises(TypeError, match=msg):
+            tensor.block(key_1=1.5, key_2=0)
+
+        with pytest.raises(TypeError, match=msg):
+            tensor.block(key_1=1.5)
+
     def test_blocks(self, tensor):
         # block by index
         blocks = tensor.blocks(2)
@@ -139,6 +165,30 @@ keys: ['key_1' 'key_2']
         assert_equal(blocks[0].values, np.full((3, 1, 1), 1.0))
         assert_equal(blocks[1].values, np.full((3, 1, 3), 2.0))
 
+    def test_blocks_matching_keys(self, tensor):
+        selection = equistore.Labels(
+            names=["key_1", "key_2"],
+            values=np.array([[2, 3], [1, 1], [0, 0]], dtype=np.int32),
+        )
+        assert_equal(tensor.blocks_matching_keys(selection), [3, -1, 0])
+
+        selection = equistore.Labels(
+            names=["key_2", "key_1"],
+            values=np.array([[0, 1], [2, 2]], dtype=np.int32),
+        )
+        assert_equal(tensor.blocks_matching_keys(selection), [1, 2])
+
+        selection = equistore.Labels(
+            names=["key_1"],
+            values=np.array([[0]], dtype=np.int32),
+        )
+        msg = (
+            "invalid parameter: block selection labels must contain all the "
+            r"dimensions of the keys \(\[key_1, key_2\]\), got \[key_1\]"
+        )
+        with pytest.raises(equistore.EquistoreError, match=msg):
+            tensor.blocks_matching_keys(selection)
+
     def test_iter(self, tensor):
         expected = [
             ((0, 0), np.full((3, 1, 1), 1.0)),
@@ -353,3 +403,50 @@ keys: ['key_1' 'key_2']
 
     def test_pow(self, tensor):
         assert equistore.pow(tensor, 2) == (tensor**2)
+
+
+if HAS_TORCH:
+
+    class TestTensorMapTorch:
+        @pytest.fixture
+        def tensor(self):
+            # tensors requiring gradients can not give access to their data,
+            # and use the `move_samples_from` callback instead
+            blocks = []
+            for _, block in tensor_map():
+                new_block = TensorBlock(
+                    values=torch.tensor(block.values, requires_grad=True),
+                    samples=block.samples,
+                    components=block.components,
+                    properties=block.properties,
+                )
+                for parameter, gradient in block.gradients():
+                    new_block.add_gradient(
+                        parameter,
+                        data=torch.tensor(gradient.data, requires_grad=True),
+                        samples=gradient.samples,
+                        components=gradient.components,
+                    )
+                blocks.append(new_block)
+
+            return TensorMap(tensor_map().keys, blocks)
+
+        def test_keys_to_samples(self, tensor):
+            tensor = tensor.keys_to_samples("key_2", sort_samples=True)
+
+            # the data was not accessed directly, so no exception was left
+            # behind by the `data` callback
+            assert equistore.status.LAST_EXCEPTION is None
+
+            block = tensor.block(2)
+            assert isinstance(block.values, torch.Tensor)
+            assert block.values.requires_grad
+
+            expected = tensor_map().keys_to_samples("key_2", sort_samples=True)
+            expected = expected.block(2)
+            assert_equal(block.values.detach().numpy(), expected.values)
+
+            gradient = block.gradient("parameter")
+            assert_equal(
+                gradient.data.detach().numpy(), expected.gradient("parameter").data
+            )